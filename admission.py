@@ -0,0 +1,312 @@
+"""Admission control and rate limits for the expensive routes.
+
+Registration and login hash a password, applying scores with the LLM,
+shortlisting and the questions PDF generate questions and render, and all
+of them share each worker with the cheap reads. Every expensive endpoint
+belongs to a route class with a concurrency limit and a queue: up to
+`concurrency` of its requests run at once, up to `queue` more wait for a
+slot, and a request finding the queue full, or still waiting after
+ADMISSION_MAX_WAIT_SECONDS, is answered 503 with a Retry-After before its
+body is read. Waiting requests hold no thread, so a spike of applications
+leaves the rest of the thread pool and the event loop to GET /api/jobs and
+the other reads. The limits are per worker process.
+
+Token buckets per user and per client address answer a single caller who
+goes over its rate with 429 and a Retry-After. The buckets live in the
+rate_limit_buckets table, so every worker spends from the same ones, and
+each take is one conditional UPSERT. Behind nginx, set FORWARDED_ALLOW_IPS
+so the client address is the caller's rather than the proxy's.
+
+Each class can be tuned or switched off without a code change:
+
+    ADMISSION_APPLY="concurrency=4 queue=16 user=10/60 ip=60/60"
+    ADMISSION_AUTH="ip=off"
+    ADMISSION_CONTROL=0     # no limits at all
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from fastapi.routing import APIRoute
+from fastapi.responses import JSONResponse
+from sqlalchemy import case, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+
+from metrics import ADMISSION_ACTIVE, ADMISSION_WAITING, ADMISSION_WAIT, ADMISSION_REJECTED, RATE_LIMIT_ERRORS
+from models import RateLimitBucket
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") != "0"
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+MAX_RETRY_AFTER = 60
+# How often each worker deletes buckets that have been idle long enough to be full again
+BUCKET_PURGE_SECONDS = 600
+
+class Rate(NamedTuple):
+    count: int
+    seconds: float
+
+    @property
+    def per_second(self):
+        return self.count / self.seconds
+
+class Rejected(Exception):
+    def __init__(self, status_code, detail, retry_after):
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    def response(self):
+        return JSONResponse(
+            {"detail": self.detail}, status_code=self.status_code, headers={"Retry-After": str(self.retry_after)}
+        )
+
+class Gate:
+    """A counting semaphore with a bounded queue, usable from any event loop.
+
+    Each TestClient and each benchmark thread runs its own loop, so this
+    keeps its state under a threading lock and wakes a waiter through its
+    own loop instead of using asyncio.Semaphore.
+    """
+
+    def __init__(self, name, concurrency, queue):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.active = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._service_time = 0.1  # moving average of seconds a request holds a slot
+
+    def retry_after(self):
+        """Seconds until the queue ahead of a new request has likely drained"""
+        backlog = (len(self._waiters) + self.active) * self._service_time / max(self.concurrency, 1)
+        return min(max(math.ceil(backlog), 1), MAX_RETRY_AFTER)
+
+    def _rejected(self, reason):
+        ADMISSION_REJECTED.inc(route_class=self.name, reason=reason)
+        return Rejected(503, "Server is busy, please retry", self.retry_after())
+
+    async def enter(self):
+        with self._lock:
+            if self.active < self.concurrency and not self._waiters:
+                self.active += 1
+                ADMISSION_ACTIVE.set(self.active, route_class=self.name)
+                return
+            if len(self._waiters) >= self.queue:
+                raise self._rejected("queue_full")
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+            ADMISSION_WAITING.set(len(self._waiters), route_class=self.name)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait([waiter[1]], timeout=ADMISSION_MAX_WAIT_SECONDS)
+        except BaseException:
+            if not self._withdraw(waiter):
+                self.exit()  # cancelled just as it was handed a slot: pass the slot on
+            raise
+        finally:
+            ADMISSION_WAIT.observe(time.perf_counter() - start, route_class=self.name)
+        # A waiter that exit() already took off the queue owns a slot, even if its wake-up is still on the way
+        if not waiter[1].done() and self._withdraw(waiter):
+            raise self._rejected("wait_timeout")
+
+    def _withdraw(self, waiter):
+        """Take a waiter off the queue; False if it was already handed a slot"""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                return False
+            ADMISSION_WAITING.set(len(self._waiters), route_class=self.name)
+            return True
+
+    def exit(self, elapsed=None):
+        with self._lock:
+            if elapsed is not None:
+                self._service_time += (elapsed - self._service_time) * 0.2
+            while self._waiters:
+                # The slot passes straight to the oldest waiter, so active stays the same
+                loop, future = self._waiters.popleft()
+                ADMISSION_WAITING.set(len(self._waiters), route_class=self.name)
+                try:
+                    loop.call_soon_threadsafe(_wake, future)
+                    return
+                except RuntimeError:
+                    continue  # its event loop has closed
+            self.active -= 1
+            ADMISSION_ACTIVE.set(self.active, route_class=self.name)
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+def _parse_spec(name):
+    """Overrides from ADMISSION_<NAME>, e.g. 'concurrency=4 queue=16 user=10/60 ip=off'"""
+    options = {}
+    for option in os.getenv(f"ADMISSION_{name.upper()}", "").replace(",", " ").split():
+        key, _, value = option.partition("=")
+        if key in ("concurrency", "queue"):
+            options[key] = int(value)
+        elif key in ("user", "ip"):
+            options[key] = None if value == "off" else Rate(*(float(part) for part in value.split("/")))
+        else:
+            raise ValueError(f"ADMISSION_{name.upper()}: unknown option {key!r}")
+    return options
+
+class RouteClass:
+    def __init__(self, name, concurrency, queue, user=None, ip=None):
+        options = {"concurrency": concurrency, "queue": queue, "user": user, "ip": ip, **_parse_spec(name)}
+        self.name = name
+        self.user = options["user"]  # Rate per user, or None
+        self.ip = options["ip"]  # Rate per client address, or None
+        self.gate = Gate(name, options["concurrency"], options["queue"])
+
+ROUTE_CLASSES = {
+    route_class.name: route_class for route_class in (
+        # bcrypt is CPU bound: two at a time is already all of a worker's core
+        RouteClass("auth", concurrency=2, queue=32, ip=Rate(20, 60)),
+        RouteClass("apply", concurrency=4, queue=16, user=Rate(10, 60), ip=Rate(60, 60)),
+        RouteClass("shortlist", concurrency=2, queue=16, user=Rate(60, 60)),
+        RouteClass("questions_pdf", concurrency=2, queue=16, user=Rate(30, 60)),
+    )
+}
+
+def disable_rate_limits():
+    """Keep the concurrency limits but drop every rate limit, e.g. for a load test from one address"""
+    for route_class in ROUTE_CLASSES.values():
+        route_class.user = route_class.ip = None
+
+# Route class of each expensive endpoint, by the name of its function in main.py
+ENDPOINT_CLASSES = {
+    "register": "auth",
+    "login": "auth",
+    "create_application": "apply",
+    "shortlist_candidate": "shortlist",
+    "download_questions_pdf": "questions_pdf",
+}
+
+def _upsert(engine):
+    return (postgresql if engine.dialect.name == "postgresql" else sqlite).insert
+
+class TokenBuckets:
+    """Rate limits kept in the database, shared by every worker process"""
+
+    def __init__(self, engine, full_after):
+        self.engine = engine
+        self.full_after = full_after  # seconds in which an empty bucket refills, for the slowest rate
+        self._last_purge = time.time()
+
+    def take(self, key, rate, now=None):
+        """Spend one token from key's bucket; returns 0 if there was one, else seconds until there is"""
+        now = time.time() if now is None else now
+        bucket = RateLimitBucket.__table__
+        refilled = bucket.c.tokens + (now - bucket.c.updated_at) * rate.per_second
+        available = case((refilled > rate.count, rate.count), else_=refilled)
+        statement = _upsert(self.engine)(bucket).values(key=key, tokens=rate.count - 1, updated_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[bucket.c.key],
+            set_={"tokens": available - 1, "updated_at": now},
+            where=available >= 1,
+        )
+        self._purge(now)
+        with self.engine.begin() as conn:
+            if conn.execute(statement).rowcount:
+                return 0
+            tokens, updated_at = conn.execute(
+                select(bucket.c.tokens, bucket.c.updated_at).where(bucket.c.key == key)
+            ).one()
+        missing = 1 - (tokens + (now - updated_at) * rate.per_second)
+        return min(max(math.ceil(missing / rate.per_second), 1), MAX_RETRY_AFTER)
+
+    def _purge(self, now):
+        # A missing bucket counts as full, so dropping full ones changes nothing
+        if now - self._last_purge < BUCKET_PURGE_SECONDS:
+            return
+        self._last_purge = now
+        bucket = RateLimitBucket.__table__
+        with self.engine.begin() as conn:
+            conn.execute(delete(bucket).where(bucket.c.updated_at < now - self.full_after))
+
+class AdmissionMiddleware:
+    """ASGI middleware applying ROUTE_CLASSES to the endpoints in ENDPOINT_CLASSES.
+
+    routes are the app's routes, matched here because the router has not
+    run yet. identify turns a bearer token into the user's id, or None when
+    it is not valid; requests without one are limited by address only. The
+    id rather than the username keys a bucket, so a renamed account keeps its
+    bucket and a new account with an old name does not inherit it.
+    """
+
+    def __init__(self, app, routes, engine, identify):
+        self.app = app
+        self.routes = [
+            (route, ROUTE_CLASSES[ENDPOINT_CLASSES[route.endpoint.__name__]])
+            for route in routes
+            if isinstance(route, APIRoute) and route.endpoint.__name__ in ENDPOINT_CLASSES
+        ]
+        rates = [rate for route_class in ROUTE_CLASSES.values() for rate in (route_class.user, route_class.ip) if rate]
+        self.buckets = TokenBuckets(engine, full_after=max((rate.seconds for rate in rates), default=0))
+        self.identify = identify
+
+    def _match(self, scope):
+        for route, route_class in self.routes:
+            if route.matches(scope)[0] == Match.FULL:
+                return route, route_class
+        return None, None
+
+    def _rate_keys(self, scope, route_class):
+        keys = []
+        if route_class.user:
+            authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+            scheme, _, token = authorization.partition(" ")
+            user = self.identify(token) if scheme.lower() == "bearer" and token else None
+            if user is not None:
+                keys.append((f"{route_class.name}:user:{user}", route_class.user, "user_rate"))
+        if route_class.ip and scope.get("client"):
+            keys.append((f"{route_class.name}:ip:{scope['client'][0]}", route_class.ip, "ip_rate"))
+        return keys
+
+    def _check_rates(self, keys, route_class):
+        for key, rate, reason in keys:
+            try:
+                retry_after = self.buckets.take(key, rate)
+            except OperationalError:
+                # The database is locked or unavailable: admit rather than fail every request
+                RATE_LIMIT_ERRORS.inc(route_class=route_class.name)
+                return
+            if retry_after:
+                ADMISSION_REJECTED.inc(route_class=route_class.name, reason=reason)
+                raise Rejected(429, "Too many requests, please slow down", retry_after)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_CONTROL:
+            await self.app(scope, receive, send)
+            return
+        route, route_class = self._match(scope)
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            keys = self._rate_keys(scope, route_class)
+            if keys:
+                await run_in_threadpool(self._check_rates, keys, route_class)
+            await route_class.gate.enter()
+        except Rejected as e:
+            scope["route"] = route  # so the metrics label the refusal with its route
+            await e.response()(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.gate.exit(time.perf_counter() - start)
@@ -0,0 +1,305 @@
+"""Archive tier for closed jobs and old applications.
+
+    python archive.py                               # archive what is due, then release free pages
+    python archive.py --dry-run                     # count what is due without moving anything
+    python archive.py --enable-incremental-vacuum   # one full VACUUM to switch an older database over
+
+Applications to a job closed more than ARCHIVE_CLOSED_JOBS_AFTER_DAYS ago,
+or untouched for ARCHIVE_APPLICATIONS_AFTER_DAYS, move to a separate SQLite
+file (ARCHIVE_DATABASE_URL) as one zlib-compressed JSON document each,
+together with their interviews; their photo and question PDF move to
+COLD_UPLOADS_DIR. Notifications older than ARCHIVE_NOTIFICATIONS_AFTER_DAYS
+move the same way. The hot tables and their indexes then hold only live
+rows, and the pages freed go back to the filesystem through incremental
+VACUUM, a few at a time.
+
+Each batch is committed to the archive before it is deleted from the main
+database, and archive writes replace by id, so a run that stops half way
+is safe to repeat. Archived applications are read back one document at a
+time through the /api/archive routes: slower than the hot path, and kept
+off it on purpose.
+"""
+import json
+import os
+import shutil
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    create_engine, MetaData, Table, Column, Integer, DateTime, LargeBinary, select, delete, or_, exists, insert, func
+)
+
+from models import (
+    Job, Application, Notification, Interview, ScoringQueue, DedupKey, ApplicationSignature, DuplicateFlag,
+    application_skills
+)
+
+ARCHIVE_DATABASE_URL = os.getenv("ARCHIVE_DATABASE_URL", "sqlite:///./archive.db")
+COLD_UPLOADS_DIR = os.getenv("COLD_UPLOADS_DIR", "cold_uploads")
+ARCHIVE_APPLICATIONS_AFTER_DAYS = int(os.getenv("ARCHIVE_APPLICATIONS_AFTER_DAYS", "365"))
+ARCHIVE_CLOSED_JOBS_AFTER_DAYS = int(os.getenv("ARCHIVE_CLOSED_JOBS_AFTER_DAYS", "30"))
+ARCHIVE_NOTIFICATIONS_AFTER_DAYS = int(os.getenv("ARCHIVE_NOTIFICATIONS_AFTER_DAYS", "180"))
+
+BATCH_SIZE = 500
+# Pages released per incremental_vacuum call; each call is one short write transaction
+VACUUM_STEP_PAGES = 2000
+
+archive_metadata = MetaData()
+
+archived_applications = Table(
+    "archived_applications",
+    archive_metadata,
+    Column("id", Integer, primary_key=True),  # the application's id in the main database
+    Column("job_id", Integer, nullable=False, index=True),
+    Column("candidate_id", Integer, nullable=False, index=True),
+    Column("created_at", DateTime),
+    Column("archived_at", DateTime, nullable=False),
+    Column("document", LargeBinary, nullable=False),  # zlib-compressed JSON
+)
+
+archived_notifications = Table(
+    "archived_notifications",
+    archive_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=False, index=True),
+    Column("created_at", DateTime),
+    Column("archived_at", DateTime, nullable=False),
+    Column("document", LargeBinary, nullable=False),
+)
+
+_connect_args = {"check_same_thread": False, "timeout": 30} if ARCHIVE_DATABASE_URL.startswith("sqlite") else {}
+archive_engine = create_engine(ARCHIVE_DATABASE_URL, connect_args=_connect_args)
+_archive_ready = False
+
+def open_archive():
+    """The archive engine, with its tables created on first use"""
+    global _archive_ready
+    if not _archive_ready:
+        if archive_engine.dialect.name == "sqlite":
+            with archive_engine.connect() as conn:
+                # Only takes effect while the file has no tables yet
+                conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        archive_metadata.create_all(bind=archive_engine)
+        _archive_ready = True
+    return archive_engine
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+def pack(document):
+    return zlib.compress(json.dumps(document, default=_default, separators=(",", ":")).encode(), 6)
+
+def unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+def _row(obj):
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+def cold_path(path):
+    return os.path.join(COLD_UPLOADS_DIR, os.path.basename(path))
+
+def _move_to_cold(path):
+    if path and os.path.exists(path):
+        os.makedirs(COLD_UPLOADS_DIR, exist_ok=True)
+        shutil.move(path, cold_path(path))
+
+def due_applications(db, now=None):
+    """Query for the ids of applications ready to archive"""
+    now = now or datetime.utcnow()
+    closed_jobs = select(Job.id).where(
+        Job.is_active == False, Job.updated_at < now - timedelta(days=ARCHIVE_CLOSED_JOBS_AFTER_DAYS)
+    )
+    upcoming = exists().where(
+        Interview.application_id == Application.id, Interview.status == "scheduled", Interview.start_at > now
+    )
+    return select(Application.id).where(
+        or_(Application.job_id.in_(closed_jobs),
+            Application.updated_at < now - timedelta(days=ARCHIVE_APPLICATIONS_AFTER_DAYS)),
+        ~upcoming,
+    )
+
+def _archive_application_batch(db, application_ids, now):
+    from embeddings import application_vectors
+    from job_stats import rebuild_job_stats
+    from recommendations import invalidate_candidates
+
+    applications = db.query(Application).filter(Application.id.in_(application_ids)).all()
+    titles = dict(db.execute(select(Job.id, Job.title).where(Job.id.in_({a.job_id for a in applications}))).all())
+    interviews = {}
+    for interview in db.query(Interview).filter(Interview.application_id.in_(application_ids)):
+        interviews.setdefault(interview.application_id, []).append(_row(interview))
+
+    rows = []
+    for application in applications:
+        document = _row(application)
+        document["job_title"] = titles.get(application.job_id)
+        document["interviews"] = interviews.get(application.id, [])
+        rows.append({
+            "id": application.id, "job_id": application.job_id, "candidate_id": application.candidate_id,
+            "created_at": application.created_at, "archived_at": now, "document": pack(document),
+        })
+    with open_archive().begin() as conn:
+        conn.execute(insert(archived_applications).prefix_with("OR REPLACE", dialect="sqlite"), rows)
+
+    # Only now that the archive has committed do the hot rows go
+    uploads = [(a.id, a.photo_path) for a in applications]
+    db.execute(delete(application_skills).where(application_skills.c.application_id.in_(application_ids)))
+    for model in (ScoringQueue, DedupKey, ApplicationSignature, Interview):
+        db.execute(delete(model).where(model.application_id.in_(application_ids)))
+    db.execute(delete(DuplicateFlag).where(
+        or_(DuplicateFlag.application_id.in_(application_ids), DuplicateFlag.duplicate_of.in_(application_ids))
+    ))
+    invalidate_candidates(db, {a.candidate_id for a in applications})
+    db.execute(delete(Application).where(Application.id.in_(application_ids)))
+    # The job stats count live applications only
+    rebuild_job_stats(db, list({a.job_id for a in applications}))
+    db.commit()
+
+    for application_id, photo_path in uploads:
+        application_vectors.put(application_id, None)
+        _move_to_cold(photo_path)
+        _move_to_cold(f"uploads/interview_questions_{application_id}.pdf")
+    return len(uploads)
+
+def archive_applications(db, batch_size=BATCH_SIZE, now=None, dry_run=False):
+    """Move every application that is due to the archive; returns how many moved"""
+    now = now or datetime.utcnow()
+    due = due_applications(db, now)
+    if dry_run:
+        return db.scalar(select(func.count()).select_from(due.subquery()))
+    moved, after_id = 0, 0
+    while True:
+        ids = db.scalars(due.where(Application.id > after_id).order_by(Application.id).limit(batch_size)).all()
+        if not ids:
+            return moved
+        moved += _archive_application_batch(db, ids, now)
+        after_id = ids[-1]
+
+def archive_notifications(db, batch_size=BATCH_SIZE, now=None, dry_run=False):
+    now = now or datetime.utcnow()
+    due = select(Notification).where(
+        Notification.created_at < now - timedelta(days=ARCHIVE_NOTIFICATIONS_AFTER_DAYS)
+    )
+    if dry_run:
+        return db.scalar(select(func.count()).select_from(due.subquery()))
+    moved = 0
+    while True:
+        notifications = db.scalars(due.order_by(Notification.id).limit(batch_size)).all()
+        if not notifications:
+            return moved
+        with open_archive().begin() as conn:
+            conn.execute(insert(archived_notifications).prefix_with("OR REPLACE", dialect="sqlite"), [
+                {"id": n.id, "user_id": n.user_id, "created_at": n.created_at, "archived_at": now, "document": pack(_row(n))}
+                for n in notifications
+            ])
+        db.execute(delete(Notification).where(Notification.id.in_([n.id for n in notifications])))
+        db.commit()
+        moved += len(notifications)
+
+def release_free_pages(engine, step=VACUUM_STEP_PAGES):
+    """Give pages freed by deletes back to the filesystem; returns how many, or None without incremental auto_vacuum"""
+    if engine.dialect.name != "sqlite":
+        return 0
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            return None
+        released = 0
+        free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        while free:
+            # A small step at a time, so app writers are never held up for long. The pragma frees
+            # one page per step of the statement, and only executescript steps it to the end.
+            conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({min(free, step)})")
+            left = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if left >= free:
+                break
+            released += free - left
+            free = left
+        return released
+
+def enable_incremental_vacuum(engine):
+    """Switch an existing database to incremental auto_vacuum; rewrites the whole file, so run it in a quiet period"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+
+def run(db, batch_size=BATCH_SIZE, dry_run=False):
+    """One archival pass; returns counts for the CLI"""
+    from database import engine
+
+    now = datetime.utcnow()
+    counts = {
+        "applications": archive_applications(db, batch_size, now, dry_run),
+        "notifications": archive_notifications(db, batch_size, now, dry_run),
+    }
+    if not dry_run:
+        counts["pages released"] = release_free_pages(engine)
+    return counts
+
+# Slow path: documents are read back from the archive one by one
+def get_archived_application(application_id):
+    with open_archive().connect() as conn:
+        row = conn.execute(
+            select(archived_applications.c.archived_at, archived_applications.c.document)
+            .where(archived_applications.c.id == application_id)
+        ).first()
+    if row is None:
+        return None
+    return {**unpack(row.document), "archived_at": row.archived_at}
+
+def archived_applications_for(job_id=None, candidate_id=None, limit=50, offset=0):
+    query = select(archived_applications.c.archived_at, archived_applications.c.document)
+    if job_id is not None:
+        query = query.where(archived_applications.c.job_id == job_id)
+    if candidate_id is not None:
+        query = query.where(archived_applications.c.candidate_id == candidate_id)
+    with open_archive().connect() as conn:
+        rows = conn.execute(query.order_by(archived_applications.c.id).offset(offset).limit(limit)).all()
+    return [{**unpack(row.document), "archived_at": row.archived_at} for row in rows]
+
+def archived_notifications_for(user_id, limit=50, offset=0):
+    with open_archive().connect() as conn:
+        rows = conn.execute(
+            select(archived_notifications.c.archived_at, archived_notifications.c.document)
+            .where(archived_notifications.c.user_id == user_id)
+            .order_by(archived_notifications.c.id.desc())
+            .offset(offset)
+            .limit(limit)
+        ).all()
+    return [{**unpack(row.document), "archived_at": row.archived_at} for row in rows]
+
+def archived_file(path):
+    """Where an archived upload is now: the cold directory, or its old place if the move never happened"""
+    if not path:
+        return None
+    for candidate in (cold_path(path), path):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move applications of closed jobs, old applications and old notifications to the archive")
+    parser.add_argument("--dry-run", action="store_true", help="count what is due without moving anything")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="rewrite the main database once so freed pages can be released incrementally")
+    args = parser.parse_args()
+
+    from database import engine, SessionLocal
+
+    if args.enable_incremental_vacuum:
+        enable_incremental_vacuum(engine)
+        print("Incremental auto_vacuum enabled")
+    else:
+        db = SessionLocal()
+        try:
+            counts = run(db, args.batch_size, args.dry_run)
+        finally:
+            db.close()
+        if counts.get("pages released", 0) is None:
+            counts["pages released"] = "n/a (run with --enable-incremental-vacuum once)"
+        print(", ".join(f"{name}: {count}" for name, count in counts.items()))
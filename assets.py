@@ -0,0 +1,89 @@
+import mimetypes
+import os
+import re
+
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+
+STATIC_DIR = "static"
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# script.<12 hex chars>.js as written by build_assets.py
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{12}\.[a-z0-9]+$")
+
+# Preferred order when the client accepts several encodings
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves .br/.gz siblings produced by build_assets.py.
+
+    Fingerprinted files never change under the same name, so they are sent
+    with an immutable one-year Cache-Control. Everything else must be
+    revalidated with the usual ETag / Last-Modified handshake.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        accepted = request_headers.get("accept-encoding", "")
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+
+        headers = {"Vary": "Accept-Encoding"}
+        if FINGERPRINTED.search(str(full_path)):
+            headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            compressed_path = f"{full_path}{suffix}"
+            try:
+                compressed_stat = os.stat(compressed_path)
+            except OSError:
+                continue
+            headers["Content-Encoding"] = encoding
+            response = FileResponse(
+                compressed_path,
+                status_code=status_code,
+                stat_result=compressed_stat,
+                media_type=media_type,
+                headers=headers,
+            )
+            break
+        else:
+            response = FileResponse(
+                full_path, status_code=status_code, stat_result=stat_result, media_type=media_type, headers=headers
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+class IndexPage:
+    """index.html held in memory, preferring the fingerprinted build.
+
+    The gzip variant from build_assets.py is kept alongside so the landing
+    page is never compressed per request.
+    """
+
+    def __init__(self):
+        self.body = None
+        self.gzip_body = None
+
+    def load(self):
+        built = os.path.join(DIST_DIR, "index.html")
+        path = built if os.path.exists(built) else os.path.join(STATIC_DIR, "index.html")
+        with open(path, "rb") as f:
+            self.body = f.read()
+        gz_path = path + ".gz"
+        if os.path.exists(gz_path):
+            with open(gz_path, "rb") as f:
+                self.gzip_body = f.read()
+        return self
+
+index_page = IndexPage()
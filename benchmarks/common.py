@@ -0,0 +1,77 @@
+"""Shared helpers for the benchmark scripts.
+
+Every benchmark runs against a throwaway working directory with its own
+SQLite file and uploads/ folder, so it never touches hr_assist.db.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Smallest valid PNG (1x1 transparent pixel) used as the application photo
+PNG_PIXEL = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+
+def setup_workdir(path=None):
+    """chdir into an isolated directory and bootstrap a fresh database there.
+
+    Must run before anything imports database or main.
+    """
+    workdir = path or tempfile.mkdtemp(prefix="hr_assist_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    static_link = os.path.join(workdir, "static")
+    if not os.path.exists(static_link):
+        os.symlink(os.path.join(REPO_ROOT, "static"), static_link)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.chdir(workdir)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from bootstrap import bootstrap
+    bootstrap()
+    return workdir
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(name, latencies, wall_time=None):
+    values = sorted(latencies)
+    total = wall_time if wall_time is not None else sum(values)
+    return {
+        "name": name,
+        "count": len(values),
+        "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "throughput": len(values) / total if total else 0.0,
+    }
+
+def print_table(rows):
+    header = f"{'benchmark':<28}{'count':>8}{'mean ms':>11}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'ops/s':>11}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['name']:<28}{row['count']:>8}{row['mean_ms']:>11.2f}{row['p50_ms']:>11.2f}"
+            f"{row['p95_ms']:>11.2f}{row['p99_ms']:>11.2f}{row['throughput']:>11.1f}"
+        )
+
+def time_calls(func, iterations, warmup=10):
+    """Run func repeatedly and return per-call latencies in seconds"""
+    for _ in range(warmup):
+        func()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return latencies
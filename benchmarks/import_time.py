@@ -0,0 +1,93 @@
+"""Measure how long `import main` takes and fail when it goes over budget.
+
+    python -m benchmarks.import_time --runs 5 --budget-ms 1200
+
+Each run imports the app in a fresh interpreter with `python -X importtime`
+and the median cumulative time of `main` is compared with the budget. It
+also fails if a dependency that should be imported lazily (OpenAI,
+ReportLab, PIL, passlib, numpy) is loaded by the import, or if the import writes
+anything to the working directory.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import REPO_ROOT
+
+# Only needed on specific code paths, never at import
+LAZY_MODULES = ("openai", "reportlab", "PIL", "passlib", "numpy", "pypdf", "zstandard", "llama_cpp")
+
+CHECK_LAZY = (
+    "import sys, main; "
+    f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+)
+
+def parse_importtime(stderr):
+    """Map module name -> (self_us, cumulative_us) from -X importtime output"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+def run_python(args, workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'import.db')}")
+    return subprocess.run(
+        [sys.executable, *args], cwd=workdir, env=env, capture_output=True, text=True, check=True
+    )
+
+def top_level_imports(timings, limit):
+    """Slowest top-level packages, by cumulative import time"""
+    rows = []
+    for name, (_, cumulative_us) in timings.items():
+        if name != "main" and "." not in name:
+            rows.append((cumulative_us, name))
+    return sorted(rows, reverse=True)[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "1200")),
+        help="fail if the median import of main takes longer (default: $IMPORT_TIME_BUDGET_MS or 1200)",
+    )
+    parser.add_argument("--top", type=int, default=10, help="show this many of the slowest imports")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hr_assist_import_")
+    samples = []
+    timings = {}
+    for _ in range(args.runs):
+        timings = parse_importtime(run_python(["-X", "importtime", "-c", "import main"], workdir).stderr)
+        samples.append(timings["main"][1] / 1000)
+
+    median_ms = statistics.median(samples)
+    print(f"import main: median {median_ms:.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print(f"\n{'module':<28}{'cumulative ms':>15}")
+    for cumulative_us, name in top_level_imports(timings, args.top):
+        print(f"{name:<28}{cumulative_us / 1000:>15.1f}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"import main took {median_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    eager = run_python(["-c", CHECK_LAZY], workdir).stdout.strip()
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {eager}")
+    created = sorted(set(os.listdir(workdir)) - {"__pycache__"})
+    if created:
+        failures.append(f"import wrote to the working directory: {', '.join(created)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
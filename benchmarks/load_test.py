@@ -0,0 +1,179 @@
+"""Drive the main user flows and report latency percentiles and throughput.
+
+In-process (seeds a temp database and answers LLM calls with llm.FakeProvider):
+
+    python -m benchmarks.load_test --candidates 500 --applications 5000 --requests 200 --concurrency 8 --llm-latency 0.2
+
+Against a running server (for example one started with benchmarks.serve):
+
+    python -m benchmarks.load_test --url http://localhost:8000 --requests 500 --concurrency 32
+"""
+import argparse
+import itertools
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import PNG_PIXEL, setup_workdir, summarize, print_table
+from benchmarks.seed import BENCH_PASSWORD, HR_USERNAME
+
+FLOWS = [
+    "register", "login", "refresh", "list_jobs", "apply", "list_applications", "shortlist", "pdf_download", "notifications",
+]
+
+class Context:
+    def __init__(self, client_factory):
+        self.client_factory = client_factory
+        self._local = threading.local()
+        self.run_id = uuid.uuid4().hex[:8]
+        self.counter = itertools.count()
+        self.rng = random.Random(7)
+
+    @property
+    def client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def login(self, username):
+        response = self.client.post("/api/login", json={"username": username, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def prepare(self, candidates):
+        self.hr = self.login(HR_USERNAME)
+        self.job_ids = [job["id"] for job in self.client.get("/api/jobs").json()]
+        if not self.job_ids:
+            raise SystemExit("No jobs found; seed the database first")
+        self.candidates = []
+        for i in range(candidates):
+            username = f"lt_{self.run_id}_c{i}"
+            self.register(username, "candidate").raise_for_status()
+            self.candidates.append(self.login(username))
+        applications = self.client.get(f"/api/jobs/{self.job_ids[0]}/applications", headers=self.hr).json()
+        self.application_ids = [application["id"] for application in applications] or [1]
+
+    def register(self, username, user_type):
+        return self.client.post("/api/register", json={
+            "username": username, "email": f"{username}@example.com", "full_name": username,
+            "user_type": user_type, "password": BENCH_PASSWORD,
+        })
+
+def flow_register(ctx):
+    return ctx.register(f"lt_{ctx.run_id}_r{next(ctx.counter)}", "candidate")
+
+def flow_login(ctx):
+    return ctx.client.post("/api/login", json={"username": HR_USERNAME, "password": BENCH_PASSWORD})
+
+def flow_refresh(ctx):
+    """Renew a session the way a client does every ACCESS_TOKEN_EXPIRE_MINUTES; no bcrypt involved"""
+    token = getattr(ctx._local, "refresh_token", None)
+    if token is None:
+        response = ctx.client.post("/api/login", json={"username": HR_USERNAME, "password": BENCH_PASSWORD})
+        token = response.json()["refresh_token"]
+    response = ctx.client.post("/api/token/refresh", json={"refresh_token": token})
+    if response.status_code == 200:
+        ctx._local.refresh_token = response.json()["refresh_token"]
+    return response
+
+def flow_list_jobs(ctx):
+    return ctx.client.get("/api/jobs")
+
+def flow_apply(ctx):
+    data = {
+        "job_id": ctx.rng.choice(ctx.job_ids), "name": "Load Test", "email": "lt@example.com", "phone": "+15550000000",
+        "address": "1 Load Street", "experience_years": ctx.rng.randint(0, 12),
+        "relevant_experience": "Built and scaled APIs", "skills": "python, sql, docker, kubernetes",
+        "education": "BSc", "projects": "Benchmark harness", "preferred_location": "Remote",
+    }
+    files = {"photo": ("photo.png", PNG_PIXEL, "image/png")}
+    return ctx.client.post("/api/applications", data=data, files=files, headers=ctx.rng.choice(ctx.candidates))
+
+def flow_list_applications(ctx):
+    return ctx.client.get(f"/api/jobs/{ctx.rng.choice(ctx.job_ids)}/applications", headers=ctx.hr)
+
+def flow_shortlist(ctx):
+    return ctx.client.post(f"/api/applications/{ctx.rng.choice(ctx.application_ids)}/shortlist", headers=ctx.hr)
+
+def flow_pdf_download(ctx):
+    return ctx.client.get(f"/api/applications/{ctx.rng.choice(ctx.application_ids)}/questions/pdf", headers=ctx.hr)
+
+def flow_notifications(ctx):
+    return ctx.client.get("/api/notifications", headers=ctx.rng.choice(ctx.candidates))
+
+def run_flow(ctx, name, requests, concurrency):
+    flow = globals()[f"flow_{name}"]
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        start = time.perf_counter()
+        response = flow(ctx)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    row = summarize(name, latencies, time.perf_counter() - started)
+    row["errors"] = errors
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server; omit to run in-process")
+    parser.add_argument("--flows", default=",".join(FLOWS), help="comma separated subset of: " + ", ".join(FLOWS))
+    parser.add_argument("--requests", type=int, default=200, help="requests per flow")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="fake LLM latency in seconds (in-process)")
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--applications", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.url:
+        import httpx
+
+        def client_factory():
+            return httpx.Client(base_url=args.url, timeout=120)
+    else:
+        setup_workdir()
+        from admission import disable_rate_limits
+        from llm import FakeProvider, set_provider
+        from benchmarks.seed import seed
+        from database import SessionLocal
+        from fastapi.testclient import TestClient
+        import main as app_module
+
+        set_provider(FakeProvider(args.llm_latency))
+        # Every client shares one address and a handful of users
+        disable_rate_limits()
+        db = SessionLocal()
+        try:
+            seed(db, args.candidates, args.jobs, args.applications)
+        finally:
+            db.close()
+
+        def client_factory():
+            return TestClient(app_module.app)
+
+    ctx = Context(client_factory)
+    ctx.prepare(candidates=min(args.concurrency * 2, 50))
+
+    rows = [run_flow(ctx, name, args.requests, args.concurrency) for name in args.flows.split(",") if name]
+    print_table(rows)
+    failed = [row for row in rows if row["errors"]]
+    for row in failed:
+        print(f"{row['name']}: {row['errors']} requests failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+"""Micro-benchmarks for hot helpers that run inside requests.
+
+    python -m benchmarks.micro --iterations 2000
+"""
+import argparse
+from types import SimpleNamespace
+
+from benchmarks.common import setup_workdir, summarize, print_table, time_calls
+
+def bench_verify_token(main, iterations):
+    token = main.create_access_token({"sub": "bench_user"}, main.timedelta(minutes=30))
+    return summarize("verify_token", time_calls(lambda: main.verify_token(token), iterations))
+
+def bench_fallback_score(main, iterations):
+    from skills import parse_skills
+
+    job_skills = "Python, Kubernetes, PostgreSQL, Docker, AWS, Terraform, Go, React"
+    candidate_skills = "python3, k8s, postgres, docker, gcp, terraform, javascript, react.js, redis"
+    names = {name: i for i, name in enumerate(sorted(set(parse_skills(job_skills)) | set(parse_skills(candidate_skills))))}
+
+    job = SimpleNamespace(
+        skills=job_skills, experience_years=4,
+        indexed_skills=[SimpleNamespace(id=names[n]) for n in parse_skills(job_skills)],
+    )
+    legacy_job = SimpleNamespace(skills=job_skills, experience_years=4, indexed_skills=[])
+    candidate = {"experience_years": 5, "skills": candidate_skills}
+    indexed_candidate = dict(candidate, skill_ids={names[n] for n in parse_skills(candidate_skills)})
+
+    return [
+        summarize("fallback_score (strings)",
+                  time_calls(lambda: main.calculate_fallback_score(legacy_job, candidate), iterations)),
+        summarize("fallback_score (skill ids)",
+                  time_calls(lambda: main.calculate_fallback_score(job, indexed_candidate), iterations)),
+    ]
+
+def bench_dedup_signature(iterations):
+    import dedup
+
+    application = SimpleNamespace(
+        relevant_experience="Built and scaled payment APIs serving 20k requests per second on Kubernetes. " * 3,
+        skills="python, go, postgresql, kafka, kubernetes, terraform",
+        education="BSc Computer Science",
+        projects="Open source rate limiter; streaming ETL pipeline; internal developer portal",
+    )
+    return summarize(
+        "dedup minhash signature",
+        time_calls(lambda: dedup.minhash(dedup.shingles(dedup.profile_text(application))), iterations),
+    )
+
+def bench_embeddings(iterations, rows=20000):
+    import random
+    import embeddings
+
+    application = SimpleNamespace(
+        relevant_experience="Built and scaled payment APIs serving 20k requests per second on Kubernetes.",
+        skills="python, go, postgresql, kafka, kubernetes, terraform",
+        education="BSc Computer Science",
+        projects="Open source rate limiter; streaming ETL pipeline; internal developer portal",
+    )
+    rng = random.Random(7)
+    words = application.relevant_experience.split() + application.projects.split()
+    store = embeddings.VectorStore("bench_applications")
+    for row_id in range(1, rows + 1):
+        store.put(row_id, embeddings.embed(
+            ", ".join(rng.sample(application.skills.split(", "), 3)), " ".join(rng.sample(words, 8))
+        ))
+    query = embeddings.embed("python, kubernetes, postgres", "Backend engineer for payment APIs")
+    ids = list(range(1, rows + 1))
+    return [
+        summarize("embed application", time_calls(lambda: embeddings.embed_application(application), iterations)),
+        summarize(f"top 20 of {rows} vectors", time_calls(lambda: store.nearest(query, ids, 20), max(iterations // 10, 10))),
+    ]
+
+def bench_scheduling(iterations, interviewers=40, days=60, per_day=12):
+    import random
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from database import SessionLocal
+    from models import Interview
+    import scheduling
+
+    rng = random.Random(3)
+    first_day = datetime(2030, 1, 1, 9)
+    hour = timedelta(hours=1)
+    db = SessionLocal()
+    db.execute(insert(Interview), [
+        {
+            "application_id": 0, "interviewer_id": i, "candidate_id": rng.randrange(1, 100000),
+            "start_at": first_day + timedelta(days=d) + slot * hour * 0.75,
+            "end_at": first_day + timedelta(days=d) + slot * hour * 0.75 + hour / 2, "status": "scheduled",
+        }
+        for i in range(1, interviewers + 1) for d in range(days) for slot in range(per_day)
+    ])
+    db.commit()
+    total = interviewers * days * per_day
+
+    def book():
+        day = first_day + timedelta(days=rng.randrange(days))
+        scheduling._book(db, 0, rng.randrange(1, 100000), rng.randrange(1, interviewers + 1), day, day + hour / 2, None)
+        db.rollback()
+
+    windows = [(i, first_day, first_day + 9 * hour) for i in range(1, 21)]
+    applications = [(a, a) for a in range(300)]
+    plan = lambda: scheduling.plan_interviews(
+        applications, windows, {}, {}, hour * 0.75, timedelta(minutes=15), timedelta(minutes=15)
+    )
+    rows = [
+        summarize(f"book, {total} interviews", time_calls(book, iterations)),
+        summarize("plan 300 over 20 people", time_calls(plan, max(iterations // 10, 10))),
+    ]
+    db.close()
+    return rows
+
+def bench_pdf_render(main, iterations):
+    questions = [
+        f"Question {i}: walk us through a production incident you owned and what you changed afterwards."
+        for i in range(1, 11)
+    ]
+    return summarize(
+        "render_questions_pdf",
+        time_calls(lambda: main.render_questions_pdf("Backend Engineer", "Jane Doe", questions), iterations, warmup=3),
+    )
+
+def bench_profiling(main, iterations):
+    """Request cost with profiling off, and with a profile sampled and saved for every request"""
+    import profiling
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    profiling.ADMIN_TOKEN = "bench"
+    profiled = {"X-Profile": "1", "X-Admin-Token": "bench"}
+    return [
+        summarize("GET /api/jobs", time_calls(lambda: client.get("/api/jobs"), iterations)),
+        summarize("GET /api/jobs, profiled", time_calls(lambda: client.get("/api/jobs", headers=profiled), iterations)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--pdf-iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_workdir()
+    import main as app_module
+
+    rows = [bench_verify_token(app_module, args.iterations)]
+    rows.extend(bench_fallback_score(app_module, args.iterations))
+    rows.append(bench_dedup_signature(args.iterations // 4))
+    rows.extend(bench_embeddings(args.iterations // 4))
+    rows.extend(bench_scheduling(args.iterations // 4))
+    rows.append(bench_pdf_render(app_module, args.pdf_iterations))
+    rows.extend(bench_profiling(app_module, args.iterations // 10))
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Cheap-read latency while expensive routes are flooded, with and without admission control.
+
+    python -m benchmarks.overload --flood 48 --duration 15 --llm-latency 0.3
+
+One uvicorn server (a single worker's event loop and thread pool) runs on
+a seeded temp database with the fake LLM provider. For each mode, --flood
+clients hammer login, apply and the questions PDF while --readers clients
+fetch GET /api/jobs; the table reports the read latency, and the flood's
+status codes are printed below it. Rate limits are switched off, since
+every client shares one address; only the concurrency limits and queues
+are measured.
+"""
+import argparse
+import collections
+import random
+import threading
+import time
+
+from benchmarks.common import PNG_PIXEL, setup_workdir, summarize, print_table
+from benchmarks.seed import BENCH_PASSWORD, HR_USERNAME, candidate_username
+from benchmarks.scaling import wait_until_ready
+
+def login(client, username):
+    response = client.post("/api/login", json={"username": username, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def flood(url, hr, candidates, job_ids, application_ids, deadline, statuses, lock, seed):
+    import httpx
+
+    rng = random.Random(seed)
+    counts = collections.Counter()
+    with httpx.Client(base_url=url, timeout=60) as client:
+        while time.monotonic() < deadline:
+            kind = rng.choice(("login", "apply", "pdf"))
+            if kind == "login":
+                response = client.post("/api/login", json={"username": HR_USERNAME, "password": BENCH_PASSWORD})
+            elif kind == "apply":
+                data = {
+                    "job_id": rng.choice(job_ids), "name": "Flood", "email": "flood@example.com", "phone": "1",
+                    "address": "1 Flood Street", "experience_years": rng.randint(0, 12), "relevant_experience": "APIs",
+                    "skills": "python, sql", "education": "BSc", "projects": "Load", "preferred_location": "Remote",
+                }
+                files = {"photo": ("photo.png", PNG_PIXEL, "image/png")}
+                response = client.post("/api/applications", data=data, files=files, headers=rng.choice(candidates))
+            else:
+                response = client.get(f"/api/applications/{rng.choice(application_ids)}/questions/pdf", headers=hr)
+            counts[(kind, response.status_code)] += 1
+    with lock:
+        statuses.update(counts)
+
+def read(url, deadline, latencies, lock):
+    import httpx
+
+    local = []
+    with httpx.Client(base_url=url, timeout=60) as client:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            client.get("/api/jobs").raise_for_status()
+            local.append(time.perf_counter() - start)
+    with lock:
+        latencies.extend(local)
+
+def run_mode(args, url, hr, candidates, job_ids, application_ids):
+    statuses = collections.Counter()
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=flood, args=(url, hr, candidates, job_ids, application_ids, deadline, statuses, lock, i))
+        for i in range(args.flood)
+    ] + [threading.Thread(target=read, args=(url, deadline, latencies, lock)) for _ in range(args.readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started, statuses
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flood", type=int, default=48, help="clients sending expensive requests")
+    parser.add_argument("--readers", type=int, default=2, help="clients reading GET /api/jobs")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per mode")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake LLM latency in seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    setup_workdir()
+    import httpx
+    import uvicorn
+    import admission
+    from benchmarks.seed import seed
+    from database import SessionLocal
+    from llm import FakeProvider, set_provider
+    import main as app_module
+
+    db = SessionLocal()
+    try:
+        _, job_ids, candidate_ids = seed(db, candidates=50, jobs=20, applications=500)
+    finally:
+        db.close()
+    admission.disable_rate_limits()
+
+    url = f"http://127.0.0.1:{args.port}"
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    wait_until_ready(url)
+    set_provider(FakeProvider(args.llm_latency))
+    with httpx.Client(base_url=url, timeout=60) as client:
+        hr = login(client, HR_USERNAME)
+        candidates = [login(client, candidate_username(i)) for i in candidate_ids[:10]]
+        application_ids = [application["id"] for application in client.get(f"/api/jobs/{job_ids[0]}/applications", headers=hr).json()]
+
+    rows, floods = [], {}
+    for mode, enabled in (("off", False), ("on", True)):
+        admission.ADMISSION_CONTROL = enabled
+        latencies, wall, statuses = run_mode(args, url, hr, candidates, job_ids, application_ids)
+        rows.append(summarize(f"GET /api/jobs, admission {mode}", latencies, wall))
+        floods[mode] = statuses
+    server.should_exit = True
+
+    print_table(rows)
+    for mode, statuses in floods.items():
+        print(f"flood with admission {mode}: " + ", ".join(
+            f"{kind} {status}: {count}" for (kind, status), count in sorted(statuses.items())
+        ))
+
+if __name__ == "__main__":
+    main()
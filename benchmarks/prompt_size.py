@@ -0,0 +1,139 @@
+"""Prompt size before and after prompt compaction, and what building a prompt costs.
+
+    python -m benchmarks.prompt_size --applications 2000
+
+Builds the scoring and interview question prompts for synthetic jobs with
+long, boilerplate-heavy descriptions and applications with long free
+text, once with the templates main.py used before prompts.py and once
+with prompts.py. Reports tokens per prompt (counted the same local way for
+both) and the time to build a compact prompt. Provider latency and spend
+scale with prompt tokens, so the reduction column is the expected saving
+on input.
+"""
+import argparse
+import random
+import statistics
+from types import SimpleNamespace
+
+from benchmarks.common import setup_workdir, summarize, print_table, time_calls
+
+BOILERPLATE = [
+    "We are a fast growing company on a mission to change how people work.",
+    "Our offices have free lunch, a gym and a rooftop terrace.",
+    "We offer a competitive salary, equity, health insurance and a generous pension.",
+    "We are an equal opportunity employer and value diversity at every level.",
+    "Flexible hours and remote work are available for most roles.",
+    "Join a friendly team that loves learning and sharing knowledge.",
+]
+REQUIREMENTS = [
+    "You will design and build services in {skill} that handle millions of requests.",
+    "Must have {years} years of experience with {skill} in production.",
+    "Knowledge of {skill} is a strong plus.",
+    "You will own the reliability of our {skill} platform.",
+    "Experience mentoring engineers and reviewing code is required.",
+]
+
+# main.py's templates before prompts.py
+def legacy_score_prompt(job, candidate):
+    return f"""
+        Job Requirements:
+        - Title: {job.title}
+        - Required Experience: {job.experience_years} years
+        - Skills: {job.skills}
+        - Description: {job.description}
+
+        Candidate Profile:
+        - Experience: {candidate['experience_years']} years
+        - Relevant Experience: {candidate['relevant_experience']}
+        - Skills: {candidate['skills']}
+        - Education: {candidate['education']}
+        - Projects: {candidate['projects']}
+
+        Rate this candidate's fit for the job on a scale of 1-10. Consider experience match, skill alignment, and overall suitability. Return only the number.
+        """
+
+def legacy_questions_prompt(job, application):
+    return f"""
+        Generate 10 interview questions for the following job and candidate:
+
+        Job: {job.title}
+        Job Description: {job.description}
+        Required Skills: {job.skills}
+        Experience Required: {job.experience_years} years
+
+        Candidate Skills: {application.skills}
+        Candidate Experience: {application.experience_years} years
+        Candidate Projects: {application.projects}
+
+        Generate 10 relevant interview questions that test both technical skills and cultural fit.
+        Return each question on a new line.
+        """
+
+def make_jobs(count, rng):
+    from benchmarks.text_compression import SKILLS
+
+    jobs = []
+    for i in range(count):
+        skills = rng.sample(SKILLS, 5)
+        paragraphs = rng.sample(BOILERPLATE, 4) + [
+            rng.choice(REQUIREMENTS).format(skill=skill, years=rng.randint(2, 8)) for skill in skills
+        ]
+        rng.shuffle(paragraphs)
+        jobs.append(SimpleNamespace(
+            id=i + 1, title=f"Senior Engineer {i}", description="\n\n".join(paragraphs * 2),
+            skills=", ".join(skills), experience_years=rng.randint(2, 8),
+        ))
+    return jobs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_workdir()
+    from benchmarks.text_compression import application_rows
+    import prompts
+
+    rng = random.Random(5)
+    jobs = make_jobs(args.jobs, rng)
+    applications = [SimpleNamespace(**row) for row in application_rows(args.applications, args.jobs)]
+    pairs = [(jobs[a.job_id - 1], a) for a in applications]
+
+    def candidate(a):
+        return {name: getattr(a, name) for name in ("experience_years", "relevant_experience", "skills", "education", "projects")}
+
+    print(f"{len(pairs)} prompts per operation, {prompts.JOB_SUMMARY_TOKENS} token job summaries, "
+          f"{prompts.CANDIDATE_TOKENS} token candidate budget")
+    print(f"{'operation':<22}{'before':>10}{'after':>10}{'p95 before':>12}{'p95 after':>11}{'reduction':>11}")
+    for operation, legacy, compact in (
+        ("score", lambda j, a: legacy_score_prompt(j, candidate(a)), lambda j, a: prompts.score_prompt(j, candidate(a)).text),
+        ("interview_questions", legacy_questions_prompt, lambda j, a: prompts.questions_prompt(j, a).text),
+    ):
+        before = sorted(prompts.count_tokens(legacy(j, a)) for j, a in pairs)
+        after = sorted(prompts.count_tokens(compact(j, a)) for j, a in pairs)
+        p95 = int(len(pairs) * 0.95) - 1
+        print(f"{operation:<22}{statistics.fmean(before):>10.0f}{statistics.fmean(after):>10.0f}"
+              f"{before[p95]:>12}{after[p95]:>11}{1 - sum(after) / sum(before):>11.0%}")
+    print()
+
+    picks = iter(pairs)
+
+    def build_score_prompt():
+        job, application = next(picks)
+        return prompts.score_prompt(job, candidate(application))
+
+    job = jobs[0]
+    rows = [
+        summarize("score_prompt", time_calls(build_score_prompt, len(pairs), warmup=0)),
+        summarize("summarize_job (uncached)", time_calls(
+            lambda: prompts._summarize.__wrapped__(
+                job.title, job.description, job.skills, job.experience_years, prompts.JOB_SUMMARY_TOKENS
+            ),
+            200,
+        )),
+    ]
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Resume parsing throughput on a corpus of CVs.
+
+    python -m benchmarks.resume_parsing --resumes 200
+    python -m benchmarks.resume_parsing --corpus path/to/cvs    # real .docx/.pdf files
+
+Without --corpus, synthetic CVs are generated as DOCX and as PDF (PDF
+needs pypdf to parse). Reports parse throughput in one process and on the
+resume_parser process pool, then the POST /api/resumes/parse route for
+first uploads (parsed) and repeat uploads (served from the hash cache).
+"""
+import argparse
+import io
+import os
+import random
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+from benchmarks.common import setup_workdir, summarize, print_table, time_calls
+
+SKILLS = ["Python", "Go", "Java", "TypeScript", "React", "PostgreSQL", "Kubernetes", "Docker", "AWS", "Terraform",
+          "Kafka", "Redis", "GraphQL", "Spark", "Airflow", "Django", "FastAPI", "Node.js", "Rust", "Elasticsearch"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+TITLES = ["Software Engineer", "Backend Engineer", "Data Engineer", "Platform Engineer", "Tech Lead"]
+FIRST_NAMES = ["Ana", "Ben", "Chen", "Dara", "Emeka", "Farah", "Goran", "Hana", "Ivan", "Jia"]
+LAST_NAMES = ["Silva", "Okafor", "Nguyen", "Patel", "Kowalski", "Haddad", "Tanaka", "Moreau"]
+DUTIES = ["Designed and shipped REST APIs", "Cut p99 latency by 40%", "Led migration to Kubernetes",
+          "Built streaming ETL pipelines", "Mentored four engineers", "Owned on-call for payments"]
+
+def cv_lines(rng, i):
+    lines = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"candidate{i}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+             "", "Professional Summary", f"Engineer with {rng.randint(1, 15)} years of experience building web services.",
+             "", "Technical Skills", ", ".join(rng.sample(SKILLS, 6)), "", "Work Experience"]
+    year = 2024
+    for _ in range(rng.randint(2, 4)):
+        start = year - rng.randint(1, 4)
+        lines += [f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)}, {start} - {year}"]
+        lines += [f"- {duty}" for duty in rng.sample(DUTIES, 3)]
+        year = start
+    lines += ["", "Education", f"BSc Computer Science, State University, {year - 1}",
+              "", "Projects", "- Open source rate limiter in Go", "- Realtime dashboard with React and WebSockets"]
+    return lines
+
+def build_docx(lines):
+    body = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>" for line in lines)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>'
+        ))
+        archive.writestr("word/document.xml", (
+            '<?xml version="1.0" encoding="UTF-8"?><w:document '
+            'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{body}</w:body></w:document>"
+        ))
+    return buffer.getvalue()
+
+def build_pdf(lines):
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    y = 800
+    for line in lines:
+        p.drawString(50, y, line)
+        y -= 14
+    p.save()
+    return buffer.getvalue()
+
+def load_corpus(args):
+    from resume_parser import resume_format
+
+    if args.corpus:
+        corpus = []
+        for name in sorted(os.listdir(args.corpus)):
+            file_format = resume_format(name)
+            if file_format:
+                with open(os.path.join(args.corpus, name), "rb") as f:
+                    corpus.append((name, f.read(), file_format))
+        return corpus
+    rng = random.Random(11)
+    corpus = [(f"cv_{i}.docx", build_docx(cv_lines(rng, i)), "docx") for i in range(args.resumes)]
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        print("pypdf is not installed; PDF resumes are skipped")
+    else:
+        corpus += [(f"cv_{i}.pdf", build_pdf(cv_lines(rng, i)), "pdf") for i in range(args.resumes)]
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=100, help="synthetic CVs per format")
+    parser.add_argument("--corpus", help="directory of .docx/.pdf resumes to use instead")
+    args = parser.parse_args()
+
+    setup_workdir()
+    from fastapi.testclient import TestClient
+    from resume_parser import parse_resume, get_parse_pool, shutdown_parse_pool, RESUME_PARSE_WORKERS
+    from benchmarks.seed import BENCH_PASSWORD
+    import main as app_module
+
+    corpus = load_corpus(args)
+    if not corpus:
+        raise SystemExit("No .docx or .pdf resumes found")
+
+    rows = []
+    for file_format in sorted({f for _, _, f in corpus}):
+        files = [(data, f) for _, data, f in corpus if f == file_format]
+        files_iter = iter(files)
+        rows.append(summarize(
+            f"parse {file_format} (1 process)", time_calls(lambda: parse_resume(*next(files_iter)), len(files), warmup=0)
+        ))
+
+        pool = get_parse_pool()
+        list(pool.map(parse_resume, *zip(*files[:RESUME_PARSE_WORKERS])))  # start the workers
+        started = time.perf_counter()
+        list(pool.map(parse_resume, *zip(*files), chunksize=4))
+        wall = time.perf_counter() - started
+        # Per-resume latency is not visible through map, so only the throughput column is meaningful
+        rows.append(summarize(f"parse {file_format} ({RESUME_PARSE_WORKERS} workers)", [wall / len(files)] * len(files), wall))
+
+    with TestClient(app_module.app) as client:
+        client.post("/api/register", json={
+            "username": "resume_bench", "email": "resume_bench@example.com", "full_name": "Resume Bench",
+            "user_type": "candidate", "password": BENCH_PASSWORD,
+        })
+        token = client.post("/api/login", json={"username": "resume_bench", "password": BENCH_PASSWORD}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        uploads = iter(corpus)
+
+        def upload(item=None):
+            name, data, _ = item or next(uploads)
+            response = client.post("/api/resumes/parse", files={"resume": (name, data)}, headers=headers)
+            response.raise_for_status()
+            return response
+
+        rows.append(summarize("route, first upload", time_calls(upload, len(corpus), warmup=0)))
+        rows.append(summarize("route, repeat upload", time_calls(lambda: upload(corpus[0]), len(corpus))))
+    shutdown_parse_pool()
+
+    print(f"{len(corpus)} resumes, {os.cpu_count()} CPUs")
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Measure read throughput as gunicorn workers are added.
+
+    python -m benchmarks.scaling --workers 1,2,4,8 --duration 15
+
+For each worker count a gunicorn server (gunicorn.conf.py profile) is
+started on a seeded temp database, GET /api/jobs and GET /api/jobs/{id}
+are hammered by separate client processes, and requests/s is reported
+next to the speedup over one worker. The load generator runs on the same
+host, so leave it at least as many cores as the largest worker count.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.common import REPO_ROOT, setup_workdir, summarize
+
+def wait_until_ready(url, timeout=30):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/api/jobs", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not come up")
+
+def client_worker(url, job_ids, duration, threads, seed):
+    """Run `threads` keep-alive clients for `duration` seconds and return their latencies"""
+    import threading
+    import httpx
+
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def loop(rng):
+        nonlocal errors
+        local = []
+        failed = 0
+        with httpx.Client(base_url=url, timeout=30) as client:
+            while time.monotonic() < deadline:
+                path = "/api/jobs" if rng.random() < 0.5 else f"/api/jobs/{rng.choice(job_ids)}"
+                start = time.perf_counter()
+                response = client.get(path)
+                local.append(time.perf_counter() - start)
+                failed += response.status_code >= 400
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    workers = [threading.Thread(target=loop, args=(random.Random(seed * 100 + i),)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, errors
+
+def run_level(args, workdir, workers, job_ids):
+    url = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{args.port}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(REPO_ROOT, "gunicorn.conf.py"),
+         "--access-logfile", "/dev/null", "main:app"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(url)
+        clients = args.clients or max(2, workers * 2)
+        started = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(clients) as pool:
+            results = pool.starmap(client_worker, [
+                (url, job_ids, args.duration, args.threads, seed) for seed in range(clients)
+            ])
+        wall_time = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = [latency for result in results for latency in result[0]]
+    row = summarize(f"{workers} workers", latencies, wall_time)
+    row["errors"] = sum(result[1] for result in results)
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma separated worker counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per worker count")
+    parser.add_argument("--clients", type=int, default=0, help="client processes (default: 2 per worker)")
+    parser.add_argument("--threads", type=int, default=4, help="keep-alive connections per client process")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--jobs", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = setup_workdir()
+    from benchmarks.seed import seed
+    from database import SessionLocal
+    from models import Job
+
+    db = SessionLocal()
+    try:
+        seed(db, candidates=20, jobs=args.jobs, applications=200)
+        job_ids = [job_id for (job_id,) in db.query(Job.id).filter(Job.is_active == True)]
+    finally:
+        db.close()
+
+    rows = [run_level(args, workdir, int(workers), job_ids) for workers in args.workers.split(",") if workers]
+
+    baseline = rows[0]["throughput"] / int(args.workers.split(",")[0])
+    header = f"{'workers':<12}{'requests':>10}{'req/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'speedup':>10}{'efficiency':>12}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for workers, row in zip(args.workers.split(","), rows):
+        speedup = row["throughput"] / baseline if baseline else 0.0
+        print(
+            f"{workers:<12}{row['count']:>10}{row['throughput']:>11.1f}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            f"{speedup:>10.2f}{speedup / int(workers):>12.0%}{row['errors']:>8}"
+        )
+    print(f"{os.cpu_count()} CPUs on this host")
+    return 1 if any(row["errors"] for row in rows) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+"""Seed a database with synthetic users, jobs and applications.
+
+    python -m benchmarks.seed --candidates 1000 --jobs 100 --applications 20000
+
+Rows are generated from a fixed random seed so runs are reproducible. All
+seeded accounts share the password "benchmark" (hashed once).
+"""
+import argparse
+import random
+
+from benchmarks.common import setup_workdir
+
+BENCH_PASSWORD = "benchmark"
+HR_USERNAME = "bench_hr"
+
+SKILL_POOL = [
+    "python", "javascript", "typescript", "go", "java", "kubernetes", "docker", "aws", "sql",
+    "postgresql", "react", "node.js", "fastapi", "django", "terraform", "linux", "redis",
+    "machine learning", "pandas", "spark", "kafka", "graphql", "c++", "rust",
+]
+TITLES = ["Backend Engineer", "Frontend Engineer", "Data Engineer", "SRE", "ML Engineer", "Platform Engineer"]
+LOCATIONS = ["Remote", "London", "Berlin", "New York", "Bangalore", "Toronto"]
+WORDS = "built scaled designed migrated maintained services pipelines dashboards apis platform team customers".split()
+
+def candidate_username(index):
+    return f"bench_cand_{index}"
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def seed(db, candidates=200, jobs=20, applications=2000, random_seed=42, batch_size=1000):
+    """Insert synthetic rows in batches and return (hr_id, job_ids, candidate_ids)"""
+    from sqlalchemy import insert, select, func
+    from models import User, Job, Application
+    from skills import get_skill_ids, index_job_skills, index_application_skills
+    from job_stats import rebuild_job_stats
+    from embeddings import reindex as embed_all
+    from main import get_password_hash
+
+    rng = random.Random(random_seed)
+    hashed = get_password_hash(BENCH_PASSWORD)
+
+    hr = db.execute(select(User).where(User.username == HR_USERNAME)).scalar_one_or_none()
+    if hr is None:
+        hr = User(username=HR_USERNAME, email="bench_hr@example.com", full_name="Bench HR",
+                  user_type="hr", hashed_password=hashed)
+        db.add(hr)
+        db.commit()
+
+    first_user = (db.execute(select(func.max(User.id))).scalar() or 0) + 1
+    users = [
+        {
+            "id": first_user + i,
+            "username": candidate_username(first_user + i),
+            "email": f"cand{first_user + i}@example.com",
+            "full_name": f"Candidate {first_user + i}",
+            "user_type": "candidate",
+            "hashed_password": hashed,
+        }
+        for i in range(candidates)
+    ]
+    for start in range(0, len(users), batch_size):
+        db.execute(insert(User), users[start:start + batch_size])
+    db.commit()
+    candidate_ids = [user["id"] for user in users]
+
+    job_ids = []
+    for _ in range(jobs):
+        skills = ", ".join(rng.sample(SKILL_POOL, 5))
+        job = Job(
+            title=rng.choice(TITLES), description=_sentence(rng, 40), experience_years=rng.randint(0, 10),
+            relevant_experience=_sentence(rng), skills=skills, work_location=rng.choice(LOCATIONS),
+            created_by=hr.id,
+        )
+        db.add(job)
+        db.flush()
+        index_job_skills(db, job.id, get_skill_ids(db, [s.strip() for s in skills.split(",")]))
+        job_ids.append(job.id)
+    db.commit()
+
+    skill_ids = {name: next(iter(get_skill_ids(db, [name]))) for name in SKILL_POOL}
+    db.commit()
+
+    # A candidate applies to each job at most once, so draw distinct (job, candidate) pairs
+    if applications > len(job_ids) * len(candidate_ids):
+        raise ValueError("Need candidates * jobs >= applications: each candidate applies to a job at most once")
+    pairs = rng.sample(range(len(job_ids) * len(candidate_ids)), applications)
+
+    first_application = (db.execute(select(func.max(Application.id))).scalar() or 0) + 1
+    for start in range(0, applications, batch_size):
+        rows = []
+        postings = []
+        for offset in range(start, min(start + batch_size, applications)):
+            application_id = first_application + offset
+            picked = rng.sample(SKILL_POOL, rng.randint(3, 8))
+            job_index, candidate_index = divmod(pairs[offset], len(candidate_ids))
+            rows.append({
+                "id": application_id,
+                "job_id": job_ids[job_index],
+                "candidate_id": candidate_ids[candidate_index],
+                "name": f"Applicant {application_id}",
+                "email": f"applicant{application_id}@example.com",
+                "phone": f"+1555{application_id:07d}",
+                "address": f"{application_id} Benchmark Street",
+                "experience_years": rng.randint(0, 15),
+                "relevant_experience": _sentence(rng, 30),
+                "skills": ", ".join(picked),
+                "education": "BSc Computer Science",
+                "projects": _sentence(rng, 25),
+                "preferred_location": rng.choice(LOCATIONS),
+                "ai_score": round(rng.uniform(1, 10), 1),
+                "status": "applied",
+            })
+            postings.append((application_id, {skill_ids[name] for name in picked}))
+        db.execute(insert(Application), rows)
+        for application_id, ids in postings:
+            index_application_skills(db, application_id, ids)
+        db.commit()
+
+    # Rows were inserted directly, so recompute the per-job counters and embeddings in one pass
+    rebuild_job_stats(db, job_ids)
+    db.commit()
+    embed_all(db)
+
+    return hr.id, job_ids, candidate_ids
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workdir", help="directory for the database and uploads (default: new temp dir)")
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--applications", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = setup_workdir(args.workdir)
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        seed(db, args.candidates, args.jobs, args.applications, args.seed)
+    finally:
+        db.close()
+    print(f"Seeded {args.candidates} candidates, {args.jobs} jobs, {args.applications} applications in {workdir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Cost of serializing a large applicant list, before and after response models.
+
+    python -m benchmarks.serialization --applications 5000
+
+Loads one job's applications as ORM objects and times the ways a route can
+turn them into JSON: FastAPI's jsonable_encoder (what a route without a
+response_model goes through), the same with orjson instead of json, and
+the Pydantic TypeAdapter that a response_model route uses. The full GET
+/api/jobs/{id}/applications request is timed as well.
+"""
+import argparse
+import json
+
+from benchmarks.common import setup_workdir, summarize, print_table, time_calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_workdir()
+    from typing import List
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+    from benchmarks.seed import seed, BENCH_PASSWORD, HR_USERNAME
+    from database import SessionLocal
+    from models import Application
+    from schemas import ApplicationResponse
+    import main as app_module
+
+    db = SessionLocal()
+    try:
+        _, job_ids, _ = seed(db, candidates=args.applications, jobs=1, applications=args.applications)
+        applications = db.query(Application).filter(Application.job_id == job_ids[0]).all()
+
+        adapter = TypeAdapter(List[ApplicationResponse])
+        rows = [
+            summarize("jsonable_encoder + json", time_calls(
+                lambda: json.dumps(jsonable_encoder(applications)).encode(), args.iterations, warmup=1
+            )),
+        ]
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+        if orjson is not None:
+            rows.append(summarize("jsonable_encoder + orjson", time_calls(
+                lambda: orjson.dumps(jsonable_encoder(applications)), args.iterations, warmup=1
+            )))
+        rows.append(summarize("response model (pydantic)", time_calls(
+            lambda: adapter.dump_json(adapter.validate_python(applications)), args.iterations, warmup=1
+        )))
+    finally:
+        db.close()
+
+    client = TestClient(app_module.app)
+    token = client.post("/api/login", json={"username": HR_USERNAME, "password": BENCH_PASSWORD}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/api/jobs/{job_ids[0]}/applications"
+    rows.append(summarize("GET applications (route)", time_calls(
+        lambda: client.get(url, headers=headers).raise_for_status(), args.iterations, warmup=1
+    )))
+
+    print(f"{len(applications)} applications")
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Run the app on a seeded benchmark database with the fake LLM provider.
+
+    python -m benchmarks.serve --llm-latency 0.2 --candidates 2000 --applications 20000 --port 8000
+
+Point benchmarks.load_test --url at it from another shell.
+"""
+import argparse
+
+from benchmarks.common import setup_workdir
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workdir")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--applications", type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = setup_workdir(args.workdir)
+    from admission import disable_rate_limits
+    from llm import FakeProvider, set_provider
+    from benchmarks.seed import seed
+    from database import SessionLocal
+    import main as app_module
+    import uvicorn
+
+    set_provider(FakeProvider(args.llm_latency))
+    disable_rate_limits()  # load_test clients all come from one address
+    db = SessionLocal()
+    try:
+        seed(db, args.candidates, args.jobs, args.applications)
+    finally:
+        db.close()
+
+    print(f"Benchmark database in {workdir}")
+    uvicorn.run(app_module.app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Database size and list latency with and without compressed application text.
+
+    python -m benchmarks.text_compression --rows 1000000
+
+Writes the same synthetic applications into two SQLite files: one with
+plain text, and one with TEXT_COMPRESSION=zstd and a dictionary trained on
+the first. Reports each file's size and bytes of free text per row, then
+times a job's applicant list loaded in full (what GET
+/api/jobs/{id}/applications reads) and through the summary projection
+(GET /api/jobs/{id}/applications/summary), which never touches the
+compressed columns.
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks.common import setup_workdir, summarize, print_table, time_calls
+
+STREETS = ["Main Street", "Oak Avenue", "Station Road", "High Street", "Park Lane", "Mill Road", "Church Street"]
+CITIES = ["London", "Berlin", "Toronto", "Bangalore", "New York", "Lisbon", "Singapore", "Austin"]
+SKILLS = ["Python", "Go", "Java", "TypeScript", "React", "PostgreSQL", "Kubernetes", "Docker", "AWS", "Terraform",
+          "Kafka", "Redis", "GraphQL", "Spark", "Airflow", "Django", "FastAPI", "Node.js", "Rust", "SQL"]
+VERBS = ["Designed", "Built", "Led", "Maintained", "Migrated", "Scaled", "Automated", "Owned", "Rewrote", "Shipped"]
+THINGS = ["the payments API", "a streaming ETL pipeline", "the customer dashboard", "our Kubernetes platform",
+          "the search service", "an internal admin tool", "the mobile backend", "the billing system",
+          "a recommendation engine", "the CI/CD pipeline", "the data warehouse", "a feature flag service"]
+OUTCOMES = ["cutting p99 latency by {n}%", "serving {n}k requests per second", "for a team of {n} engineers",
+            "saving {n}% of cloud spend", "with {n}% test coverage", "across {n} regions"]
+DEGREES = ["BSc Computer Science", "MSc Software Engineering", "BEng Electrical Engineering", "BA Mathematics"]
+UNIVERSITIES = ["State University", "Institute of Technology", "City College", "National University"]
+PROJECTS = ["Open source rate limiter in {skill}", "Realtime chat with {skill} and WebSockets",
+            "Home automation on a Raspberry Pi with {skill}", "CLI for managing {skill} deployments",
+            "Personal finance tracker built on {skill}"]
+
+def _sentence(rng):
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(2, 90))
+    return f"{rng.choice(VERBS)} {rng.choice(THINGS)} using {rng.choice(SKILLS)}, {outcome}."
+
+def application_rows(count, jobs, random_seed=7):
+    rng = random.Random(random_seed)
+    # Picked from pools, so a million rows generate in seconds and still vary like real ones
+    sentences = [_sentence(rng) for _ in range(5000)]
+    for i in range(1, count + 1):
+        skills = rng.sample(SKILLS, rng.randint(4, 9))
+        yield {
+            "id": i,
+            "job_id": rng.randint(1, jobs),
+            "candidate_id": i,
+            "name": f"Candidate {i}",
+            "email": f"candidate{i}@example.com",
+            "phone": f"+1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+            "address": f"{rng.randint(1, 300)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+            "experience_years": rng.randint(0, 20),
+            "relevant_experience": " ".join(rng.sample(sentences, rng.randint(3, 8))),
+            "skills": ", ".join(skills),
+            "education": f"{rng.choice(DEGREES)}, {rng.choice(UNIVERSITIES)}, {rng.randint(1995, 2023)}",
+            "projects": "; ".join(rng.choice(PROJECTS).format(skill=skill) for skill in skills[:rng.randint(1, 3)]),
+            "preferred_location": rng.choice(CITIES),
+            "ai_score": round(rng.uniform(0, 10), 1),
+            "status": "applied",
+        }
+
+def build(path, rows, jobs, batch_size=5000):
+    """Fill a new database file; returns seconds taken"""
+    from sqlalchemy import create_engine, insert
+    from database import Base
+    from models import Application
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        batch = []
+        for row in application_rows(rows, jobs):
+            batch.append(row)
+            if len(batch) == batch_size:
+                conn.execute(insert(Application), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Application), batch)
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return elapsed
+
+def text_bytes(engine):
+    columns = ["address", "relevant_experience", "skills", "education", "projects"]
+    with engine.connect() as conn:
+        total = conn.exec_driver_sql(
+            "SELECT " + " + ".join(f"sum(length(CAST({c} AS BLOB)))" for c in columns) + ", count(*) FROM applications"
+        ).one()
+    return total[0] / total[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--per-job", type=int, default=500, help="average applications per job")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = setup_workdir()
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from models import Application
+    import text_compression
+    from main import SUMMARY_COLUMNS
+
+    jobs = max(1, args.rows // args.per_job)
+    plain_path = os.path.join(workdir, "plain.db")
+    compressed_path = os.path.join(workdir, "compressed.db")
+
+    plain_seconds = build(plain_path, args.rows, jobs)
+    engines = {"plain": create_engine(f"sqlite:///{plain_path}")}
+    with Session(engines["plain"]) as db:
+        dictionary_dir = os.path.join(workdir, "text_dictionaries")
+        text_compression.TEXT_DICTIONARY_DIR = dictionary_dir
+        dict_id = text_compression.train_dictionary(db, Application, directory=dictionary_dir)
+    text_compression.TEXT_COMPRESSION = "zstd"
+    compressed_seconds = build(compressed_path, args.rows, jobs)
+    engines["zstd"] = create_engine(f"sqlite:///{compressed_path}")
+
+    print(f"{args.rows} applications over {jobs} jobs; dictionary {dict_id}")
+    print(f"{'database':<10}{'file MB':>10}{'text B/row':>12}{'insert rows/s':>15}")
+    for name, path, seconds in (("plain", plain_path, plain_seconds), ("zstd", compressed_path, compressed_seconds)):
+        print(f"{name:<10}{os.path.getsize(path) / 1e6:>10.1f}{text_bytes(engines[name]):>12.0f}{args.rows / seconds:>15.0f}")
+    print()
+
+    rng = random.Random(3)
+    job_ids = [rng.randint(1, jobs) for _ in range(args.iterations + 10)]
+    rows = []
+    for name, engine in engines.items():
+        with Session(engine) as db:
+            picks = iter(job_ids)
+            rows.append(summarize(f"{name}: full list", time_calls(
+                lambda: db.query(Application).filter(Application.job_id == next(picks)).all() and db.expunge_all(),
+                args.iterations,
+            )))
+            picks = iter(job_ids)
+            rows.append(summarize(f"{name}: summary list", time_calls(
+                lambda: db.query(*SUMMARY_COLUMNS).filter(Application.job_id == next(picks)).all(), args.iterations
+            )))
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""One-shot setup to run before any worker starts serving.
+
+    python bootstrap.py
+
+Applies pending schema migrations (see migrations.py), creates the
+uploads/static directories, switches SQLite to WAL so readers in one worker
+do not block a writer in another, builds missing embedding files and makes
+sure every worker signs tokens with the same secret key. gunicorn.conf.py
+runs it once in the master process; a plain `uvicorn main:app` runs it
+from the app's lifespan instead.
+"""
+import os
+import secrets
+
+# Set once bootstrap has run, and inherited by worker processes
+BOOTSTRAPPED_ENV = "HR_ASSIST_BOOTSTRAPPED"
+
+SECRET_KEY_FILE = os.getenv("SECRET_KEY_FILE", ".secret_key")
+
+def load_secret_key():
+    """SECRET_KEY from the environment, else a key generated once and shared through SECRET_KEY_FILE"""
+    key = os.getenv("SECRET_KEY")
+    if key:
+        return key
+    if not os.path.exists(SECRET_KEY_FILE):
+        # Write under a private name and link it into place, so a worker
+        # racing with us never reads a half-written key
+        temp_path = f"{SECRET_KEY_FILE}.{os.getpid()}"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_urlsafe(48))
+        try:
+            os.link(temp_path, SECRET_KEY_FILE)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temp_path)
+    with open(SECRET_KEY_FILE) as f:
+        return f.read().strip()
+
+def bootstrap():
+    from database import engine, SessionLocal
+    from migrations import upgrade, pending, MigrationError
+    from embeddings import reindex as backfill_embeddings
+
+    os.makedirs("uploads", exist_ok=True)
+    os.makedirs("static", exist_ok=True)
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            # Lets archive.py hand freed pages back a few at a time; only takes effect on a new file
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    # Schema steps only; backfills run online with `python migrations.py`
+    try:
+        upgrade(engine, backfills=False)
+    except MigrationError as e:
+        # Serve with the schema as it is; the step stays pending and is retried on the next start
+        print(f"Migration failed: {e}")
+    backfills = [migration.name for migration in pending(engine) if migration.backfill]
+    if backfills:
+        print(f"Pending backfills ({', '.join(backfills)}): run python migrations.py")
+    db = SessionLocal()
+    try:
+        backfill_embeddings(db, missing_only=True)
+    finally:
+        db.close()
+    # Forked workers must not inherit the connections opened here
+    engine.dispose()
+    load_secret_key()
+    os.environ[BOOTSTRAPPED_ENV] = "1"
+
+def ensure_bootstrapped():
+    if not os.getenv(BOOTSTRAPPED_ENV):
+        bootstrap()
+
+if __name__ == "__main__":
+    bootstrap()
+    print("Bootstrap complete")
@@ -0,0 +1,78 @@
+"""Build fingerprinted, minified and precompressed copies of the frontend.
+
+Run once per deploy (the Dockerfile does this):
+
+    python build_assets.py
+
+Reads static/index.html, static/script.js and static/styles.css and writes
+static/dist/ containing script.<hash>.js, styles.<hash>.css, their .gz and
+.br variants, an index.html pointing at the fingerprinted names and a
+manifest.json. Brotli variants are skipped if the brotli package is missing.
+"""
+import gzip
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always produced
+    brotli = None
+
+STATIC_DIR = Path(__file__).parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+ASSETS = ["script.js", "styles.css"]
+
+def minify_css(source):
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+    source = re.sub(r"\s+", " ", source)
+    source = re.sub(r"\s*([{};,>])\s*", r"\1", source)
+    source = re.sub(r"\s*:\s*", ":", source)
+    return source.replace(";}", "}").strip()
+
+def minify_js(source):
+    # Conservative: drops indentation, blank lines and whole-line comments but
+    # keeps line breaks, so automatic semicolon insertion behaves the same.
+    lines = []
+    for line in source.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("//"):
+            continue
+        lines.append(stripped)
+    return "\n".join(lines) + "\n"
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+def write_variants(path, data):
+    path.write_bytes(data)
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + ".br").write_bytes(brotli.compress(data, quality=11))
+
+def build():
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True)
+
+    manifest = {}
+    for name in ASSETS:
+        source_path = STATIC_DIR / name
+        minified = MINIFIERS[source_path.suffix](source_path.read_text(encoding="utf-8")).encode("utf-8")
+        digest = hashlib.sha256(minified).hexdigest()[:12]
+        fingerprinted = f"{source_path.stem}.{digest}{source_path.suffix}"
+        write_variants(DIST_DIR / fingerprinted, minified)
+        manifest[name] = fingerprinted
+
+    index = (STATIC_DIR / "index.html").read_text(encoding="utf-8")
+    for name, fingerprinted in manifest.items():
+        index = index.replace(f"/static/{name}", f"/static/dist/{fingerprinted}")
+    write_variants(DIST_DIR / "index.html", index.encode("utf-8"))
+
+    (DIST_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+if __name__ == "__main__":
+    for name, fingerprinted in build().items():
+        print(f"{name} -> dist/{fingerprinted}")
@@ -0,0 +1,245 @@
+"""Streaming bulk import of applications from CSV or JSONL exports.
+
+Rows are read one at a time from the uploaded file, validated, and
+inserted in batched transactions, so memory stays constant regardless of
+file size. Scoring is deferred: every imported row is put on the scoring
+queue and scored later by a background task.
+"""
+import codecs
+import csv
+import hashlib
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from pydantic import ValidationError
+from sqlalchemy import select, insert, func
+from sqlalchemy.exc import IntegrityError
+
+from models import User, Job, Application, ScoringQueue, application_skills
+from schemas import ApplicationImportRow
+from skills import parse_skills, get_skill_ids
+from job_stats import record_applications
+from dedup import flag_duplicates
+from embeddings import index_application
+from recommendations import invalidate_candidates
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Imported candidates get an account they cannot log in to until they reset it
+UNUSABLE_PASSWORD = "!"
+
+def detect_format(filename, requested=None):
+    if requested:
+        return requested.lower()
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+def iter_rows(fileobj, file_format):
+    """Yield (row_number, dict) pairs without reading the whole file"""
+    text = codecs.getreader("utf-8-sig")(fileobj)
+    if file_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            # A short row has None for its missing columns, and surplus values sit under the None key
+            yield row_number, {key.strip(): value for key, value in row.items() if key and value is not None}
+    elif file_format == "jsonl":
+        for row_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, e
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, row_number, messages):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": messages})
+
+    def as_dict(self):
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "queued_for_scoring": self.imported,
+        }
+
+class ApplicationImporter:
+    def __init__(self, db, default_job_id=None, batch_size=BATCH_SIZE):
+        self.db = db
+        self.default_job_id = default_job_id
+        self.batch_size = batch_size
+        self.report = ImportReport()
+        self._known_jobs = {}
+        self._skill_ids = {}
+
+    def run(self, fileobj, file_format):
+        batch = []
+        for row_number, raw in iter_rows(fileobj, file_format):
+            row = self._validate(row_number, raw)
+            if row is None:
+                continue
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        return self.report
+
+    def _validate(self, row_number, raw):
+        if isinstance(raw, Exception):
+            self.report.fail(row_number, [f"Invalid JSON: {raw}"])
+            return None
+        if not isinstance(raw, dict):
+            self.report.fail(row_number, ["Expected an object per line"])
+            return None
+        if not raw.get("job_id") and self.default_job_id is not None:
+            raw["job_id"] = self.default_job_id
+        try:
+            row = ApplicationImportRow.model_validate(raw)
+        except ValidationError as e:
+            self.report.fail(row_number, [
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ])
+            return None
+        if not self._job_exists(row.job_id):
+            self.report.fail(row_number, [f"job_id: job {row.job_id} not found"])
+            return None
+        return row
+
+    def _job_exists(self, job_id):
+        if job_id not in self._known_jobs:
+            self._known_jobs[job_id] = self.db.get(Job, job_id) is not None
+        return self._known_jobs[job_id]
+
+    def _skill_ids_for(self, text):
+        ids = set()
+        missing = []
+        for name in parse_skills(text):
+            if name in self._skill_ids:
+                ids.add(self._skill_ids[name])
+            else:
+                missing.append(name)
+        for name in missing:
+            skill_id = next(iter(get_skill_ids(self.db, [name])))
+            self._skill_ids[name] = skill_id
+            ids.add(skill_id)
+        return ids
+
+    def _candidate_ids(self, rows):
+        """Map each email to a candidate account, creating accounts in bulk; None for an HR account's email"""
+        emails = {row.email.strip().lower() for _, row in rows}
+        rows_found = self.db.execute(
+            select(User.email, User.id, User.user_type).where(func.lower(User.email).in_(emails))
+        ).all()
+        existing = {email.lower(): user_id if user_type == "candidate" else None for email, user_id, user_type in rows_found}
+        new_users = []
+        seen = set(existing)
+        for _, row in rows:
+            email = row.email.strip().lower()
+            if email in seen:
+                continue
+            seen.add(email)
+            new_users.append({
+                "username": "imported_" + hashlib.sha1(email.encode()).hexdigest()[:16],
+                "email": email,
+                "full_name": row.name,
+                "phone": row.phone,
+                "user_type": "candidate",
+                "hashed_password": UNUSABLE_PASSWORD,
+            })
+        if new_users:
+            created = self.db.execute(
+                insert(User).returning(User.email, User.id, sort_by_parameter_order=True), new_users
+            ).all()
+            existing.update(dict(created))
+        return existing
+
+    def _flush(self, rows):
+        try:
+            skipped, inserted = self._insert(rows)
+            self.db.commit()
+            self.report.imported += len(inserted)
+            for application_id, data in inserted:
+                index_application(SimpleNamespace(id=application_id, **data))
+            for row_number, message in skipped:
+                self.report.fail(row_number, [message])
+        except IntegrityError:
+            self.db.rollback()
+            # Skills created inside the failed transaction no longer exist
+            self._skill_ids = {}
+            if len(rows) == 1:
+                self.report.fail(rows[0][0], ["Row conflicts with existing data"])
+                return
+            # Retry one row at a time so only the offending rows are reported
+            for row in rows:
+                self._flush([row])
+
+    def _insert(self, rows):
+        """Insert a batch; returns (row_number, message) for rows skipped and (id, values) for new rows"""
+        candidates = self._candidate_ids(rows)
+        # One application per candidate per job, whether the repeat is already stored or later in the file
+        taken = set(self.db.execute(
+            select(Application.job_id, Application.candidate_id)
+            .where(Application.candidate_id.in_({user_id for user_id in candidates.values() if user_id is not None}))
+        ).all())
+        now = datetime.utcnow()
+        values = []
+        skill_sets = []
+        skipped = []
+        for row_number, row in rows:
+            candidate_id = candidates[row.email.strip().lower()]
+            if candidate_id is None:
+                skipped.append((row_number, "Email belongs to an account that is not a candidate"))
+                continue
+            if (row.job_id, candidate_id) in taken:
+                skipped.append((row_number, f"Candidate has already applied to job {row.job_id}"))
+                continue
+            taken.add((row.job_id, candidate_id))
+            data = row.model_dump()
+            data["candidate_id"] = candidate_id
+            data["ai_score"] = 0.0
+            data["status"] = "applied"
+            data["created_at"] = now
+            data["updated_at"] = now
+            values.append(data)
+            skill_sets.append(self._skill_ids_for(row.skills))
+        if not values:
+            return skipped, []
+
+        application_ids = self.db.scalars(
+            insert(Application).returning(Application.id, sort_by_parameter_order=True), values
+        ).all()
+
+        postings = [
+            {"application_id": application_id, "skill_id": skill_id}
+            for application_id, skill_ids in zip(application_ids, skill_sets)
+            for skill_id in skill_ids
+        ]
+        if postings:
+            self.db.execute(insert(application_skills), postings)
+        self.db.execute(insert(ScoringQueue), [
+            {"application_id": application_id, "enqueued_at": now} for application_id in application_ids
+        ])
+        per_job = {}
+        for data in values:
+            per_job[data["job_id"]] = per_job.get(data["job_id"], 0) + 1
+        for job_id, count in per_job.items():
+            record_applications(self.db, job_id, [0.0] * count, now)
+        for application_id, data in zip(application_ids, values):
+            flag_duplicates(self.db, SimpleNamespace(id=application_id, **data), replace=False)
+        invalidate_candidates(self.db, {data["candidate_id"] for data in values})
+        return skipped, list(zip(application_ids, values))
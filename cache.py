@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from sqlalchemy import select, update, insert
+
+from database import engine
+from models import CacheVersion
+
+# How long browsers and the nginx proxy cache may reuse a job board response
+JOB_BOARD_MAX_AGE = int(os.getenv("JOB_BOARD_MAX_AGE", "30"))
+JOB_BOARD_CACHE_CONTROL = f"public, max-age={JOB_BOARD_MAX_AGE}, stale-while-revalidate={JOB_BOARD_MAX_AGE * 2}"
+
+class CachedJobList:
+    def __init__(self, version, body, items, last_modified):
+        self.version = version
+        self.body = body
+        self.items = items  # job id -> serialized job, for GET /api/jobs/{job_id}
+        self.last_modified = last_modified
+        self.etag = make_etag(body)
+
+class SharedVersion:
+    """Invalidation counter kept in the database so every worker process sees it"""
+
+    def __init__(self, engine, name):
+        self.engine = engine
+        self.name = name
+
+    def current(self):
+        with self.engine.connect() as conn:
+            version = conn.execute(select(CacheVersion.version).where(CacheVersion.name == self.name)).scalar()
+        return version or 0
+
+    def bump(self):
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(CacheVersion).where(CacheVersion.name == self.name).values(version=CacheVersion.version + 1)
+            )
+            if result.rowcount == 0:
+                conn.execute(insert(CacheVersion).values(name=self.name, version=1))
+
+class JobListCache:
+    """Per-process cache of the serialized active-job list.
+
+    Writers call invalidate() after committing a job change, which bumps a
+    version shared by all workers so each of them rebuilds its entry on the
+    next read. The version is read before loading, so an entry built while
+    an invalidation lands is tagged with the old version and never served
+    after it.
+    """
+
+    def __init__(self, versions):
+        self._lock = threading.Lock()
+        self._entry = None
+        self.versions = versions
+
+    def invalidate(self):
+        self.versions.bump()
+        with self._lock:
+            self._entry = None
+
+    def get(self, loader):
+        version = self.versions.current()
+        entry = self._entry
+        if entry is not None and entry.version == version:
+            return entry
+
+        body, items, last_modified = loader()
+        entry = CachedJobList(version, body, items, last_modified)
+        with self._lock:
+            if self._entry is None or self._entry.version <= version:
+                self._entry = entry
+        return entry
+
+job_list_cache = JobListCache(SharedVersion(engine, "job_list"))
+
+def make_etag(body):
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+def http_date(dt):
+    return format_datetime(dt.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def is_not_modified(request, etag, last_modified=None):
+    """Evaluate If-None-Match / If-Modified-Since for a conditional GET"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+def cache_headers(etag, last_modified=None):
+    headers = {"ETag": etag, "Cache-Control": JOB_BOARD_CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
@@ -2,10 +2,13 @@ from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, B
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
+import os
 
-DATABASE_URL = "sqlite:///./hr_assist.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./hr_assist.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Worker processes share the SQLite file, so wait on its write lock instead of failing
+connect_args = {"check_same_thread": False, "timeout": 30} if DATABASE_URL.startswith("sqlite") else {}
+engine = create_engine(DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
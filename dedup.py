@@ -0,0 +1,188 @@
+"""Duplicate detection for applications submitted from different accounts.
+
+Every application is reduced to a handful of lookup keys: its normalized
+email and phone, and the LSH bands of a MinHash signature of its profile
+text. Keys are scoped to the job, so a new application is checked with a
+single indexed IN query instead of being compared against every other
+applicant. Profile matches are confirmed by comparing signatures before
+they are flagged.
+
+    python dedup.py --reindex    # index applications submitted before dedup existed
+"""
+import hashlib
+import random
+import re
+import struct
+
+from sqlalchemy import select, insert, delete
+
+from models import Application, DedupKey, ApplicationSignature, DuplicateFlag
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS  # profiles above ~0.5 Jaccard usually share at least one band
+SIMILARITY_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)  # fixed, so signatures stay comparable across processes and restarts
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f"<{NUM_PERM}Q")
+
+# Reasons in the order they are preferred when several keys match
+REASONS = ("email", "phone", "profile")
+
+GMAIL_DOMAINS = {"gmail.com", "googlemail.com"}
+
+def normalize_email(email):
+    local, _, domain = (email or "").strip().lower().partition("@")
+    local = local.split("+", 1)[0]
+    if domain in GMAIL_DOMAINS:
+        local = local.replace(".", "")
+        domain = "gmail.com"
+    return f"{local}@{domain}" if local and domain else ""
+
+def normalize_phone(phone):
+    digits = re.sub(r"\D", "", phone or "")
+    # Compare the national number so +1 555... and 555... match
+    return digits[-10:] if len(digits) >= 7 else ""
+
+def profile_text(application):
+    return " ".join([
+        application.relevant_experience or "", application.skills or "",
+        application.education or "", application.projects or "",
+    ])
+
+def shingles(text):
+    tokens = re.findall(r"[a-z0-9+#.]+", text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set):
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingle_set]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+
+def _key(*parts):
+    return hashlib.blake2b(":".join(str(part) for part in parts).encode(), digest_size=16).hexdigest()
+
+def lookup_keys(application, signature):
+    """Map each lookup key of an application to the reason it would match on"""
+    keys = {}
+    email = normalize_email(application.email)
+    if email:
+        keys[_key("email", application.job_id, email)] = "email"
+    phone = normalize_phone(application.phone)
+    if phone:
+        keys[_key("phone", application.job_id, phone)] = "phone"
+    if signature is not None:
+        for band in range(BANDS):
+            rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+            keys[_key("lsh", application.job_id, band, *rows)] = "profile"
+    return keys
+
+def _best_match(db, application, keys, signature):
+    matches = {}  # other application id -> reason
+    rows = db.execute(
+        select(DedupKey.key, DedupKey.application_id)
+        .where(DedupKey.key.in_(list(keys)), DedupKey.candidate_id != application.candidate_id)
+    ).all()
+    for key, other_id in rows:
+        reason = keys[key]
+        current = matches.get(other_id)
+        if current is None or REASONS.index(reason) < REASONS.index(current):
+            matches[other_id] = reason
+
+    exact = [(REASONS.index(reason), other_id, reason) for other_id, reason in matches.items() if reason != "profile"]
+    if exact:
+        _, other_id, reason = min(exact)
+        return other_id, reason, 1.0
+
+    # LSH only says two profiles may be similar; confirm with the full signatures
+    candidates = [other_id for other_id, reason in matches.items() if reason == "profile"]
+    if not candidates or signature is None:
+        return None
+    best = None
+    for other_id, packed in db.execute(
+        select(ApplicationSignature.application_id, ApplicationSignature.signature)
+        .where(ApplicationSignature.application_id.in_(candidates))
+    ):
+        if not packed:
+            continue
+        score = similarity(signature, _SIGNATURE.unpack(packed))
+        if score >= SIMILARITY_THRESHOLD and (best is None or score > best[2]):
+            best = (other_id, "profile", score)
+    return best
+
+def flag_duplicates(db, application, replace=True):
+    """Store an application's lookup keys and flag it if it repeats another candidate's application.
+
+    Safe to call again after the application changes; its old keys and flag
+    are replaced. Pass replace=False for rows that were just inserted.
+    Returns the DuplicateFlag values, or None.
+    """
+    if replace:
+        for table in (DedupKey, ApplicationSignature, DuplicateFlag):
+            db.execute(delete(table).where(table.application_id == application.id))
+
+    signature = minhash(shingles(profile_text(application)))
+    keys = lookup_keys(application, signature)
+    match = _best_match(db, application, keys, signature) if keys else None
+
+    if keys:
+        db.execute(insert(DedupKey), [
+            {"key": key, "application_id": application.id, "candidate_id": application.candidate_id} for key in keys
+        ])
+    # Stored even when there is no text to sign, so reindex() knows the row is done
+    db.execute(insert(ApplicationSignature).values(
+        application_id=application.id, signature=_SIGNATURE.pack(*signature) if signature is not None else b""
+    ))
+    if match is None:
+        return None
+    duplicate_of, reason, score = match
+    flag = {
+        "application_id": application.id, "job_id": application.job_id,
+        "duplicate_of": duplicate_of, "reason": reason, "similarity": round(score, 3),
+    }
+    db.execute(insert(DuplicateFlag).values(**flag))
+    return flag
+
+def reindex(db, batch_size=1000):
+    """Index every application that has no signature yet, oldest first"""
+    indexed = 0
+    while True:
+        pending = db.scalars(
+            select(Application)
+            .where(~Application.id.in_(select(ApplicationSignature.application_id)))
+            .order_by(Application.id)
+            .limit(batch_size)
+        ).all()
+        if not pending:
+            return indexed
+        for application in pending:
+            flag_duplicates(db, application)
+        db.commit()
+        indexed += len(pending)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Duplicate detection maintenance")
+    parser.add_argument("--reindex", action="store_true", help="index applications that have no signature yet")
+    args = parser.parse_args()
+    if args.reindex:
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            print(f"Indexed {reindex(db)} applications")
+        finally:
+            db.close()
+    else:
+        parser.print_help()
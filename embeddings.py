@@ -0,0 +1,216 @@
+"""Local text embeddings for semantic job/candidate matching.
+
+Jobs and applications are embedded once when they are written, with a
+signed hashing vectorizer over canonical skills, words, word pairs and
+character trigrams, so "postgres" and "PostgreSQL" or "k8s" and
+"Kubernetes" land close together with no model download and no network
+call. Vectors are unit-length float32 rows in one memory-mapped file per
+kind, where row N belongs to id N. Every worker maps the same file, and a
+query is a single matrix-vector product over the rows it asks for.
+
+    python embeddings.py --reindex    # rebuild the vector files from the database
+"""
+import hashlib
+import os
+import re
+
+from skills import SKILL_ALIASES, normalize_skill
+
+DIM = 256
+ROW_BYTES = DIM * 4
+EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", "embeddings")
+
+# Feature weights: skills carry the most signal, trigrams only catch spelling variants
+SKILL_WEIGHT = 3.0
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.25
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or",
+    "our", "the", "to", "we", "with", "you", "your", "will", "have", "has", "this", "that", "years", "year",
+}
+
+def _tokens(text):
+    words = re.findall(r"[a-z0-9+#.]+", (text or "").lower())
+    return [SKILL_ALIASES.get(word, word).strip(".") for word in words]
+
+def features(skills_text, free_text):
+    """Weighted features of a row: its comma separated skills and its free text"""
+    weights = {}
+
+    def add(feature, weight):
+        weights[feature] = weights.get(feature, 0.0) + weight
+
+    for part in (skills_text or "").replace(";", ",").split(","):
+        skill = normalize_skill(part)
+        if skill:
+            add("s:" + skill, SKILL_WEIGHT)
+    words = [word for word in _tokens(free_text) + _tokens(skills_text) if word and word not in STOP_WORDS]
+    for word in words:
+        add("w:" + word, WORD_WEIGHT)
+        padded = f"<{word}>"
+        for i in range(len(padded) - 2):
+            add("c:" + padded[i:i + 3], TRIGRAM_WEIGHT)
+    for first, second in zip(words, words[1:]):
+        add(f"b:{first} {second}", BIGRAM_WEIGHT)
+    return weights
+
+def embed(skills_text, free_text):
+    """Unit-length float32 vector, or None when there is no text"""
+    import numpy as np
+
+    vector = np.zeros(DIM, dtype=np.float32)
+    for feature, weight in features(skills_text, free_text).items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+        # The sign bit keeps colliding features from always adding up
+        vector[h % DIM] += weight if (h >> 63) else -weight
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        return None
+    return vector / norm
+
+def embed_job(job):
+    return embed(job.skills, f"{job.title} {job.description}")
+
+def embed_application(application):
+    return embed(application.skills, f"{application.relevant_experience} {application.projects} {application.education}")
+
+class VectorStore:
+    """Float32 rows in a file, addressed by id. Rows never written read as zeros."""
+
+    def __init__(self, name, directory=None):
+        self.name = name
+        self.directory = directory
+        self._matrix = None
+        self._size = -1
+
+    @property
+    def path(self):
+        return os.path.join(self.directory or EMBEDDINGS_DIR, f"{self.name}.f32")
+
+    def put(self, row_id, vector):
+        """Write one row in place; other workers see it through their own mapping"""
+        import numpy as np
+
+        data = np.zeros(DIM, dtype=np.float32) if vector is None else np.asarray(vector, dtype=np.float32)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Writing past the end grows the file; skipped ids become zero rows
+            os.pwrite(fd, data.tobytes(), row_id * ROW_BYTES)
+        finally:
+            os.close(fd)
+
+    def matrix(self):
+        """Memory-mapped (rows, DIM) view, remapped when another process grew the file"""
+        import numpy as np
+
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return np.zeros((0, DIM), dtype=np.float32)
+        if size != self._size:
+            rows = size // ROW_BYTES
+            self._matrix = np.memmap(self.path, dtype=np.float32, mode="r", shape=(rows, DIM)) if rows else (
+                np.zeros((0, DIM), dtype=np.float32)
+            )
+            self._size = size
+        return self._matrix
+
+    def get(self, row_id):
+        matrix = self.matrix()
+        if row_id >= len(matrix) or not matrix[row_id].any():
+            return None
+        return matrix[row_id]
+
+    def nearest(self, query, row_ids, limit):
+        """The `limit` ids among row_ids most similar to query, as (id, cosine similarity) pairs"""
+        import numpy as np
+
+        matrix = self.matrix()
+        ids = np.asarray(row_ids, dtype=np.int64)
+        ids = ids[ids < len(matrix)]
+        if query is None or not len(ids) or limit <= 0:
+            return []
+        rows = matrix[ids]
+        # Rows that were never embedded are all zeros and are left out; every embedded row is ranked
+        keep = rows.any(axis=1)
+        ids, scores = ids[keep], rows[keep] @ query
+        if len(ids) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), round(float(scores[i]), 4)) for i in order]
+
+job_vectors = VectorStore("jobs")
+application_vectors = VectorStore("applications")
+
+def index_job(job):
+    job_vectors.put(job.id, embed_job(job))
+
+def index_application(application):
+    application_vectors.put(application.id, embed_application(application))
+
+def top_candidates(db, job, limit=20):
+    """Applications to a job, most similar to the job first"""
+    from models import Application
+
+    ids = [row_id for (row_id,) in db.query(Application.id).filter(Application.job_id == job.id)]
+    query = job_vectors.get(job.id)
+    if query is None:
+        query = embed_job(job)
+    return application_vectors.nearest(query, ids, limit)
+
+def similar_jobs(db, application, limit=10):
+    """Active jobs most similar to an application, leaving out jobs its candidate already applied to"""
+    from models import Job, Application
+
+    applied = db.query(Application.job_id).filter(Application.candidate_id == application.candidate_id)
+    ids = [row_id for (row_id,) in db.query(Job.id).filter(Job.is_active == True, ~Job.id.in_(applied))]
+    query = application_vectors.get(application.id)
+    if query is None:
+        query = embed_application(application)
+    return job_vectors.nearest(query, ids, limit)
+
+def reindex(db, batch_size=1000, missing_only=False):
+    """Embed every job and application again, in id order.
+
+    With missing_only, a kind is skipped when its vector file already exists.
+    """
+    from models import Job, Application
+
+    counts = {}
+    for model, index, store in ((Job, index_job, job_vectors), (Application, index_application, application_vectors)):
+        if missing_only and os.path.exists(store.path):
+            continue
+        last_id = 0
+        counts[model.__tablename__] = 0
+        while True:
+            rows = db.query(model).filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                index(row)
+            last_id = rows[-1].id
+            counts[model.__tablename__] += len(rows)
+            for row in rows:
+                db.expunge(row)
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Embedding index maintenance")
+    parser.add_argument("--reindex", action="store_true", help="embed every job and application")
+    args = parser.parse_args()
+    if args.reindex:
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            print(", ".join(f"{count} {table}" for table, count in reindex(db).items()) + " embedded")
+        finally:
+            db.close()
+    else:
+        parser.print_help()
@@ -0,0 +1,30 @@
+"""Multi-process deployment profile.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Bootstrap (tables, directories, WAL, secret key) runs once in the master
+before any worker is forked. Workers import the app themselves rather than
+inheriting a preloaded one, so none of them share a database connection.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = False
+
+keepalive = 5
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))  # LLM calls and bulk imports can be slow
+graceful_timeout = 30
+
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+
+def on_starting(server):
+    from bootstrap import bootstrap
+
+    bootstrap()
@@ -0,0 +1,57 @@
+"""Zip downloads of interview question PDFs for many candidates at once.
+
+Questions are generated on a small thread pool (LLM calls are I/O bound),
+PDFs are rendered on the process pool from pdf_render, and the zip is
+written to the response as each PDF finishes, in request order.
+"""
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from exporters import ZipStreamSink
+from pdf_render import submit_render, render_result
+
+MAX_PACK_SIZE = 500
+QUESTION_THREADS = 8
+
+def snapshot(job, application):
+    """Copy what question generation and rendering need out of the ORM session"""
+    return SimpleNamespace(
+        application_id=application.id,
+        job=SimpleNamespace(
+            title=job.title, description=job.description, skills=job.skills, experience_years=job.experience_years
+        ),
+        application=SimpleNamespace(
+            name=application.name, skills=application.skills,
+            experience_years=application.experience_years, projects=application.projects
+        ),
+    )
+
+def pack_filename(item):
+    safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", item.application.name).strip("_") or "candidate"
+    return f"interview_questions_{item.application_id}_{safe_name}.pdf"
+
+def build_interview_pack(items, generate_questions):
+    """Yield the bytes of a zip holding one question PDF per item"""
+    sink = ZipStreamSink()
+    llm_pool = ThreadPoolExecutor(max_workers=QUESTION_THREADS)
+    try:
+        question_futures = [llm_pool.submit(generate_questions, item.job, item.application) for item in items]
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            pending = deque()
+            for item, questions in zip(items, question_futures):
+                pending.append((item, *submit_render(item.job.title, item.application.name, questions.result())))
+                # Flush whatever has finished rendering without waiting on the rest
+                while pending and pending[0][2].done():
+                    done_item, pool, rendered = pending.popleft()
+                    archive.writestr(pack_filename(done_item), render_result(pool, rendered))
+                    yield sink.drain()
+            while pending:
+                done_item, pool, rendered = pending.popleft()
+                archive.writestr(pack_filename(done_item), render_result(pool, rendered))
+                yield sink.drain()
+        yield sink.drain()
+    finally:
+        llm_pool.shutdown(wait=False, cancel_futures=True)
@@ -4,7 +4,7 @@ import streamlit as st
 from auth import login_view, register_view
 from hr_dashboard import hr_dashboard
 from candidate_dashboard import candidate_dashboard
-from db import init_db
+from db import migrate
 
 # -----------------------------
 # APP CONFIG
@@ -14,7 +14,12 @@ st.set_page_config(page_title="AI Job Portal", layout="wide")
 # -----------------------------
 # INITIALIZE DATABASE
 # -----------------------------
-init_db()
+# Streamlit reruns this script on every interaction; migrate once per process
+@st.cache_resource
+def prepare_database():
+    return migrate()
+
+prepare_database()
 
 # -----------------------------
 # SIDEBAR NAVIGATION
@@ -3,8 +3,15 @@
 import streamlit as st
 import sqlite3
 import os
+import re
+import sys
+
+# resume_parser lives at the repository root, next to the FastAPI app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resume_parser import parse_resume, resume_format, ResumeParseError
 
 DB_PATH = "data/users.db"
+JOBS_PER_PAGE = 10
 
 # -----------------------------
 # DATABASE CONNECTION
@@ -12,31 +19,6 @@ DB_PATH = "data/users.db"
 def get_db_connection():
     return sqlite3.connect(DB_PATH, check_same_thread=False)
 
-# -----------------------------
-# JOB APPLICATION TABLE SETUP
-# -----------------------------
-def init_application_table():
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS applications (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        candidate TEXT,
-        job_id INTEGER,
-        full_name TEXT,
-        email TEXT,
-        phone TEXT,
-        linkedin TEXT,
-        github TEXT,
-        objective TEXT,
-        skills TEXT,
-        experience TEXT,
-        education TEXT,
-        certifications TEXT,
-        status TEXT DEFAULT 'Submitted'
-    )''')
-    conn.commit()
-    conn.close()
-
 # -----------------------------
 # DATABASE FUNCTIONS
 # -----------------------------
@@ -64,6 +46,51 @@ def apply_to_job(candidate, job_id, data):
     conn.commit()
     conn.close()
 
+def get_jobs_version():
+    """Changes whenever a job is posted, so cached rankings are rebuilt"""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), MAX(id) FROM jobs")
+    version = c.fetchone()
+    conn.close()
+    return version
+
+def _words(text):
+    return set(re.findall(r"[a-z0-9+#.]+", (text or "").lower())) - {"and", "or", "the", "a", "of", "in", "with"}
+
+@st.cache_data(max_entries=1000)
+def get_recommended_jobs(candidate, jobs_version, applications_count):
+    """Jobs the candidate has not applied to, best match to their past applications first.
+
+    jobs_version and applications_count are only part of the cache key.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT job_id, skills, experience FROM applications WHERE candidate = ?", (candidate,))
+    rows = c.fetchall()
+    c.execute("SELECT id, title, description FROM jobs ORDER BY id DESC")
+    jobs = c.fetchall()
+    conn.close()
+
+    applied = {job_id for job_id, _, _ in rows}
+    profile = set()
+    for _, skills, experience in rows:
+        profile |= _words(skills) | _words(experience)
+    ranked = []
+    for job in jobs:
+        if job[0] in applied:
+            continue
+        words = _words(f"{job[1]} {job[2]}")
+        ranked.append((len(words & profile) / len(words) if words else 0.0, job))
+    # Newest first among equal matches, which is every job before a first application
+    ranked.sort(key=lambda item: -item[0])
+    return [job for _, job in ranked]
+
+@st.cache_data(max_entries=100)
+def parse_uploaded_resume(data, file_format):
+    """Cached by file content, so reruns of the page never parse the same resume twice"""
+    return parse_resume(data, file_format)
+
 def get_candidate_applications(candidate):
     conn = get_db_connection()
     c = conn.cursor()
@@ -76,33 +103,56 @@ def get_candidate_applications(candidate):
 # CANDIDATE DASHBOARD UI
 # -----------------------------
 def candidate_dashboard():
-    st.header("🔍 Browse Jobs and Apply")
+    st.header("🔍 Recommended Jobs")
 
-    jobs = get_all_jobs()
-    for job in jobs:
-        with st.expander(f"{job[1]}"):
-            st.write(job[2])
-            with st.form(f"apply_form_{job[0]}"):
-                data = {}
-                data["full_name"] = st.text_input("Full Name")
-                data["email"] = st.text_input("Email")
-                data["phone"] = st.text_input("Phone")
-                data["linkedin"] = st.text_input("LinkedIn")
-                data["github"] = st.text_input("GitHub/Portfolio")
-                data["objective"] = st.text_area("Objective (2-3 lines)")
-                data["skills"] = st.text_area("Skills (comma-separated or list)")
-                data["experience"] = st.text_area("Experience")
-                data["education"] = st.text_area("Education")
-                data["certifications"] = st.text_area("Certifications")
-                submitted = st.form_submit_button("Apply")
-                if submitted:
-                    if data["full_name"] and data["email"]:
-                        apply_to_job(st.session_state.username, job[0], data)
-                        st.success("Application submitted!")
-                    else:
-                        st.error("Full name and email are required.")
+    apps = get_candidate_applications(st.session_state.username)
+    jobs = get_recommended_jobs(st.session_state.username, get_jobs_version(), len(apps))
+    if not jobs:
+        st.info("No open jobs to apply to right now.")
+    else:
+        pages = (len(jobs) + JOBS_PER_PAGE - 1) // JOBS_PER_PAGE
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        page_jobs = jobs[(page - 1) * JOBS_PER_PAGE:page * JOBS_PER_PAGE]
+        for job in page_jobs:
+            with st.expander(f"{job[1]}"):
+                st.write(job[2])
+
+        # One apply form for the chosen job instead of one per listed job
+        titles = {job[0]: job[1] for job in page_jobs}
+        job_id = st.selectbox("Apply to", list(titles), format_func=titles.get)
+
+        prefill = {}
+        resume = st.file_uploader("Resume (.docx or .pdf) to pre-fill the form", type=["docx", "pdf"])
+        if resume is not None:
+            try:
+                prefill = parse_uploaded_resume(resume.getvalue(), resume_format(resume.name))
+            except ResumeParseError as e:
+                st.error(str(e))
+
+        # Keyed by resume, so a new upload replaces what the previous one filled in
+        key = f"_{resume.file_id}" if resume is not None else ""
+        with st.form("apply_form"):
+            data = {}
+            data["full_name"] = st.text_input("Full Name", value=prefill.get("name", ""), key="full_name" + key)
+            data["email"] = st.text_input("Email", value=prefill.get("email", ""), key="email" + key)
+            data["phone"] = st.text_input("Phone", value=prefill.get("phone", ""), key="phone" + key)
+            data["linkedin"] = st.text_input("LinkedIn")
+            data["github"] = st.text_input("GitHub/Portfolio")
+            data["objective"] = st.text_area("Objective (2-3 lines)", value=prefill.get("summary", ""), key="objective" + key)
+            data["skills"] = st.text_area("Skills (comma-separated or list)", value=prefill.get("skills", ""), key="skills" + key)
+            data["experience"] = st.text_area("Experience", value=prefill.get("relevant_experience", ""), key="experience" + key)
+            data["education"] = st.text_area("Education", value=prefill.get("education", ""), key="education" + key)
+            data["certifications"] = st.text_area("Certifications", value=prefill.get("certifications", ""), key="certifications" + key)
+            submitted = st.form_submit_button("Apply")
+            if submitted:
+                if data["full_name"] and data["email"]:
+                    apply_to_job(st.session_state.username, job_id, data)
+                    # Listed below without querying the applications again
+                    apps.append((titles[job_id], "Submitted"))
+                    st.success("Application submitted!")
+                else:
+                    st.error("Full name and email are required.")
 
     st.subheader("📥 Your Applications")
-    apps = get_candidate_applications(st.session_state.username)
     for title, status in apps:
         st.markdown(f"- **{title}** → `{status}`")
@@ -9,26 +9,31 @@ DB_PATH = os.path.join(DB_DIR, "users.db")
 # Ensure the data folder exists
 os.makedirs(DB_DIR, exist_ok=True)
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+# -----------------------------
+# SCHEMA MIGRATIONS
+# -----------------------------
+# Steps run in order, each in its own transaction, and PRAGMA user_version
+# records how many have run, so an up-to-date database costs one pragma read.
+# Append new steps; never change one that has shipped. Keep to changes SQLite
+# makes without copying a table (CREATE, ADD COLUMN, CREATE INDEX).
 
-    # Users table
+APPLICATION_COLUMNS = [
+    "full_name TEXT", "email TEXT", "phone TEXT", "linkedin TEXT", "github TEXT",
+    "objective TEXT", "skills TEXT", "experience TEXT", "education TEXT", "certifications TEXT"
+]
+
+def create_base_tables(c):
     c.execute('''CREATE TABLE IF NOT EXISTS users (
         username TEXT PRIMARY KEY,
         password TEXT,
         role TEXT
     )''')
-
-    # Jobs table
     c.execute('''CREATE TABLE IF NOT EXISTS jobs (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         title TEXT,
         description TEXT,
         posted_by TEXT
     )''')
-
-    # Applications table (basic if fresh)
     c.execute('''CREATE TABLE IF NOT EXISTS applications (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         candidate TEXT,
@@ -36,28 +41,58 @@ def init_db():
         status TEXT DEFAULT 'Submitted'
     )''')
 
-    conn.commit()
-    conn.close()
+def add_application_columns(c):
+    # Databases from before versioning already have some or all of these
+    existing = {row[1] for row in c.execute("PRAGMA table_info(applications)")}
+    for col in APPLICATION_COLUMNS:
+        if col.split()[0] not in existing:
+            c.execute(f"ALTER TABLE applications ADD COLUMN {col}")
+
+def create_interviews_table(c):
+    # Indexed so overlap checks only read one person's day
+    c.execute('''CREATE TABLE IF NOT EXISTS interviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate TEXT,
+        job_id INTEGER,
+        interviewer TEXT,
+        start_at TEXT,
+        end_at TEXT
+    )''')
+    c.execute("CREATE INDEX IF NOT EXISTS ix_interviews_interviewer_start ON interviews (interviewer, start_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_interviews_candidate_start ON interviews (candidate, start_at)")
 
-    # Run migration after initial setup
-    migrate_applications_table()
+def index_applications(c):
+    # Applicant lists filter by job; status updates and re-applies by candidate and job
+    c.execute("CREATE INDEX IF NOT EXISTS ix_applications_job ON applications (job_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_applications_candidate_job ON applications (candidate, job_id)")
 
-def migrate_applications_table():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+MIGRATIONS = [create_base_tables, add_application_columns, create_interviews_table, index_applications]
 
-    columns = [
-        "full_name TEXT", "email TEXT", "phone TEXT", "linkedin TEXT", "github TEXT",
-        "objective TEXT", "skills TEXT", "experience TEXT", "education TEXT", "certifications TEXT"
-    ]
-    for col in columns:
-        try:
-            c.execute(f"ALTER TABLE applications ADD COLUMN {col}")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
 
-    conn.commit()
-    conn.close()
+def migrate(db_path=DB_PATH):
+    """Apply pending migrations; returns how many ran"""
+    # isolation_level=None: transactions are opened and closed below, not by the driver
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    applied = 0
+    try:
+        while schema_version(conn) < len(MIGRATIONS):
+            # The write lock first, then the version again: another process may have migrated meanwhile
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = schema_version(conn)
+                if version < len(MIGRATIONS):
+                    MIGRATIONS[version](conn)
+                    conn.execute(f"PRAGMA user_version = {version + 1}")
+                    applied += 1
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    finally:
+        conn.close()
+    return applied
 
-# Call this once on app startup
-init_db()
+if __name__ == "__main__":
+    print(f"Applied {migrate()} migrations")
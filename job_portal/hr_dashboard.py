@@ -2,12 +2,15 @@
 
 import streamlit as st
 import sqlite3
-from utils.chatgpt import get_profile_match_percentage, generate_interview_questions
+from utils.chatgpt import get_profile_match_percentage, generate_interview_questions, candidate_profile
 from utils.email_sender import send_email
-from datetime import datetime
+from datetime import datetime, timedelta, time
 
 DB_PATH = "data/users.db"
 
+# Longest interview; overlap checks only look this far back from the new slot
+MAX_INTERVIEW_MINUTES = 240
+
 # -----------------------------
 # DATABASE CONNECTION
 # -----------------------------
@@ -52,6 +55,30 @@ def update_application_status(candidate, job_id, new_status):
     conn.commit()
     conn.close()
 
+def book_interview(candidate, job_id, interviewer, start_at, minutes):
+    """Store the interview unless the interviewer or candidate is busy then; returns True if booked"""
+    end_at = start_at + timedelta(minutes=minutes)
+    earliest = (start_at - timedelta(minutes=MAX_INTERVIEW_MINUTES)).isoformat()
+    start, end = start_at.isoformat(), end_at.isoformat()
+    conn = get_db_connection()
+    c = conn.cursor()
+    # One statement, so the check and the insert cannot be split by another booking
+    c.execute("""
+        INSERT INTO interviews (candidate, job_id, interviewer, start_at, end_at)
+        SELECT ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (
+            SELECT 1 FROM interviews WHERE interviewer = ? AND start_at > ? AND start_at < ? AND end_at > ?
+        ) AND NOT EXISTS (
+            SELECT 1 FROM interviews WHERE candidate = ? AND start_at > ? AND start_at < ? AND end_at > ?
+        )
+    """, (candidate, job_id, interviewer, start, end,
+          interviewer, earliest, end, start,
+          candidate, earliest, end, start))
+    booked = c.rowcount == 1
+    conn.commit()
+    conn.close()
+    return booked
+
 # -----------------------------
 # HR DASHBOARD UI
 # -----------------------------
@@ -100,13 +127,10 @@ def hr_dashboard():
                     st.markdown(f"**Education:**\n{education}")
                     st.markdown(f"**Certifications:**\n{certifications}")
 
-                    profile_text = f"""
-Objective: {objective}
-Skills: {skills}
-Experience: {experience}
-Education: {education}
-Certifications: {certifications}
-                    """
+                    profile_text = candidate_profile(
+                        objective=objective, skills=skills, experience=experience,
+                        education=education, certifications=certifications
+                    )
 
                     if st.button("🔎 Check Match %", key=f"match_{candidate}_{job[0]}"):
                         result = get_profile_match_percentage(job[2], profile_text)
@@ -117,8 +141,15 @@ Certifications: {certifications}
                         st.text_area("Interview Questions:", questions, height=250, key=f"qbox_{candidate}_{job[0]}")
 
                         interview_date = st.date_input("📅 Select Interview Date", key=f"date_{candidate}_{job[0]}")
+                        interview_time = st.time_input("🕘 Start Time", value=time(10, 0), key=f"time_{candidate}_{job[0]}")
+                        minutes = st.number_input("Duration (minutes)", min_value=15, max_value=MAX_INTERVIEW_MINUTES,
+                                                  value=45, step=15, key=f"minutes_{candidate}_{job[0]}")
                         if st.button("📤 Confirm and Schedule Interview", key=f"confirm_{candidate}_{job[0]}"):
-                            update_application_status(candidate, job[0], "Interview Scheduled")
-                            send_email(to_email=st.session_state.username, subject="Interview Questions", body=questions)
-                            send_email(to_email=email, subject="Interview Scheduled", body=f"Dear {full_name},\n\nYou are scheduled for an interview on {interview_date}.")
-                            st.success("Interview confirmed and emails sent.")
+                            start_at = datetime.combine(interview_date, interview_time)
+                            if not book_interview(candidate, job[0], st.session_state.username, start_at, int(minutes)):
+                                st.error("You or the candidate already have an interview at that time.")
+                            else:
+                                update_application_status(candidate, job[0], "Interview Scheduled")
+                                send_email(to_email=st.session_state.username, subject="Interview Questions", body=questions)
+                                send_email(to_email=email, subject="Interview Scheduled", body=f"Dear {full_name},\n\nYou are scheduled for an interview on {start_at:%Y-%m-%d at %H:%M} ({int(minutes)} minutes).")
+                                st.success("Interview confirmed and emails sent.")
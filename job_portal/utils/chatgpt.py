@@ -1,46 +1,97 @@
 # chatgpt.py
 
-import openai
+import logging
 import os
+import sys
+from functools import lru_cache
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# prompt_text lives at the repository root and is shared with the FastAPI app's prompts
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from prompt_text import estimate_tokens, condense
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# PROVIDERS
+# -----------------------------
+# LLM_PROVIDER=local runs a GGUF model with llama.cpp (LOCAL_MODEL_PATH) instead of OpenAI
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH")
+
+@lru_cache(maxsize=1)
+def openai_client():
+    import openai
+    return openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+@lru_cache(maxsize=1)
+def local_model():
+    # Loaded on first use and kept warm for the life of the Streamlit server process
+    from llama_cpp import Llama
+    return Llama(model_path=LOCAL_MODEL_PATH, n_ctx=4096, seed=0, verbose=False)
+
+# -----------------------------
+# PROMPT BUDGETS
+# -----------------------------
+# gpt-4o is billed per input token, so the job description and profile are
+# cleaned and cut to these budgets before they go into a prompt.
+JOB_TOKENS = 250
+PROFILE_BUDGETS = {"Objective": 60, "Skills": 80, "Experience": 180, "Education": 50, "Certifications": 30}
+
+def candidate_profile(**fields):
+    """'Label: text' lines for the profile fields, each cut to its budget in PROFILE_BUDGETS.
+
+    Pass the result as candidate_profile to the functions below.
+    """
+    return "\n".join(
+        f"{label}: {condense(fields.get(label.lower()), budget)}" for label, budget in PROFILE_BUDGETS.items()
+    )
+
+@lru_cache(maxsize=256)
+def job_context(job_description):
+    # Streamlit reruns the page on every click; each description is compacted once per process
+    return condense(job_description, JOB_TOKENS)
+
+def _ask(operation, prompt):
+    logger.info("%s prompt: about %d tokens", operation, estimate_tokens(prompt))
+    messages = [{"role": "user", "content": prompt}]
+    if LLM_PROVIDER == "local":
+        response = local_model().create_chat_completion(messages=messages, temperature=0)
+        usage = response.get("usage") or {}
+        logger.info("%s usage: %s prompt, %s completion tokens", operation, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        return response["choices"][0]["message"]["content"].strip()
+
+    response = openai_client().chat.completions.create(model=OPENAI_MODEL, messages=messages)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        logger.info("%s usage: %s prompt, %s completion tokens", operation, usage.prompt_tokens, usage.completion_tokens)
+    return response.choices[0].message.content.strip()
 
 # -----------------------------
 # MATCHING PROFILE TO JD
 # -----------------------------
 def get_profile_match_percentage(job_description, candidate_profile):
-    prompt = f"""
-Compare the following job description and candidate profile.
+    prompt = f"""Compare the following job description and candidate profile.
 Return only the match percentage (0-100) and a one-line justification.
 
 Job Description:
-{job_description}
+{job_context(job_description)}
 
 Candidate Profile:
 {candidate_profile}
 """
-    response = openai.ChatCompletion.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content.strip()
+    return _ask("match", prompt)
 
 # -----------------------------
 # GENERATE INTERVIEW QUESTIONS
 # -----------------------------
 def generate_interview_questions(job_description, candidate_profile):
-    prompt = f"""
-Based on the following job description and candidate profile, generate 10 relevant technical interview questions.
+    prompt = f"""Based on the following job description and candidate profile, generate 10 relevant technical interview questions.
 
 Job Description:
-{job_description}
+{job_context(job_description)}
 
 Candidate Profile:
 {candidate_profile}
 """
-    response = openai.ChatCompletion.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.choices[0].message.content.strip()
-
+    return _ask("interview_questions", prompt)
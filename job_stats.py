@@ -0,0 +1,122 @@
+"""Denormalized per-job application statistics.
+
+Every change is a relative UPDATE (count = count + 1) in the caller's
+transaction, so concurrent workers never lose an increment, and the HR job
+list reads one row per job instead of scanning applications.
+"""
+from sqlalchemy import select, update, delete, insert, func, case, or_
+
+from models import Job, Application, JobStats
+
+# Statuses with their own counter; any other status only counts towards total
+STATUS_COLUMNS = {"applied": "applied_count", "shortlisted": "shortlisted_count"}
+
+def is_scored(score):
+    # Bulk imports start at 0 until the scoring queue reaches them; real scores are 1-10
+    return score is not None and score > 0
+
+def _raise_max(column, value):
+    return case((or_(column == None, column < value), value), else_=column)
+
+def _apply(db, job_id, values):
+    result = db.execute(update(JobStats).where(JobStats.job_id == job_id).values(**values))
+    if result.rowcount == 0:
+        # Job predates the stats table; the flushed change is included in the rebuild
+        db.flush()
+        rebuild_job_stats(db, [job_id])
+
+def create_job_stats(db, job_id):
+    db.add(JobStats(job_id=job_id))
+
+def record_applications(db, job_id, scores, applied_at, status="applied"):
+    """Count new applications for a job, one score per application"""
+    scored = [score for score in scores if is_scored(score)]
+    values = {
+        "total": JobStats.total + len(scores),
+        "last_applied_at": _raise_max(JobStats.last_applied_at, applied_at),
+    }
+    if status in STATUS_COLUMNS:
+        column = getattr(JobStats, STATUS_COLUMNS[status])
+        values[STATUS_COLUMNS[status]] = column + len(scores)
+    if scored:
+        values["scored_count"] = JobStats.scored_count + len(scored)
+        values["score_total"] = JobStats.score_total + sum(scored)
+        values["max_ai_score"] = _raise_max(JobStats.max_ai_score, max(scored))
+    _apply(db, job_id, values)
+
+def record_status_change(db, job_id, old_status, new_status):
+    if old_status == new_status:
+        return
+    values = {}
+    if old_status in STATUS_COLUMNS:
+        values[STATUS_COLUMNS[old_status]] = getattr(JobStats, STATUS_COLUMNS[old_status]) - 1
+    if new_status in STATUS_COLUMNS:
+        values[STATUS_COLUMNS[new_status]] = getattr(JobStats, STATUS_COLUMNS[new_status]) + 1
+    if values:
+        _apply(db, job_id, values)
+
+def record_score_change(db, job_id, old_score, new_score):
+    old = old_score if is_scored(old_score) else 0.0
+    new = new_score if is_scored(new_score) else 0.0
+    if old == new:
+        return
+    values = {
+        "scored_count": JobStats.scored_count + (is_scored(new_score) - is_scored(old_score)),
+        "score_total": JobStats.score_total + (new - old),
+    }
+    if new > old:
+        values["max_ai_score"] = _raise_max(JobStats.max_ai_score, new)
+    else:
+        # A rescore can be lower; if the old score was the maximum, look the maximum up again
+        db.flush()
+        highest = select(func.max(Application.ai_score)).where(
+            Application.job_id == job_id, Application.ai_score > 0
+        ).scalar_subquery()
+        values["max_ai_score"] = case((JobStats.max_ai_score <= old, highest), else_=JobStats.max_ai_score)
+    _apply(db, job_id, values)
+
+def rebuild_job_stats(db, job_ids=None):
+    """Recompute stats from applications for the given jobs, or for every job"""
+    scored = Application.ai_score > 0
+    query = select(
+        Application.job_id,
+        func.count(),
+        *[func.sum(case((Application.status == status, 1), else_=0)) for status in STATUS_COLUMNS],
+        func.sum(case((scored, 1), else_=0)),
+        func.sum(case((scored, Application.ai_score), else_=0.0)),
+        func.max(case((scored, Application.ai_score))),
+        func.max(Application.created_at),
+    ).group_by(Application.job_id)
+    if job_ids is None:
+        job_ids = db.scalars(select(Job.id)).all()
+    else:
+        query = query.where(Application.job_id.in_(job_ids))
+    computed = {row[0]: row[1:] for row in db.execute(query)}
+
+    rows = []
+    for job_id in job_ids:
+        total, *status_counts, scored_count, score_total, max_ai_score, last_applied_at = (
+            computed.get(job_id) or (0, *[0] * len(STATUS_COLUMNS), 0, 0.0, None, None)
+        )
+        row = {
+            "job_id": job_id, "total": total, "scored_count": scored_count, "score_total": score_total or 0.0,
+            "max_ai_score": max_ai_score, "last_applied_at": last_applied_at,
+        }
+        row.update(zip(STATUS_COLUMNS.values(), status_counts))
+        rows.append(row)
+    db.execute(delete(JobStats).where(JobStats.job_id.in_(job_ids)))
+    if rows:
+        db.execute(insert(JobStats), rows)
+
+def stats_dict(stats):
+    if stats is None:
+        return None
+    return {
+        "total": stats.total,
+        "applied": stats.applied_count,
+        "shortlisted": stats.shortlisted_count,
+        "scored": stats.scored_count,
+        "mean_ai_score": round(stats.score_total / stats.scored_count, 2) if stats.scored_count else None,
+        "max_ai_score": stats.max_ai_score,
+        "last_applied_at": stats.last_applied_at,
+    }
@@ -0,0 +1,288 @@
+"""LLM providers behind one interface: OpenAI, a local CPU model and a deterministic fake.
+
+    LLM_PROVIDER=openai   # OpenAI chat completions (OPENAI_API_KEY, OPENAI_MODEL)
+    LLM_PROVIDER=local    # a GGUF model run by llama.cpp on this machine (LOCAL_MODEL_PATH)
+    LLM_PROVIDER=fake     # canned answers, for tests and benchmarks
+    LLM_PROVIDER=none     # no LLM; callers use their rule-based fallbacks
+
+Unset, it is openai when OPENAI_API_KEY is set, else local when
+LOCAL_MODEL_PATH is set, else none.
+
+The local provider loads the model once, in one spawned worker process, so
+no request pays for loading it and the web process never holds its
+memory. Requests from concurrent threads are gathered into batches of up
+to LOCAL_BATCH_SIZE: the first request of a batch waits at most
+LOCAL_BATCH_WAIT_MS for company, and requests arriving while the model is
+busy go out together next. llama.cpp answers a batch back to back with the
+model warm, at temperature 0, so answers are repeatable. A request waits
+at most LLM_TIMEOUT_SECONDS, and one arriving to a queue of
+LOCAL_MAX_QUEUE is refused at once; both raise LLMError, so callers fall
+back instead of queueing without bound. Each web worker runs its own model
+process, so size WEB_CONCURRENCY to the memory the model needs.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import NamedTuple
+
+from metrics import LLM_LATENCY, record_llm_usage
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "").lower()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "")
+LOCAL_MODEL_THREADS = int(os.getenv("LOCAL_MODEL_THREADS", "0")) or (os.cpu_count() or 1)
+LOCAL_MODEL_CONTEXT = int(os.getenv("LOCAL_MODEL_CONTEXT", "2048"))
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_BATCH_SIZE", "8"))
+LOCAL_BATCH_WAIT_MS = float(os.getenv("LOCAL_BATCH_WAIT_MS", "5"))
+LOCAL_MAX_QUEUE = int(os.getenv("LOCAL_MAX_QUEUE", "64"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+# How long shutdown waits for the batch in flight before leaving the batcher to exit on its own
+LOCAL_SHUTDOWN_SECONDS = 5
+
+class LLMError(RuntimeError):
+    pass
+
+class Completion(NamedTuple):
+    text: str
+    usage: dict  # prompt_tokens and completion_tokens, as far as the provider reports them
+
+class OpenAIProvider:
+    name = "openai"
+
+    def __init__(self, api_key=None, model=OPENAI_MODEL):
+        self.api_key = api_key or OPENAI_API_KEY
+        self.model = model
+        self._client = None
+
+    def complete(self, prompt, max_tokens):
+        if self._client is None:
+            # The slowest import in the app, so it waits for the first call
+            import openai
+            self._client = openai.OpenAI(api_key=self.api_key, timeout=LLM_TIMEOUT_SECONDS, max_retries=1)
+        response = self._client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+        )
+        usage = response.usage
+        return Completion(response.choices[0].message.content or "", {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+        })
+
+class FakeProvider:
+    """Deterministic answers without a model: ten questions for question prompts, else a score"""
+    name = "fake"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def complete(self, prompt, max_tokens):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if "interview questions" in prompt.lower():
+            text = "\n".join(f"Question {i}: describe your experience with topic {i}." for i in range(1, 11))
+        else:
+            text = str(1 + zlib.crc32(prompt.encode("utf-8")) % 10)
+        return Completion(text, {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4})
+
+# Model process side of LocalProvider
+_model = None
+
+def _load_model(model_path, threads, context):
+    global _model
+    from llama_cpp import Llama
+    _model = Llama(model_path=model_path, n_threads=threads, n_ctx=context, seed=0, verbose=False)
+
+def _ping():
+    return True
+
+def _complete_batch(requests):
+    """Answer (prompt, max_tokens) pairs with the loaded model; an error answers only its own request"""
+    results = []
+    for prompt, max_tokens in requests:
+        try:
+            response = _model.create_chat_completion(
+                messages=[{"role": "user", "content": prompt}], max_tokens=max_tokens, temperature=0
+            )
+            results.append((True, response["choices"][0]["message"]["content"] or "", response.get("usage") or {}))
+        except Exception as e:
+            results.append((False, str(e), None))
+    return results
+
+class LocalProvider:
+    name = "local"
+
+    def __init__(self, model_path=None, threads=LOCAL_MODEL_THREADS, context=LOCAL_MODEL_CONTEXT,
+                 batch_size=LOCAL_BATCH_SIZE, batch_wait_ms=LOCAL_BATCH_WAIT_MS, max_queue=LOCAL_MAX_QUEUE):
+        self.model_path = model_path or LOCAL_MODEL_PATH
+        if not self.model_path:
+            raise LLMError("LOCAL_MODEL_PATH is not set")
+        self.threads = threads
+        self.context = context
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._thread = None
+
+    def start(self):
+        """Start the model process and begin loading the model, without waiting for it"""
+        with self._lock:
+            if self._pool is None:
+                if self._thread is not None and self._thread.is_alive():
+                    # The batcher from before a shutdown is still finishing its batch
+                    self._thread.join(LOCAL_SHUTDOWN_SECONDS)
+                    if self._thread.is_alive():
+                        raise LLMError("The local model is still shutting down")
+                # Spawned, not forked, so the model process never inherits the server's threads or connections
+                self._pool = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_load_model, initargs=(self.model_path, self.threads, self.context),
+                )
+                self._pool.submit(_ping)
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue, self._pool), name="llm-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def complete(self, prompt, max_tokens):
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((prompt, max_tokens, future))
+        except queue.Full:
+            raise LLMError("The local model has too many requests waiting")
+        try:
+            return future.result(timeout=LLM_TIMEOUT_SECONDS)
+        except FutureTimeout:
+            future.cancel()  # the batcher skips it if it has not been sent yet
+            raise LLMError(f"The local model did not answer within {LLM_TIMEOUT_SECONDS:g} seconds")
+
+    def _next_batch(self, requests):
+        """Up to batch_size requests, and whether shutdown's stop marker came after them"""
+        first = requests.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                # Whatever queued up while the model was busy is taken at once
+                item = requests.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self, requests, pool):
+        stopped = False
+        while not stopped:
+            batch, stopped = self._next_batch(requests)
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = pool.submit(_complete_batch, [(prompt, max_tokens) for prompt, max_tokens, _ in batch]).result()
+            except Exception as e:
+                # The model failed to load or its process died
+                for *_, future in batch:
+                    future.set_exception(LLMError(f"The local model is unavailable: {e}"))
+                continue
+            for (*_, future), (ok, text, usage) in zip(batch, results):
+                if ok:
+                    future.set_result(Completion(text, usage))
+                else:
+                    future.set_exception(LLMError(text))
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is None:
+                return
+            pool, thread, requests = self._pool, self._thread, self._queue
+            self._pool = None
+        # Never block on a full queue: fail the requests still waiting until the stop marker fits
+        while True:
+            try:
+                requests.put_nowait(None)
+                break
+            except queue.Full:
+                pass
+            try:
+                _, _, future = requests.get_nowait()
+            except queue.Empty:
+                continue
+            if future.set_running_or_notify_cancel():
+                future.set_exception(LLMError("The local model is shutting down"))
+        pool.shutdown(wait=False, cancel_futures=True)
+        thread.join(LOCAL_SHUTDOWN_SECONDS)
+
+def create_provider(name=None):
+    name = name or LLM_PROVIDER
+    if not name:
+        name = "openai" if OPENAI_API_KEY else "local" if LOCAL_MODEL_PATH else "none"
+    if name == "openai":
+        return OpenAIProvider()
+    if name == "local":
+        return LocalProvider()
+    if name == "fake":
+        return FakeProvider()
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown LLM_PROVIDER {name!r}; use openai, local, fake or none")
+
+_provider = None
+_provider_ready = False
+_provider_lock = threading.Lock()
+
+def get_provider():
+    global _provider, _provider_ready
+    if not _provider_ready:
+        with _provider_lock:
+            if not _provider_ready:
+                _provider = create_provider()
+                _provider_ready = True
+    return _provider
+
+def set_provider(provider):
+    """Use this provider from now on, e.g. a FakeProvider in a benchmark"""
+    global _provider, _provider_ready
+    shutdown_provider()
+    with _provider_lock:
+        _provider, _provider_ready = provider, True
+    return provider
+
+def start_provider():
+    """Called at startup: a local model begins loading before the first request needs it"""
+    provider = get_provider()
+    if hasattr(provider, "start"):
+        provider.start()
+
+def shutdown_provider():
+    global _provider_ready
+    with _provider_lock:
+        if hasattr(_provider, "shutdown"):
+            _provider.shutdown()
+        _provider_ready = False
+
+def complete(operation, prompt, max_tokens):
+    """Send a prompt to the configured provider; raises LLMError when there is none"""
+    provider = get_provider()
+    if provider is None:
+        raise LLMError("No LLM provider is configured")
+    with LLM_LATENCY.time(operation=operation):
+        completion = provider.complete(prompt, max_tokens)
+    record_llm_usage(operation, completion)
+    return completion
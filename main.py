@@ -1,69 +1,117 @@
-from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Header, Request, Response, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from contextlib import asynccontextmanager
+from sqlalchemy import func, select, update, delete, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
 from typing import List, Optional
 import os
 from datetime import datetime, timedelta
 import hashlib
+import re
 import hmac
 import base64
 import json
-from passlib.context import CryptContext
-import openai
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
 import io
 import base64
-from PIL import Image
+import threading
+import uuid
+from functools import lru_cache
 
-from database import get_db, engine
-from models import Base, User, Job, Application, Notification
+from database import get_db, engine, SessionLocal
+from models import User, Job, Application, Notification, ScoringQueue, JobStats, DuplicateFlag, Interview, InterviewerAvailability
 from schemas import (
     UserCreate, UserLogin, JobCreate, JobUpdate, ApplicationCreate,
-    NotificationCreate, UserResponse, JobResponse, ApplicationResponse
+    NotificationCreate, UserResponse, JobResponse, ApplicationResponse, ApplicationImportReport,
+    InterviewPackRequest, JobWithStatsResponse, NotificationResponse, MessageResponse, RegisterResponse,
+    TokenResponse, ProfileResponse, ApplicationSubmitResponse, ShortlistResponse, DuplicateFlagResponse,
+    ApplicationMatchResponse, JobMatchResponse, JobRecommendationResponse, RefreshTokenRequest, RevokeResponse,
+    ParsedResumeResponse, AvailabilityCreate, AvailabilityResponse, InterviewCreate, InterviewResponse,
+    AutoScheduleRequest, AutoScheduleResponse, ArchivedApplicationResponse, ArchivedNotificationResponse,
+    ApplicationSummaryResponse, ProfileSummaryResponse, SlowQueryResponse
 )
+from assets import PrecompressedStaticFiles, index_page
+from metrics import (
+    REGISTRY, MetricsMiddleware, instrument_engine, LLM_FAILURES, LLM_FALLBACKS, OPERATION_LATENCY
+)
+from cache import job_list_cache, is_not_modified, cache_headers, make_etag
+from pdf_render import render_questions_pdf, shutdown_render_pool
+from interview_packs import build_interview_pack, snapshot, MAX_PACK_SIZE
+from exporters import export_applications, EXPORT_FORMATS
+from bulk_import import ApplicationImporter, detect_format, UNUSABLE_PASSWORD
+from skills import parse_skills, get_skill_ids, index_application_skills, index_job_skills, search_applications
+from bootstrap import load_secret_key, ensure_bootstrapped
+from resume_parser import resume_format, shutdown_parse_pool, ResumeParseError, MAX_RESUME_SIZE
+from resumes import parse_upload
+from refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_token, revoke_user_tokens, purge_expired
+from job_stats import create_job_stats, record_applications, record_status_change, record_score_change, stats_dict, is_scored
+from dedup import flag_duplicates
+from embeddings import index_job, index_application, top_candidates, similar_jobs
+from scheduling import (
+    SchedulingError, add_availability, availability, schedule_interview, cancel_interview, auto_schedule, interviews_between
+)
+from archive import get_archived_application, archived_applications_for, archived_notifications_for, archived_file
+from prompts import score_prompt, questions_prompt, store_job_summary
+from llm import complete, start_provider, shutdown_provider
+from admission import AdmissionMiddleware
+import profiling
+from profiling import ProfiledRoute, ProfilingMiddleware, run_in_threadpool, is_admin_token
+from recommendations import get_recommendations, invalidate_candidates, refresh_job, RECOMMENDATION_LIMIT, PAGE_SIZE
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+instrument_engine(engine)
+profiling.instrument_engine(engine)
 
-app = FastAPI(title="HR Assist AI", description="AI-powered HR recruitment platform")
+@asynccontextmanager
+async def lifespan(app):
+    # No-op under gunicorn, which bootstraps once in the master
+    ensure_bootstrapped()
+    # Read the landing page once instead of on every hit
+    index_page.load()
+    # A local model starts loading now rather than on the first scored application
+    start_provider()
+    # Pick up imported applications that a stopped or crashed worker left unscored
+    threading.Thread(target=score_pending_applications, name="scoring-drain", daemon=True).start()
+    yield
+    shutdown_render_pool()
+    shutdown_parse_pool()
+    shutdown_provider()
+
+# Sync endpoints run in the thread pool; ProfiledRoute lets a request's profile follow them there
+router = APIRouter(route_class=ProfiledRoute)
 
 # Security setup
-SECRET_KEY = "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-# OpenAI setup (add your API key in environment variable)
-openai.api_key = os.getenv("OPENAI_API_KEY", "your-openai-api-key")
+@lru_cache(maxsize=None)
+def get_secret_key():
+    """Read on the first token operation, after bootstrap has made sure the key exists"""
+    return load_secret_key().encode()
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Built on the first login or registration rather than at import"""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Create upload directory first
-os.makedirs("uploads", exist_ok=True)
-os.makedirs("static", exist_ok=True)
-
-# Static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password == UNUSABLE_PASSWORD:
+        return False
+    with OPERATION_LATENCY.time(operation="bcrypt_verify"):
+        return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    with OPERATION_LATENCY.time(operation="bcrypt_hash"):
+        return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -79,7 +127,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     payload_b64 = base64.urlsafe_b64encode(json.dumps(to_encode).encode()).decode().rstrip('=')
     
     signature = hmac.new(
-        SECRET_KEY.encode(),
+        get_secret_key(),
         f"{header_b64}.{payload_b64}".encode(),
         hashlib.sha256
     ).digest()
@@ -97,7 +145,7 @@ def verify_token(token: str):
         
         # Verify signature
         expected_signature = hmac.new(
-            SECRET_KEY.encode(),
+            get_secret_key(),
             f"{header_b64}.{payload_b64}".encode(),
             hashlib.sha256
         ).digest()
@@ -118,6 +166,12 @@ def verify_token(token: str):
     except Exception:
         return None
 
+def token_user_id(token):
+    """User id in a valid access token, else None; admission control limits each user by it"""
+    payload = verify_token(token)
+    # Tokens issued before the id was added carry none, and are limited by address until they expire
+    return payload.get("uid") if payload else None
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -142,12 +196,49 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     return user
 
 # Routes
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    with open("static/index.html", "r") as f:
-        return HTMLResponse(content=f.read(), status_code=200)
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Only admins can read profiles")
 
-@app.post("/api/register")
+@router.get("/api/admin/profiles", response_model=List[ProfileSummaryResponse], dependencies=[Depends(require_admin)])
+def get_profiles(limit: int = 50):
+    return profiling.list_profiles(limit=min(limit, profiling.PROFILE_KEEP))
+
+@router.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def get_request_profile(profile_id: str, format: str = "text"):
+    """format: text (call tree and SQL), collapsed (for flame graph tools) or json"""
+    document = profiling.load_profile(profile_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "json":
+        return JSONResponse(document)
+    if format == "collapsed":
+        return PlainTextResponse(profiling.render_collapsed(document), headers={
+            "Content-Disposition": f'attachment; filename="{profile_id}.collapsed.txt"'
+        })
+    if format == "text":
+        return PlainTextResponse(profiling.render_text(document))
+    raise HTTPException(status_code=400, detail="format must be text, collapsed or json")
+
+@router.get("/api/admin/slow-queries", response_model=List[SlowQueryResponse], dependencies=[Depends(require_admin)])
+def get_slow_queries():
+    """This worker's most recent statements slower than SLOW_QUERY_MS, newest first"""
+    return list(reversed(profiling.slow_queries))
+
+@router.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    page = index_page if index_page.body is not None else index_page.load()
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if page.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return HTMLResponse(content=page.gzip_body, status_code=200, headers=headers)
+    return HTMLResponse(content=page.body, status_code=200, headers=headers)
+
+@router.post("/api/register", response_model=RegisterResponse)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     # Check if user exists
     db_user = db.query(User).filter(User.username == user.username).first()
@@ -169,7 +260,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     
     return {"message": "User registered successfully", "user_id": db_user.id}
 
-@app.post("/api/login")
+@router.post("/api/login", response_model=TokenResponse)
 def login(user: UserLogin, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.username == user.username).first()
     if not db_user or not verify_password(user.password, db_user.hashed_password):
@@ -178,43 +269,178 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    purge_expired(db, db_user.id)
+    refresh_token = issue_refresh_token(db, db_user.id)
+    db.commit()
+    return token_response(db_user, refresh_token)
+
+def token_response(user, refresh_token):
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
     )
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user_type": db_user.user_type,
-        "user_id": db_user.id
+        "user_type": user.user_type,
+        "user_id": user.id,
+        "refresh_token": refresh_token,
+        "expires_in": int(access_token_expires.total_seconds())
     }
 
+@router.post("/api/token/refresh", response_model=TokenResponse)
+def refresh_access_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token and refresh token, without a password check"""
+    rotated = rotate_refresh_token(db, request.refresh_token)
+    # Commit even on failure: reusing a spent token revokes its family
+    db.commit()
+    user = db.query(User).filter(User.id == rotated[0]).first() if rotated else None
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_response(user, rotated[1])
+
+@router.post("/api/logout", response_model=MessageResponse)
+def logout(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    revoke_token(db, request.refresh_token)
+    db.commit()
+    return {"message": "Logged out successfully"}
+
+@router.post("/api/token/revoke-all", response_model=RevokeResponse)
+def revoke_all_tokens(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Sign out every session of the current user; access tokens already issued run out on their own"""
+    revoked = revoke_user_tokens(db, current_user.id)
+    db.commit()
+    return {"revoked": revoked}
+
 # Job management routes
-@app.post("/api/jobs", response_model=JobResponse)
-def create_job(job: JobCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.post("/api/jobs", response_model=JobResponse)
+def create_job(
+    job: JobCreate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     if current_user.user_type != "hr":
         raise HTTPException(status_code=403, detail="Only HR can create jobs")
     
-    db_job = Job(**job.dict(), created_by=current_user.id)
+    db_job = Job(**job.model_dump(), created_by=current_user.id)
     db.add(db_job)
+    db.flush()
+    index_job_skills(db, db_job.id, get_skill_ids(db, parse_skills(db_job.skills)))
+    create_job_stats(db, db_job.id)
+    store_job_summary(db, db_job)
     db.commit()
+    job_list_cache.invalidate()
     db.refresh(db_job)
+    index_job(db_job)
+    background_tasks.add_task(refresh_job, db_job.id)
     return db_job
 
-@app.get("/api/jobs", response_model=List[JobResponse])
-def get_jobs(db: Session = Depends(get_db)):
+job_adapter = TypeAdapter(JobResponse)
+job_list_adapter = TypeAdapter(List[JobResponse])
+job_stats_list_adapter = TypeAdapter(List[JobWithStatsResponse])
+application_adapter = TypeAdapter(ApplicationResponse)
+recommendation_list_adapter = TypeAdapter(List[JobRecommendationResponse])
+
+def load_active_jobs(db):
+    """Serialize the public job board once per cache version"""
     jobs = db.query(Job).filter(Job.is_active == True).all()
-    return jobs
+    # Newest change over all jobs, so closing a job still moves Last-Modified forward
+    last_modified = db.query(func.max(Job.updated_at)).scalar()
+    items = {job.id: job_adapter.dump_json(job) for job in jobs}
+    body = b"[" + b",".join(items.values()) + b"]"
+    return body, items, last_modified
 
-@app.get("/api/jobs/{job_id}")
-def get_job(job_id: int, db: Session = Depends(get_db)):
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    return job
+def load_jobs_with_stats(db):
+    """Active jobs with their application stats: one row per job, no scan of applications"""
+    rows = (
+        db.query(Job, JobStats)
+        .outerjoin(JobStats, JobStats.job_id == Job.id)
+        .filter(Job.is_active == True)
+        .all()
+    )
+    return job_stats_list_adapter.dump_json([
+        JobWithStatsResponse(**job_adapter.dump_python(job), stats=stats_dict(stats)) for job, stats in rows
+    ])
+
+@router.get("/api/jobs", response_model=List[JobWithStatsResponse])
+def get_jobs(
+    request: Request,
+    include: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+):
+    if include == "stats":
+        # Applicant numbers are for HR only and must never reach the shared caches
+        if credentials is None:
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+        if get_current_user(credentials, db).user_type != "hr":
+            raise HTTPException(status_code=403, detail="Only HR can view job statistics")
+        return Response(
+            content=load_jobs_with_stats(db), media_type="application/json", headers={"Cache-Control": "private, no-store"}
+        )
+    
+    entry = job_list_cache.get(lambda: load_active_jobs(db))
+    headers = cache_headers(entry.etag, entry.last_modified)
+    if is_not_modified(request, entry.etag, entry.last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
-@app.put("/api/jobs/{job_id}")
-def update_job(job_id: int, job_update: JobUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+# Declared before /api/jobs/{job_id}, which would otherwise try to parse "recommended" as an id
+@router.get("/api/jobs/recommended", response_model=List[JobRecommendationResponse])
+def get_recommended_jobs(
+    limit: int = PAGE_SIZE,
+    offset: int = 0,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Open jobs ranked for the current candidate from their past applications"""
+    if current_user.user_type != "candidate":
+        raise HTTPException(status_code=403, detail="Only candidates get job recommendations")
+    
+    limit = max(min(limit, PAGE_SIZE), 0)
+    offset = max(min(offset, RECOMMENDATION_LIMIT), 0)
+    rows = get_recommendations(db, current_user.id, limit=limit, offset=offset)
+    if rows is None:
+        # Nothing to go on before a first application: the newest postings
+        jobs = db.query(Job).filter(Job.is_active == True).order_by(Job.created_at.desc(), Job.id.desc())
+        rows = [(job, None) for job in jobs.offset(offset).limit(limit)]
+    items = [JobRecommendationResponse(**job_adapter.dump_python(job), score=score) for job, score in rows]
+    return Response(
+        content=recommendation_list_adapter.dump_json(items),
+        media_type="application/json",
+        headers={"Cache-Control": "private, no-store"},
+    )
+
+@router.get("/api/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: int, request: Request, db: Session = Depends(get_db)):
+    entry = job_list_cache.get(lambda: load_active_jobs(db))
+    body = entry.items.get(job_id)
+    if body is None:
+        # Inactive jobs are not on the board, look them up directly
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        body = job_adapter.dump_json(job)
+
+    etag = make_etag(body)
+    headers = cache_headers(etag)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.put("/api/jobs/{job_id}", response_model=JobResponse)
+def update_job(
+    job_id: int,
+    job_update: JobUpdate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     if current_user.user_type != "hr":
         raise HTTPException(status_code=403, detail="Only HR can update jobs")
     
@@ -222,15 +448,28 @@ def update_job(job_id: int, job_update: JobUpdate, current_user: User = Depends(
     if not db_job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    for key, value in job_update.dict(exclude_unset=True).items():
+    update_data = job_update.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
         setattr(db_job, key, value)
+    if "skills" in update_data:
+        index_job_skills(db, db_job.id, get_skill_ids(db, parse_skills(db_job.skills)))
+    store_job_summary(db, db_job)
     
     db.commit()
+    job_list_cache.invalidate()
     db.refresh(db_job)
+    if {"title", "description", "skills"} & update_data.keys():
+        index_job(db_job)
+    background_tasks.add_task(refresh_job, db_job.id)
     return db_job
 
-@app.delete("/api/jobs/{job_id}")
-def delete_job(job_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.delete("/api/jobs/{job_id}", response_model=MessageResponse)
+def delete_job(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     if current_user.user_type != "hr":
         raise HTTPException(status_code=403, detail="Only HR can delete jobs")
     
@@ -240,10 +479,37 @@ def delete_job(job_id: int, current_user: User = Depends(get_current_user), db:
     
     db_job.is_active = False
     db.commit()
+    job_list_cache.invalidate()
+    background_tasks.add_task(refresh_job, job_id)
     return {"message": "Job deleted successfully"}
 
 # Application routes
-@app.post("/api/applications")
+
+@router.post("/api/resumes/parse", response_model=ParsedResumeResponse)
+def parse_resume_upload(
+    resume: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Read a DOCX or PDF resume and return the application fields it fills in"""
+    file_format = resume_format(resume.filename)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="Resume must be a .docx or .pdf file")
+    # A sync route: the cache lookups and the wait on the parse pool run on a worker thread, not the event loop
+    data = resume.file.read(MAX_RESUME_SIZE + 1)
+    if len(data) > MAX_RESUME_SIZE:
+        raise HTTPException(status_code=413, detail=f"Resume must be under {MAX_RESUME_SIZE // (1024 * 1024)} MB")
+    
+    try:
+        fields, cached = parse_upload(db, data, file_format)
+    except ResumeParseError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {**fields, "cached": cached}
+
+# Inputs to calculate_ai_score; a resubmission that leaves them unchanged keeps its score
+SCORED_FIELDS = ("experience_years", "relevant_experience", "skills", "education", "projects")
+
+@router.post("/api/applications", response_model=ApplicationSubmitResponse)
 async def create_application(
     job_id: int = Form(...),
     name: str = Form(...),
@@ -263,50 +529,118 @@ async def create_application(
     if current_user.user_type != "candidate":
         raise HTTPException(status_code=403, detail="Only candidates can apply")
     
-    # Save photo
-    photo_filename = f"{current_user.id}_{job_id}_{photo.filename}"
-    photo_path = f"uploads/{photo_filename}"
-    with open(photo_path, "wb") as buffer:
-        content = await photo.read()
-        buffer.write(content)
-    
-    # Calculate AI matching score
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    ai_score = calculate_ai_score(job, {
+    # Save photo under a name derived from its content, so resubmitting the same photo skips the write
+    content = await photo.read()
+    extension = re.sub(r"[^a-z0-9.]", "", os.path.splitext(photo.filename or "")[1].lower())[:10]
+    photo_path = f"uploads/{current_user.id}_{job_id}_{hashlib.sha256(content).hexdigest()[:16]}{extension}"
+    if not os.path.exists(photo_path):
+        with OPERATION_LATENCY.time(operation="photo_write"):
+            with open(photo_path, "wb") as buffer:
+                buffer.write(content)
+    
+    fields = {
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "address": address,
         "experience_years": experience_years,
         "relevant_experience": relevant_experience,
         "skills": skills,
         "education": education,
-        "projects": projects
-    })
-    
-    db_application = Application(
-        job_id=job_id,
-        candidate_id=current_user.id,
-        name=name,
-        email=email,
-        phone=phone,
-        address=address,
-        experience_years=experience_years,
-        relevant_experience=relevant_experience,
-        skills=skills,
-        education=education,
-        projects=projects,
-        preferred_location=preferred_location,
-        photo_path=photo_path,
-        ai_score=ai_score
-    )
+        "projects": projects,
+        "preferred_location": preferred_location,
+        "photo_path": photo_path,
+    }
     
-    db.add(db_application)
+    # A candidate has one application per job; applying again updates it. If a
+    # concurrent submission inserts first, the second attempt updates that row.
+    replaced_photo = None
+    for attempt in range(2):
+        existing = db.query(Application).filter(
+            Application.job_id == job_id, Application.candidate_id == current_user.id
+        ).first()
+        
+        # Calculate AI matching score, unless a resubmission left the scored fields unchanged
+        skill_ids = get_skill_ids(db, parse_skills(skills))
+        if existing is not None and is_scored(existing.ai_score) and all(
+            getattr(existing, key) == fields[key] for key in SCORED_FIELDS
+        ):
+            ai_score = existing.ai_score
+        else:
+            # The LLM call blocks, so it runs on a worker thread rather than stalling the event loop
+            ai_score = await run_in_threadpool(calculate_ai_score, job, {
+                "experience_years": experience_years,
+                "relevant_experience": relevant_experience,
+                "skills": skills,
+                "skill_ids": skill_ids,
+                "education": education,
+                "projects": projects
+            })
+        
+        if existing is None:
+            db_application = Application(job_id=job_id, candidate_id=current_user.id, ai_score=ai_score, **fields)
+            db.add(db_application)
+            try:
+                db.flush()
+            except IntegrityError:
+                db.rollback()
+                continue
+            record_applications(db, job_id, [ai_score], db_application.created_at)
+            message = "Application submitted successfully"
+        else:
+            db_application = existing
+            old_score, old_photo = existing.ai_score, existing.photo_path
+            for key, value in fields.items():
+                setattr(existing, key, value)
+            existing.ai_score = ai_score
+            db.flush()
+            record_score_change(db, job_id, old_score, ai_score)
+            if old_photo and old_photo != photo_path:
+                replaced_photo = old_photo
+            message = "Application updated successfully"
+        break
+    else:
+        raise HTTPException(status_code=409, detail="Application was changed concurrently, please retry")
+    
+    index_application_skills(db, db_application.id, skill_ids)
+    flag_duplicates(db, db_application)
+    invalidate_candidates(db, [current_user.id])
     db.commit()
+    # Only once the row points at the new photo
+    if replaced_photo and os.path.exists(replaced_photo):
+        os.remove(replaced_photo)
     db.refresh(db_application)
+    index_application(db_application)
+    
+    return {"message": message, "ai_score": ai_score}
+
+@router.post("/api/applications/import", response_model=ApplicationImportReport)
+def import_applications(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    job_id: Optional[int] = None,
+    format: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can import applications")
     
-    return {"message": "Application submitted successfully", "ai_score": ai_score}
+    file_format = detect_format(file.filename, format)
+    if file_format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="Format must be csv or jsonl")
+    
+    # The upload is spooled to disk by the multipart parser and read row by row
+    report = ApplicationImporter(db, default_job_id=job_id).run(file.file, file_format)
+    if report.imported:
+        background_tasks.add_task(score_pending_applications)
+    return report.as_dict()
 
-@app.get("/api/jobs/{job_id}/applications")
+@router.get("/api/jobs/{job_id}/applications", response_model=List[ApplicationResponse])
 def get_job_applications(job_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.user_type != "hr":
         raise HTTPException(status_code=403, detail="Only HR can view applications")
@@ -314,7 +648,91 @@ def get_job_applications(job_id: int, current_user: User = Depends(get_current_u
     applications = db.query(Application).filter(Application.job_id == job_id).all()
     return applications
 
-@app.post("/api/applications/{application_id}/shortlist")
+# Only the columns the summary shows, so the free text is neither read nor decompressed
+SUMMARY_COLUMNS = [getattr(Application, name) for name in ApplicationSummaryResponse.model_fields]
+
+@router.get("/api/jobs/{job_id}/applications/summary", response_model=List[ApplicationSummaryResponse])
+def get_job_application_summaries(job_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can view applications")
+    
+    return db.query(*SUMMARY_COLUMNS).filter(Application.job_id == job_id).order_by(Application.id).all()
+
+@router.get("/api/jobs/{job_id}/duplicates", response_model=List[DuplicateFlagResponse])
+def get_job_duplicates(job_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can view applications")
+    
+    return db.query(DuplicateFlag).filter(DuplicateFlag.job_id == job_id).order_by(DuplicateFlag.application_id).all()
+
+@router.get("/api/jobs/{job_id}/matches", response_model=List[ApplicationMatchResponse])
+def get_job_matches(job_id: int, limit: int = 20, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Applicants ranked by how close their profile is to the job text, with no LLM call"""
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can view applications")
+    
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    matches = top_candidates(db, job, limit=min(limit, 500))
+    applications = {a.id: a for a in db.query(Application).filter(Application.id.in_([i for i, _ in matches]))}
+    return [
+        ApplicationMatchResponse(**application_adapter.dump_python(applications[i]), similarity=similarity)
+        for i, similarity in matches
+    ]
+
+@router.get("/api/jobs/{job_id}/applications/export", response_class=StreamingResponse)
+def export_job_applications(
+    job_id: int,
+    format: str = "csv",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can export applications")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Format must be one of: " + ", ".join(EXPORT_FORMATS))
+    
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    filename = f"job_{job_id}_applications.{format}"
+    return StreamingResponse(
+        export_applications(job_id, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/api/candidates/search", response_model=List[ApplicationResponse])
+def search_candidates(
+    skills: str,
+    min_experience: Optional[int] = None,
+    job_id: Optional[int] = None,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can search candidates")
+    
+    return search_applications(
+        db, skills.split(","), min_experience=min_experience, job_id=job_id, limit=min(limit, 500)
+    )
+
+@router.get("/api/applications/{application_id}/similar-jobs", response_model=List[JobMatchResponse])
+def get_similar_jobs(application_id: int, limit: int = 10, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Open jobs closest to an application that its candidate has not applied to yet"""
+    application = db.query(Application).filter(Application.id == application_id).first()
+    if not application or (current_user.user_type != "hr" and application.candidate_id != current_user.id):
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    matches = similar_jobs(db, application, limit=min(limit, 100))
+    jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_([i for i, _ in matches]))}
+    return [JobMatchResponse(**job_adapter.dump_python(jobs[i]), similarity=similarity) for i, similarity in matches]
+
+@router.post("/api/applications/{application_id}/shortlist", response_model=ShortlistResponse)
 def shortlist_candidate(application_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.user_type != "hr":
         raise HTTPException(status_code=403, detail="Only HR can shortlist candidates")
@@ -323,6 +741,7 @@ def shortlist_candidate(application_id: int, current_user: User = Depends(get_cu
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
+    record_status_change(db, application.job_id, application.status, "shortlisted")
     application.status = "shortlisted"
     db.commit()
     
@@ -342,7 +761,7 @@ def shortlist_candidate(application_id: int, current_user: User = Depends(get_cu
     
     return {"message": "Candidate shortlisted successfully", "questions": questions}
 
-@app.get("/api/applications/{application_id}/questions/pdf")
+@router.get("/api/applications/{application_id}/questions/pdf", response_class=FileResponse)
 def download_questions_pdf(application_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.user_type != "hr":
         raise HTTPException(status_code=403, detail="Only HR can download questions")
@@ -355,40 +774,225 @@ def download_questions_pdf(application_id: int, current_user: User = Depends(get
     questions = generate_interview_questions(job, application)
     
     # Generate PDF
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    
-    # PDF content
-    p.drawString(100, 750, f"Interview Questions - {job.title}")
-    p.drawString(100, 730, f"Candidate: {application.name}")
-    p.drawString(100, 710, "-" * 50)
-    
-    y_position = 680
-    for i, question in enumerate(questions, 1):
-        p.drawString(100, y_position, f"{i}. {question}")
-        y_position -= 30
-        if y_position < 100:
-            p.showPage()
-            y_position = 750
-    
-    p.save()
-    buffer.seek(0)
+    with OPERATION_LATENCY.time(operation="pdf_render"):
+        pdf_bytes = render_questions_pdf(job.title, application.name, questions)
     
     # Save to file
     pdf_filename = f"interview_questions_{application_id}.pdf"
     pdf_path = f"uploads/{pdf_filename}"
-    with open(pdf_path, "wb") as f:
-        f.write(buffer.getvalue())
+    with OPERATION_LATENCY.time(operation="pdf_write"):
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
     
     return FileResponse(pdf_path, filename=pdf_filename)
 
+@router.post("/api/interview-packs", response_class=StreamingResponse)
+def download_interview_pack(pack: InterviewPackRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can download questions")
+    
+    query = db.query(Application)
+    if pack.application_ids:
+        query = query.filter(Application.id.in_(pack.application_ids))
+        filename = "interview_pack.zip"
+    elif pack.job_id is not None:
+        query = query.filter(Application.job_id == pack.job_id, Application.status == "shortlisted")
+        filename = f"interview_pack_job_{pack.job_id}.zip"
+    else:
+        raise HTTPException(status_code=400, detail="Provide job_id or application_ids")
+    
+    applications = query.order_by(Application.id).limit(MAX_PACK_SIZE + 1).all()
+    if not applications:
+        raise HTTPException(status_code=404, detail="No matching applications")
+    if len(applications) > MAX_PACK_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PACK_SIZE} applications per pack")
+    
+    jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_({a.job_id for a in applications}))}
+    items = [snapshot(jobs[application.job_id], application) for application in applications]
+    return StreamingResponse(
+        build_interview_pack(items, generate_interview_questions),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Interview scheduling routes
+def get_interviewer(db, interviewer_id, current_user):
+    if interviewer_id is None or interviewer_id == current_user.id:
+        return current_user
+    interviewer = db.query(User).filter(User.id == interviewer_id, User.user_type == "hr").first()
+    if not interviewer:
+        raise HTTPException(status_code=404, detail="Interviewer not found")
+    return interviewer
+
+@router.post("/api/availability", response_model=AvailabilityResponse)
+def create_availability(window: AvailabilityCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can manage availability")
+    
+    interviewer = get_interviewer(db, window.interviewer_id, current_user)
+    try:
+        created = add_availability(db, interviewer.id, window.start_at, window.end_at)
+    except SchedulingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    return created
+
+@router.get("/api/availability", response_model=List[AvailabilityResponse])
+def get_availability(
+    start: datetime,
+    end: datetime,
+    interviewer_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can manage availability")
+    
+    interviewer = get_interviewer(db, interviewer_id, current_user)
+    return availability(db, [interviewer.id], start, end)
+
+@router.delete("/api/availability/{availability_id}", response_model=MessageResponse)
+def delete_availability(availability_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can manage availability")
+    
+    window = db.query(InterviewerAvailability).filter(InterviewerAvailability.id == availability_id).first()
+    if not window:
+        raise HTTPException(status_code=404, detail="Availability not found")
+    db.delete(window)
+    db.commit()
+    return {"message": "Availability removed"}
+
+@router.post("/api/applications/{application_id}/interview", response_model=InterviewResponse)
+def create_interview(
+    application_id: int,
+    interview: InterviewCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Book an interview for an application; booking again reschedules it"""
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can schedule interviews")
+    
+    application = db.query(Application).filter(Application.id == application_id).first()
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    interviewer = get_interviewer(db, interview.interviewer_id, current_user)
+    job = db.query(Job).filter(Job.id == application.job_id).first()
+    
+    try:
+        booked = schedule_interview(
+            db, application, job.title, interviewer.id, interview.start_at,
+            duration_minutes=interview.duration_minutes, meeting_link=interview.meeting_link
+        )
+    except SchedulingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if booked is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="The interviewer or the candidate already has an interview at that time")
+    db.commit()
+    return booked
+
+@router.post("/api/jobs/{job_id}/interviews/auto-schedule", response_model=AutoScheduleResponse)
+def auto_schedule_interviews(
+    job_id: int,
+    request: AutoScheduleRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Put every shortlisted applicant without an interview into the interviewers' free slots"""
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can schedule interviews")
+    
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    interviewer_ids = [get_interviewer(db, i, current_user).id for i in request.interviewer_ids or [None]]
+    
+    try:
+        with OPERATION_LATENCY.time(operation="auto_schedule"):
+            booked, unscheduled = auto_schedule(
+                db, job, interviewer_ids, request.start_at, request.end_at,
+                duration_minutes=request.duration_minutes, buffer_minutes=request.buffer_minutes,
+                meeting_link=request.meeting_link
+            )
+    except SchedulingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    return {"scheduled": booked, "unscheduled": unscheduled}
+
+@router.get("/api/interviews", response_model=List[InterviewResponse])
+def get_interviews(
+    start: datetime,
+    end: datetime,
+    interviewer_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Scheduled interviews overlapping [start, end): an interviewer's for HR, a candidate's own otherwise"""
+    if current_user.user_type == "hr":
+        return interviews_between(db, start, end, interviewer_id=get_interviewer(db, interviewer_id, current_user).id)
+    return interviews_between(db, start, end, candidate_id=current_user.id)
+
+@router.post("/api/interviews/{interview_id}/cancel", response_model=MessageResponse)
+def cancel_interview_route(interview_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can schedule interviews")
+    
+    interview = db.query(Interview).filter(Interview.id == interview_id, Interview.status == "scheduled").first()
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    application = db.query(Application).filter(Application.id == interview.application_id).first()
+    job = db.query(Job).filter(Job.id == application.job_id).first()
+    cancel_interview(db, interview, job.title)
+    db.commit()
+    return {"message": "Interview cancelled"}
+
+# Archive routes: the slow path, reading documents back from the archive database
+@router.get("/api/archive/jobs/{job_id}/applications", response_model=List[ArchivedApplicationResponse])
+def get_archived_job_applications(
+    job_id: int,
+    limit: int = 50,
+    offset: int = 0,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.user_type != "hr":
+        raise HTTPException(status_code=403, detail="Only HR can view applications")
+    
+    return archived_applications_for(job_id=job_id, limit=min(limit, 200), offset=offset)
+
+@router.get("/api/archive/applications", response_model=List[ArchivedApplicationResponse])
+def get_my_archived_applications(limit: int = 50, offset: int = 0, current_user: User = Depends(get_current_user)):
+    return archived_applications_for(candidate_id=current_user.id, limit=min(limit, 200), offset=offset)
+
+def load_archived_application(application_id, current_user):
+    application = get_archived_application(application_id)
+    if not application or (current_user.user_type != "hr" and application["candidate_id"] != current_user.id):
+        raise HTTPException(status_code=404, detail="Archived application not found")
+    return application
+
+@router.get("/api/archive/applications/{application_id}", response_model=ArchivedApplicationResponse)
+def get_archived_application_route(application_id: int, current_user: User = Depends(get_current_user)):
+    return load_archived_application(application_id, current_user)
+
+@router.get("/api/archive/applications/{application_id}/photo", response_class=FileResponse)
+def get_archived_photo(application_id: int, current_user: User = Depends(get_current_user)):
+    path = archived_file(load_archived_application(application_id, current_user).get("photo_path"))
+    if not path:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    return FileResponse(path)
+
+@router.get("/api/archive/notifications", response_model=List[ArchivedNotificationResponse])
+def get_archived_notifications(limit: int = 50, offset: int = 0, current_user: User = Depends(get_current_user)):
+    return archived_notifications_for(current_user.id, limit=min(limit, 200), offset=offset)
+
 # Notification routes
-@app.get("/api/notifications")
+@router.get("/api/notifications", response_model=List[NotificationResponse])
 def get_notifications(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     notifications = db.query(Notification).filter(Notification.user_id == current_user.id).order_by(Notification.created_at.desc()).all()
     return notifications
 
-@app.put("/api/notifications/{notification_id}/read")
+@router.put("/api/notifications/{notification_id}/read", response_model=MessageResponse)
 def mark_notification_read(notification_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     notification = db.query(Notification).filter(
         Notification.id == notification_id,
@@ -403,17 +1007,11 @@ def mark_notification_read(notification_id: int, current_user: User = Depends(ge
     return {"message": "Notification marked as read"}
 
 # User profile routes
-@app.get("/api/profile")
+@router.get("/api/profile", response_model=ProfileResponse)
 def get_profile(current_user: User = Depends(get_current_user)):
-    return {
-        "id": current_user.id,
-        "username": current_user.username,
-        "email": current_user.email,
-        "full_name": current_user.full_name,
-        "user_type": current_user.user_type
-    }
+    return current_user
 
-@app.put("/api/profile")
+@router.put("/api/profile", response_model=MessageResponse)
 def update_profile(
     email: str = Form(None),
     phone: str = Form(None),
@@ -435,36 +1033,82 @@ def update_profile(
 def calculate_ai_score(job, candidate_data):
     """Calculate AI matching score based on job requirements and candidate data"""
     try:
-        prompt = f"""
-        Job Requirements:
-        - Title: {job.title}
-        - Required Experience: {job.experience_years} years
-        - Skills: {job.skills}
-        - Description: {job.description}
-        
-        Candidate Profile:
-        - Experience: {candidate_data['experience_years']} years
-        - Relevant Experience: {candidate_data['relevant_experience']}
-        - Skills: {candidate_data['skills']}
-        - Education: {candidate_data['education']}
-        - Projects: {candidate_data['projects']}
-        
-        Rate this candidate's fit for the job on a scale of 1-10. Consider experience match, skill alignment, and overall suitability. Return only the number.
-        """
+        prompt = score_prompt(job, candidate_data)
+        completion = complete("score", prompt.text, max_tokens=10)
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=10
-        )
-        
-        score = float(response.choices[0].message.content.strip())
+        # Small local models tend to wrap the number in words
+        score = float(re.search(r"\d+(?:\.\d+)?", completion.text).group())
         return min(max(score, 1), 10)  # Ensure score is between 1-10
         
     except Exception as e:
         # Fallback scoring logic
+        LLM_FAILURES.inc(operation="score")
+        LLM_FALLBACKS.inc(operation="score")
         return calculate_fallback_score(job, candidate_data)
 
+scoring_lock = threading.Lock()
+# How long a drain owns the rows it claimed; a batch must be scored well within it
+SCORING_CLAIM_SECONDS = 600
+
+def claim_scoring_batch(db, claimant, batch_size):
+    """Claim up to batch_size queued applications that nobody holds, in one UPDATE; returns their ids"""
+    now = datetime.utcnow()
+    available = (
+        select(ScoringQueue.application_id)
+        .where(or_(ScoringQueue.claimed_until == None, ScoringQueue.claimed_until < now))
+        .order_by(ScoringQueue.enqueued_at, ScoringQueue.application_id)
+        .limit(batch_size)
+    )
+    db.execute(
+        update(ScoringQueue)
+        .where(ScoringQueue.application_id.in_(available))
+        .values(claimed_by=claimant, claimed_until=now + timedelta(seconds=SCORING_CLAIM_SECONDS))
+    )
+    db.commit()
+    return db.scalars(select(ScoringQueue.application_id).where(ScoringQueue.claimed_by == claimant)).all()
+
+def score_pending_applications(batch_size=10):
+    """Score queued applications in batches; runs as a background task and when a worker starts.
+
+    Workers claim rows before scoring them, so two never score the same
+    application, and rows claimed by a worker that died are claimed again
+    once the claim runs out.
+    """
+    if not scoring_lock.acquire(blocking=False):
+        return  # another task in this process is already draining the queue
+    claimant = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        while True:
+            claimed = claim_scoring_batch(db, claimant, batch_size)
+            if not claimed:
+                break
+            scores = {}
+            for application in db.query(Application).filter(Application.id.in_(claimed)):
+                scores[application.id] = (application.job_id, calculate_ai_score(application.job, {
+                    "experience_years": application.experience_years,
+                    "relevant_experience": application.relevant_experience,
+                    "skills": application.skills,
+                    "skill_ids": {skill.id for skill in application.indexed_skills},
+                    "education": application.education,
+                    "projects": application.projects
+                }))
+            db.rollback()  # end the read transaction before writing
+            for application_id in claimed:
+                # Only a row still ours is scored, so job stats count each score once
+                released = db.execute(delete(ScoringQueue).where(
+                    ScoringQueue.application_id == application_id, ScoringQueue.claimed_by == claimant
+                ))
+                if released.rowcount and application_id in scores:
+                    job_id, new_score = scores[application_id]
+                    old_score = db.scalar(select(Application.ai_score).where(Application.id == application_id))
+                    db.execute(update(Application).where(Application.id == application_id).values(ai_score=new_score))
+                    record_score_change(db, job_id, old_score, new_score)
+            db.commit()
+    finally:
+        db.close()
+        scoring_lock.release()
+
 def calculate_fallback_score(job, candidate_data):
     """Fallback scoring when OpenAI is not available"""
     score = 5  # Base score
@@ -475,16 +1119,24 @@ def calculate_fallback_score(job, candidate_data):
     elif candidate_data['experience_years'] >= job.experience_years * 0.7:
         score += 1
     
-    # Skill matching (simple keyword matching)
-    job_skills = job.skills.lower().split(',')
-    candidate_skills = candidate_data['skills'].lower().split(',')
-    
-    skill_matches = 0
-    for job_skill in job_skills:
-        for candidate_skill in candidate_skills:
-            if job_skill.strip() in candidate_skill.strip():
-                skill_matches += 1
-                break
+    # Skill matching
+    job_skill_ids = {skill.id for skill in job.indexed_skills}
+    candidate_skill_ids = candidate_data.get('skill_ids')
+    if job_skill_ids and candidate_skill_ids is not None:
+        # Both sides are in the skill index: integer set intersection
+        job_skills = job_skill_ids
+        skill_matches = len(job_skill_ids & candidate_skill_ids)
+    else:
+        # Simple keyword matching for rows that were never indexed
+        job_skills = job.skills.lower().split(',')
+        candidate_skills = candidate_data['skills'].lower().split(',')
+        
+        skill_matches = 0
+        for job_skill in job_skills:
+            for candidate_skill in candidate_skills:
+                if job_skill.strip() in candidate_skill.strip():
+                    skill_matches += 1
+                    break
     
     if skill_matches >= len(job_skills) * 0.8:
         score += 2
@@ -496,33 +1148,16 @@ def calculate_fallback_score(job, candidate_data):
 def generate_interview_questions(job, application):
     """Generate interview questions using AI"""
     try:
-        prompt = f"""
-        Generate 10 interview questions for the following job and candidate:
-        
-        Job: {job.title}
-        Job Description: {job.description}
-        Required Skills: {job.skills}
-        Experience Required: {job.experience_years} years
-        
-        Candidate Skills: {application.skills}
-        Candidate Experience: {application.experience_years} years
-        Candidate Projects: {application.projects}
+        prompt = questions_prompt(job, application)
+        completion = complete("interview_questions", prompt.text, max_tokens=500)
         
-        Generate 10 relevant interview questions that test both technical skills and cultural fit.
-        Return each question on a new line.
-        """
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500
-        )
-        
-        questions = response.choices[0].message.content.strip().split('\n')
+        questions = completion.text.strip().split('\n')
         return [q.strip() for q in questions if q.strip()]
         
     except Exception as e:
         # Fallback questions
+        LLM_FAILURES.inc(operation="interview_questions")
+        LLM_FALLBACKS.inc(operation="interview_questions")
         return [
             "Tell me about yourself and your relevant experience.",
             "Why are you interested in this position?",
@@ -536,6 +1171,40 @@ def generate_interview_questions(job, application):
             "Do you have any questions for us?"
         ]
 
+def create_app():
+    """Build the ASGI app; each gunicorn worker imports main and gets its own"""
+    app = FastAPI(title="HR Assist AI", description="AI-powered HR recruitment platform", lifespan=lifespan)
+    
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Compress JSON and HTML responses; precompressed static files pass through untouched
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    
+    # Profiles requests that ask for it, or a sample of them
+    app.add_middleware(ProfilingMiddleware)
+    
+    # Expensive routes wait for a slot or are refused here, before their body is read
+    app.add_middleware(AdmissionMiddleware, routes=router.routes, engine=engine, identify=token_user_id)
+    
+    # Outermost, so latency includes compression and every other middleware
+    app.add_middleware(MetricsMiddleware)
+    
+    # Static files; the directories are created by bootstrap, which may run after this
+    app.mount("/static", PrecompressedStaticFiles(directory="static", check_dir=False), name="static")
+    app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
+    
+    app.include_router(router)
+    return app
+
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,245 @@
+"""Prometheus-style metrics kept in process memory.
+
+Exposed at /metrics in the text exposition format, so any Prometheus
+compatible scraper can collect it without an extra client library.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket (non cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# HTTP
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"])
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+
+# Database
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ["operation"])
+DB_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+# LLM
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "LLM call latency", ["operation"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ["operation", "kind"])
+LLM_FAILURES = Counter("llm_failures_total", "LLM calls that raised or returned unusable output", ["operation"])
+LLM_FALLBACKS = Counter("llm_fallbacks_total", "Results served by the local fallback instead of the LLM", ["operation"])
+LLM_PROMPT_TOKENS = Histogram(
+    "llm_prompt_tokens", "Prompt size counted locally before each LLM call", ["operation"],
+    buckets=(50, 100, 200, 300, 400, 600, 800, 1200, 1600, 3200),
+)
+
+# Admission control (admission.py)
+ADMISSION_ACTIVE = Gauge("admission_active_requests", "Expensive requests holding a slot", ["route_class"])
+ADMISSION_WAITING = Gauge("admission_waiting_requests", "Expensive requests queued for a slot", ["route_class"])
+ADMISSION_WAIT = Histogram("admission_wait_seconds", "Time queued requests waited for a slot", ["route_class"])
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests refused before running: queue_full, wait_timeout, user_rate or ip_rate",
+    ["route_class", "reason"],
+)
+RATE_LIMIT_ERRORS = Counter("rate_limit_store_errors_total", "Rate limit checks skipped because the database failed", ["route_class"])
+
+# Profiling (profiling.py)
+PROFILES_SAVED = Counter("profiles_saved_total", "Request profiles written to PROFILE_DIR", ["trigger"])
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS", ["operation"])
+
+# CPU and disk heavy steps inside requests (bcrypt, PDF rendering, uploads)
+OPERATION_LATENCY = Histogram("operation_duration_seconds", "Latency of expensive in-request operations", ["operation"])
+
+def record_llm_usage(operation, response):
+    """Count prompt/completion tokens when the provider reports them"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value is None and isinstance(usage, dict):
+            value = usage.get(kind)
+        if value:
+            LLM_TOKENS.inc(value, operation=operation, kind=kind.replace("_tokens", ""))
+
+def instrument_engine(engine):
+    """Record count and duration of every SQL statement run through the engine"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERIES.inc(operation=operation)
+        DB_LATENCY.observe(elapsed, operation=operation)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get("query_start_time") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+def _mount_prefix(scope):
+    """Path a Mount such as /static matched, which sets root_path rather than a route"""
+    if "app_root_path" not in scope:
+        return None  # no Mount matched
+    return scope.get("root_path", "")[len(scope["app_root_path"]):] or None
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests.
+
+    Routes are labelled by their template (/api/jobs/{job_id}) rather than
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", None) or _mount_prefix(scope) or "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - start, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code)
@@ -0,0 +1,263 @@
+"""Versioned schema migrations for the main database.
+
+    python migrations.py            # apply pending migrations, backfills included
+    python migrations.py --status   # list migrations and whether they are applied
+
+schema_migrations records each applied version, so starting against an
+up-to-date database only reads that table. A new database is built from the models with
+create_all and every migration is stamped as applied; a database from
+before versioning starts at the baseline.
+
+Schema steps run in one transaction each. Keep them to changes SQLite makes
+without rewriting a table (new tables, ADD COLUMN, new indexes), so a big
+table is never copied while the app is up. Backfills run in batches of
+BATCH_SIZE rows, one short transaction per batch, and save their position
+in schema_migrations after every batch, so they run while the app serves
+traffic and resume where they stopped. Bootstrap applies schema steps only;
+backfills are left to `python migrations.py`, so a schema step must not
+depend on an earlier backfill, and code reading backfilled data must cope
+with rows not reached yet.
+
+A unique index added to an existing table gets a migration of its own: if
+existing rows violate it, the step fails with MigrationError and stays
+pending, so the next run tries again once the duplicates are gone.
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, Table, select, insert, update, inspect, exists
+from sqlalchemy.exc import IntegrityError
+
+from database import Base, engine as default_engine, SessionLocal
+import models  # noqa: F401 - registers every table with Base.metadata
+
+BATCH_SIZE = 500
+# Pause between backfill batches, so writers from the app get the lock in between
+BATCH_PAUSE_SECONDS = 0.05
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime),  # null while a backfill is under way
+    Column("last_id", Integer),  # a backfill's position
+)
+
+class MigrationError(Exception):
+    pass
+
+class Migration:
+    """A schema change: upgrade(conn) runs inside one transaction"""
+    backfill = False
+
+    def __init__(self, version, name, upgrade):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+
+class Backfill(Migration):
+    """A data change in batches: step(db, after_id, batch_size) returns the last id it handled, or None when done"""
+    backfill = True
+
+# Unique indexes that existing rows may violate, each created by its own migration below
+DEFERRED_INDEXES = {"ux_applications_job_candidate"}
+
+def baseline(conn):
+    """Bring a database from before versioning up to the models as of version 1"""
+    Base.metadata.create_all(bind=conn)
+    # create_all only builds indexes along with new tables; add later ones to existing tables
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in DEFERRED_INDEXES:
+                index.create(bind=conn, checkfirst=True)
+
+def unique_index(name):
+    """An upgrade creating the model index called name, failing while existing rows violate it"""
+    def upgrade(conn):
+        index = next(index for table in Base.metadata.sorted_tables for index in table.indexes if index.name == name)
+        try:
+            index.create(bind=conn, checkfirst=True)
+        except IntegrityError as e:
+            raise MigrationError(f"{name}: existing rows violate it. Remove the duplicates and run migrations again.") from e
+    return upgrade
+
+def backfill_job_stats(db, after_id, batch_size):
+    from models import Job, JobStats
+    from job_stats import rebuild_job_stats
+
+    job_ids = db.scalars(
+        select(Job.id)
+        .where(Job.id > after_id, ~exists().where(JobStats.job_id == Job.id))
+        .order_by(Job.id)
+        .limit(batch_size)
+    ).all()
+    if not job_ids:
+        return None
+    rebuild_job_stats(db, job_ids)
+    return job_ids[-1]
+
+def create_job_summaries(conn):
+    from models import JobSummary
+    JobSummary.__table__.create(bind=conn, checkfirst=True)
+
+def backfill_job_summaries(db, after_id, batch_size):
+    from models import Job
+    from prompts import store_job_summary
+
+    jobs = db.scalars(select(Job).where(Job.id > after_id).order_by(Job.id).limit(batch_size)).all()
+    if not jobs:
+        return None
+    for job in jobs:
+        store_job_summary(db, job)
+    return jobs[-1].id
+
+def create_rate_limit_buckets(conn):
+    from models import RateLimitBucket
+    RateLimitBucket.__table__.create(bind=conn, checkfirst=True)
+
+def backfill_job_skills(db, after_id, batch_size):
+    from skills import reindex_jobs
+    return reindex_jobs(db, after_id, batch_size)
+
+def backfill_application_skills(db, after_id, batch_size):
+    from skills import reindex_applications
+    return reindex_applications(db, after_id, batch_size)
+
+def add_scoring_queue_claims(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("scoring_queue")}
+    for name, ddl in (("claimed_by", "VARCHAR(64)"), ("claimed_until", "DATETIME")):
+        if name not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE scoring_queue ADD COLUMN {name} {ddl}")
+
+MIGRATIONS = [
+    Migration(1, "baseline", baseline),
+    Backfill(2, "backfill job stats", backfill_job_stats),
+    Migration(3, "job summaries", create_job_summaries),
+    Backfill(4, "backfill job summaries", backfill_job_summaries),
+    Migration(5, "rate limit buckets", create_rate_limit_buckets),
+    Migration(6, "one application per job and candidate", unique_index("ux_applications_job_candidate")),
+    Backfill(7, "backfill job skill index", backfill_job_skills),
+    Backfill(8, "backfill application skill index", backfill_application_skills),
+    Migration(9, "scoring queue claims", add_scoring_queue_claims),
+]
+
+@contextmanager
+def write_transaction(engine):
+    """A transaction that holds SQLite's write lock from the start, so two runners never apply the same step"""
+    if engine.dialect.name != "sqlite":
+        with engine.begin() as conn:
+            yield conn
+        return
+    # pysqlite does not open transactions for DDL by itself, so take over BEGIN and COMMIT
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+
+def applied_versions(conn):
+    if not inspect(conn).has_table("schema_migrations"):
+        return set()
+    return set(conn.scalars(select(schema_migrations.c.version).where(schema_migrations.c.applied_at != None)))
+
+def pending(engine=None):
+    with (engine or default_engine).connect() as conn:
+        applied = applied_versions(conn)
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+def _stamp(conn, migration):
+    conn.execute(insert(schema_migrations).prefix_with("OR REPLACE", dialect="sqlite").values(
+        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+    ))
+
+def _run_schema_step(engine, migration):
+    with write_transaction(engine) as conn:
+        if migration.version in applied_versions(conn):
+            return False  # another runner got here first
+        migration.upgrade(conn)
+        _stamp(conn, migration)
+    return True
+
+def _run_backfill(engine, migration, batch_size):
+    db = SessionLocal(bind=engine)
+    try:
+        row = db.execute(select(schema_migrations).where(schema_migrations.c.version == migration.version)).first()
+        if row is None:
+            db.execute(insert(schema_migrations).values(version=migration.version, name=migration.name, last_id=0))
+            db.commit()
+            after_id = 0
+        elif row.applied_at is not None:
+            return False
+        else:
+            after_id = row.last_id or 0
+        while True:
+            last_id = migration.upgrade(db, after_id, batch_size)
+            values = {"last_id": after_id if last_id is None else last_id}
+            if last_id is None:
+                values["applied_at"] = datetime.utcnow()
+            db.execute(update(schema_migrations).where(schema_migrations.c.version == migration.version).values(**values))
+            # The batch and its position commit together, so a restart never skips or repeats rows
+            db.commit()
+            if last_id is None:
+                return True
+            after_id = last_id
+            time.sleep(BATCH_PAUSE_SECONDS)
+    finally:
+        db.close()
+
+def upgrade(engine=None, backfills=True, batch_size=BATCH_SIZE):
+    """Apply pending migrations in order; returns the names of those applied.
+
+    Without backfills, pending backfills are skipped and left for a later run.
+    A step that fails is rolled back and left pending, and the error stops the run.
+    """
+    engine = engine or default_engine
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+        fresh = not applied and not inspect(conn).get_table_names()
+    if fresh:
+        # Nothing to migrate or backfill: build the current schema and record it as fully migrated
+        with write_transaction(engine) as conn:
+            if not applied_versions(conn):
+                Base.metadata.create_all(bind=conn)
+                for migration in MIGRATIONS:
+                    _stamp(conn, migration)
+        return [migration.name for migration in MIGRATIONS]
+
+    done = []
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        if migration.backfill:
+            if not backfills:
+                continue
+            ran = _run_backfill(engine, migration, batch_size)
+        else:
+            ran = _run_schema_step(engine, migration)
+        if ran:
+            done.append(migration.name)
+    return done
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Database migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations without applying any")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per backfill transaction")
+    args = parser.parse_args()
+    if args.status:
+        waiting = {migration.version for migration in pending()}
+        for migration in MIGRATIONS:
+            kind = "backfill" if migration.backfill else "schema"
+            print(f"{migration.version:>4}  {'pending' if migration.version in waiting else 'applied':<8} {kind:<9} {migration.name}")
+    else:
+        try:
+            applied = upgrade(backfills=True, batch_size=args.batch_size)
+        except MigrationError as e:
+            raise SystemExit(f"Migration failed: {e}")
+        print("Applied: " + ", ".join(applied) if applied else "Database is up to date")
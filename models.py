@@ -1,8 +1,26 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Table, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from database import Base
+from text_compression import CompressedText
 from datetime import datetime
 
+# Skill index: posting lists from a canonical skill to the rows that mention it
+application_skills = Table(
+    "application_skills",
+    Base.metadata,
+    Column("application_id", Integer, ForeignKey("applications.id"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skills.id"), primary_key=True),
+    Index("ix_application_skills_skill_id", "skill_id", "application_id"),
+)
+
+job_skills = Table(
+    "job_skills",
+    Base.metadata,
+    Column("job_id", Integer, ForeignKey("jobs.id"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skills.id"), primary_key=True),
+    Index("ix_job_skills_skill_id", "skill_id", "job_id"),
+)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -40,9 +58,12 @@ class Job(Base):
     # Relationships
     creator = relationship("User", back_populates="created_jobs")
     applications = relationship("Application", back_populates="job")
+    indexed_skills = relationship("Skill", secondary=job_skills, viewonly=True)
 
 class Application(Base):
     __tablename__ = "applications"
+    # One application per candidate per job; a resubmission updates the existing row
+    __table_args__ = (Index("ux_applications_job_candidate", "job_id", "candidate_id", unique=True),)
     
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
@@ -52,12 +73,13 @@ class Application(Base):
     name = Column(String(100), nullable=False)
     email = Column(String(100), nullable=False)
     phone = Column(String(20), nullable=False)
-    address = Column(Text, nullable=False)
+    # Free text; compressed on write when TEXT_COMPRESSION is on
+    address = Column(CompressedText, nullable=False)
     experience_years = Column(Integer, nullable=False)
-    relevant_experience = Column(Text, nullable=False)
-    skills = Column(Text, nullable=False)
-    education = Column(Text, nullable=False)
-    projects = Column(Text, nullable=False)
+    relevant_experience = Column(CompressedText, nullable=False)
+    skills = Column(CompressedText, nullable=False)
+    education = Column(CompressedText, nullable=False)
+    projects = Column(CompressedText, nullable=False)
     preferred_location = Column(String(100), nullable=False)
     photo_path = Column(String(255))
     
@@ -71,6 +93,7 @@ class Application(Base):
     # Relationships
     job = relationship("Job", back_populates="applications")
     candidate = relationship("User", back_populates="applications")
+    indexed_skills = relationship("Skill", secondary=application_skills, viewonly=True)
 
 class Notification(Base):
     __tablename__ = "notifications"
@@ -90,3 +113,154 @@ class Notification(Base):
     
     # Relationships
     user = relationship("User", back_populates="notifications")
+
+class Skill(Base):
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, index=True, nullable=False)  # canonical, lower-case
+
+class ScoringQueue(Base):
+    """Applications waiting for an AI score (bulk imports are scored later)"""
+    __tablename__ = "scoring_queue"
+    
+    application_id = Column(Integer, ForeignKey("applications.id"), primary_key=True)
+    enqueued_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # A drain claims rows until claimed_until; rows whose claim ran out are claimed again
+    claimed_by = Column(String(64))
+    claimed_until = Column(DateTime)
+
+class JobStats(Base):
+    """Per-job application counters, maintained incrementally by job_stats.py"""
+    __tablename__ = "job_stats"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    applied_count = Column(Integer, nullable=False, default=0)
+    shortlisted_count = Column(Integer, nullable=False, default=0)
+    # Applications still waiting for a score (ai_score 0) are left out of the score columns
+    scored_count = Column(Integer, nullable=False, default=0)
+    score_total = Column(Float, nullable=False, default=0.0)
+    max_ai_score = Column(Float)
+    last_applied_at = Column(DateTime)
+
+class JobSummary(Base):
+    """Compact job context for LLM prompts, built by prompts.py once per version of the job"""
+    __tablename__ = "job_summaries"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    version = Column(String(16), nullable=False)  # hash of the fields the summary is built from
+    summary = Column(Text, nullable=False)
+    tokens = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DedupKey(Base):
+    """Lookup keys for duplicate detection: normalized email/phone and LSH buckets, scoped to a job"""
+    __tablename__ = "dedup_keys"
+    
+    key = Column(String(64), primary_key=True)
+    application_id = Column(Integer, ForeignKey("applications.id"), primary_key=True, index=True)
+    candidate_id = Column(Integer, nullable=False)
+
+class ApplicationSignature(Base):
+    """MinHash signature of an application's profile text"""
+    __tablename__ = "application_signatures"
+    
+    application_id = Column(Integer, ForeignKey("applications.id"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+
+class DuplicateFlag(Base):
+    """An application that looks like a repeat of another candidate's application to the same job"""
+    __tablename__ = "duplicate_flags"
+    
+    application_id = Column(Integer, ForeignKey("applications.id"), primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
+    duplicate_of = Column(Integer, ForeignKey("applications.id"), nullable=False)
+    reason = Column(String(20), nullable=False)  # email, phone or profile
+    similarity = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class RecommendationProfile(Base):
+    """What a candidate's applications say about them, kept so job changes can be scored against it"""
+    __tablename__ = "recommendation_profiles"
+    
+    candidate_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    skill_ids = Column(Text, nullable=False, default="")  # comma separated Skill ids
+    experience_years = Column(Integer, nullable=False, default=0)
+    locations = Column(Text, nullable=False, default="")  # preferred locations, one per line
+    vector = Column(LargeBinary)  # mean application embedding
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class JobRecommendation(Base):
+    """A candidate's best matching open jobs, precomputed by recommendations.py"""
+    __tablename__ = "job_recommendations"
+    __table_args__ = (Index("ix_job_recommendations_candidate_score", "candidate_id", "score"),)
+    
+    candidate_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True, index=True)
+    score = Column(Float, nullable=False)
+
+class RefreshToken(Base):
+    """A refresh token, stored as its SHA-256; tokens rotated from one login share a family"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime)  # set when exchanged for a new token
+    revoked_at = Column(DateTime)
+
+class ParsedResume(Base):
+    """Fields parsed from a resume file, keyed by its SHA-256 and the parser version"""
+    __tablename__ = "parsed_resumes"
+    
+    content_hash = Column(String(64), primary_key=True)
+    parser_version = Column(Integer, primary_key=True)
+    fields = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class InterviewerAvailability(Base):
+    """A window of time an interviewer can take interviews in"""
+    __tablename__ = "interviewer_availability"
+    __table_args__ = (Index("ix_interviewer_availability_interviewer_start", "interviewer_id", "start_at"),)
+    
+    id = Column(Integer, primary_key=True)
+    interviewer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=False)
+
+class Interview(Base):
+    """A booked interview; scheduling.py keeps an interviewer's and a candidate's interviews from overlapping"""
+    __tablename__ = "interviews"
+    __table_args__ = (
+        Index("ix_interviews_interviewer_start", "interviewer_id", "start_at"),
+        Index("ix_interviews_candidate_start", "candidate_id", "start_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    application_id = Column(Integer, ForeignKey("applications.id"), nullable=False, index=True)
+    interviewer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    candidate_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=False)
+    status = Column(String(20), nullable=False, default="scheduled")  # scheduled or cancelled
+    meeting_link = Column(String(500))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class RateLimitBucket(Base):
+    """Token buckets for admission.py's per-user and per-IP rate limits, shared by every worker process"""
+    __tablename__ = "rate_limit_buckets"
+    
+    key = Column(String, primary_key=True)  # route class, user or ip, and who
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # Unix time of the last take
+
+class CacheVersion(Base):
+    """Invalidation counters shared by every worker process"""
+    __tablename__ = "cache_versions"
+    
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,126 @@
+"""Interview question PDFs.
+
+Kept free of application imports so process-pool workers that render
+PDFs only load ReportLab, not the web app. ReportLab itself is imported on
+the first render, so it is not paid for at server start.
+"""
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+PAGE_WIDTH, PAGE_HEIGHT = 612.0, 792.0  # US Letter, in points
+MARGIN = 72
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+FONT = "Helvetica"
+BOLD_FONT = "Helvetica-Bold"
+FONT_SIZE = 11
+LEADING = 15
+QUESTION_GAP = 10
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "60"))
+
+def render_questions_pdf(job_title, candidate_name, questions):
+    """Render the interview question sheet and return the PDF bytes.
+
+    Long questions are wrapped to the page width and continue on a new
+    page instead of being drawn off the edge.
+    """
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.utils import simpleSplit
+
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    y_position = PAGE_HEIGHT - MARGIN
+
+    def draw_lines(lines, font, size, indent=0):
+        nonlocal y_position
+        p.setFont(font, size)
+        for line in lines:
+            if y_position < MARGIN:
+                p.showPage()
+                p.setFont(font, size)
+                y_position = PAGE_HEIGHT - MARGIN
+            p.drawString(MARGIN + indent, y_position, line)
+            y_position -= LEADING
+
+    draw_lines(simpleSplit(f"Interview Questions - {job_title}", BOLD_FONT, 14, TEXT_WIDTH), BOLD_FONT, 14)
+    draw_lines(simpleSplit(f"Candidate: {candidate_name}", FONT, FONT_SIZE, TEXT_WIDTH), FONT, FONT_SIZE)
+    p.line(MARGIN, y_position + LEADING / 2, PAGE_WIDTH - MARGIN, y_position + LEADING / 2)
+    y_position -= QUESTION_GAP
+
+    for i, question in enumerate(questions, 1):
+        number = f"{i}. "
+        indent = p.stringWidth(number, FONT, FONT_SIZE)
+        lines = simpleSplit(question, FONT, FONT_SIZE, TEXT_WIDTH - indent) or [""]
+        block_height = len(lines) * LEADING
+        fits_on_a_page = block_height <= PAGE_HEIGHT - 2 * MARGIN
+        # Keep a question together on one page unless it is longer than a page
+        if y_position < MARGIN or (fits_on_a_page and y_position - block_height + LEADING < MARGIN):
+            p.showPage()
+            y_position = PAGE_HEIGHT - MARGIN
+        p.setFont(FONT, FONT_SIZE)
+        p.drawString(MARGIN, y_position, number)
+        p.drawString(MARGIN + indent, y_position, lines[0])
+        y_position -= LEADING
+        draw_lines(lines[1:], FONT, FONT_SIZE, indent)
+        y_position -= QUESTION_GAP
+
+    p.save()
+    return buffer.getvalue()
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def get_render_pool():
+    """Process pool for PDF rendering; ReportLab is CPU bound and holds the GIL.
+
+    Workers are spawned rather than forked so they never inherit the
+    server's threads, locks or open database connections.
+    """
+    global _render_pool
+    if _render_pool is None:
+        # Concurrent first requests from the thread pool must not each spawn a pool
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = ProcessPoolExecutor(
+                    max_workers=PDF_RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _render_pool
+
+def discard_render_pool(pool):
+    """Stop using pool, e.g. after one of its workers died or hung; the next render spawns a new one"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def submit_render(job_title, candidate_name, questions):
+    """Start a render on the pool; returns (pool, future) for render_result"""
+    pool = get_render_pool()
+    try:
+        return pool, pool.submit(render_questions_pdf, job_title, candidate_name, questions)
+    except BrokenProcessPool:
+        discard_render_pool(pool)
+        pool = get_render_pool()
+        return pool, pool.submit(render_questions_pdf, job_title, candidate_name, questions)
+
+def render_result(pool, future):
+    """The PDF bytes of a submitted render, waiting at most PDF_RENDER_TIMEOUT_SECONDS"""
+    try:
+        return future.result(timeout=PDF_RENDER_TIMEOUT_SECONDS)
+    except (BrokenProcessPool, FutureTimeout):
+        # A dead worker breaks the whole pool, and a hung one holds a slot: replace it for later renders
+        discard_render_pool(pool)
+        raise
+
+def shutdown_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
@@ -0,0 +1,454 @@
+"""On-demand request profiles and a slow-query log.
+
+A request is profiled when it carries `X-Profile: 1` with a valid
+`X-Admin-Token` (ADMIN_TOKEN), or at random for PROFILE_SAMPLE_RATE of
+requests. While it runs, a sampler thread reads its stack every
+PROFILE_INTERVAL_MS: on the event loop while the request's coroutine is
+running, and in the thread pool while its sync endpoint is (ProfiledRoute
+and run_in_threadpool let the profile follow it there). Samples are
+weighted by the time since the previous one, so a stack the GIL kept the
+sampler from seeing still counts for its real duration, and time with no
+sample is time spent waiting. Every SQL statement the request runs is
+recorded with its duration and query plan.
+
+Profiles are saved as JSON to PROFILE_DIR, shared by all workers; header
+requests get an `X-Profile-Id` to fetch theirs by. Sampled profiles
+faster than PROFILE_MIN_MS are dropped, and only the newest PROFILE_KEEP
+are kept.
+
+Separately, any statement slower than SLOW_QUERY_MS is logged with its
+plan, whether or not the request is profiled. Statements are recorded
+with string literals masked and parameters reduced to their types, so
+neither holds candidate data.
+"""
+import hmac
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool as _run_in_threadpool
+
+from metrics import PROFILES_SAVED, SLOW_QUERIES
+
+logger = logging.getLogger(__name__)
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MIN_MS = float(os.getenv("PROFILE_MIN_MS", "200"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_KEEP = 200
+
+# Never sampled: the profiles themselves and the scraper
+UNSAMPLED_PREFIXES = ("/api/admin/", "/metrics", "/static/")
+# Frames under this many percent of the request are left out of the text tree
+HIDE_BELOW = 1.0
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+_PROFILE_ID = re.compile(r"^\d{8}T\d{9}-[0-9a-f]{8}$")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+_current_profile = ContextVar("current_profile", default=None)
+_current_request = ContextVar("current_request", default=None)
+
+def is_admin_token(token):
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+_labels = {}
+
+def _label(code):
+    """'qualname (path:line)': paths relative to the repo for app code, to the package for libraries"""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        app = path.startswith(REPO_ROOT + os.sep) and "site-packages" not in path
+        if app:
+            path = os.path.relpath(path, REPO_ROOT)
+        else:
+            path = "/".join(path.replace(os.sep, "/").split("/")[-2:])
+        label = _labels[code] = (f"{code.co_qualname} ({path}:{code.co_firstlineno})", app)
+    return label
+
+class Profile:
+    def __init__(self, method, path, trigger):
+        # Sorts by time, to the millisecond, so pruning removes the oldest
+        self.id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")[:-3] + "-" + secrets.token_hex(4)
+        self.method = method
+        self.path = path
+        self.trigger = trigger  # header or sampled
+        self.started_at = datetime.utcnow()
+        self.route = None
+        self.status = None
+        self.duration = None
+        self.stacks = Counter()  # tuple of frame labels, outermost first -> seconds
+        self.queries = {}  # statement -> {"count", "seconds", "parameters", "plan"}
+        self._start = time.perf_counter()
+        self._roots = {}  # thread id -> the frame just outside the request's code in that thread
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def follow(self, root):
+        """Sample this thread's frames below root until the block ends"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            previous = self._roots.get(thread_id)
+            self._roots[thread_id] = root
+        try:
+            yield
+        finally:
+            with self._lock:
+                if previous is None:
+                    del self._roots[thread_id]
+                else:
+                    self._roots[thread_id] = previous
+
+    def sample(self, frames, seconds):
+        with self._lock:
+            roots = list(self._roots.items())
+        for thread_id, root in roots:
+            frame = frames.get(thread_id)
+            stack = []
+            while frame is not None and frame is not root:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            # Without root on the stack the thread is doing something else, e.g. the loop serving another request
+            if frame is root and stack:
+                stack.reverse()
+                with self._lock:
+                    self.stacks[tuple(stack)] += seconds
+
+    def add_query(self, statement, seconds, parameters, plan):
+        with self._lock:
+            entry = self.queries.get(statement)
+            if entry is None:
+                entry = self.queries[statement] = {"count": 0, "seconds": 0.0, "parameters": parameters, "plan": plan}
+            entry["count"] += 1
+            entry["seconds"] += seconds
+
+    def finish(self, route, status):
+        self.duration = time.perf_counter() - self._start
+        self.route = getattr(route, "path", None)
+        self.status = status
+
+    def document(self):
+        with self._lock:
+            stacks = [[[label for label, _ in stack], [app for _, app in stack], seconds] for stack, seconds in self.stacks.items()]
+            queries = [{"statement": statement, **entry} for statement, entry in self.queries.items()]
+        return {
+            "id": self.id, "method": self.method, "path": self.path, "route": self.route, "status": self.status,
+            "trigger": self.trigger, "started_at": self.started_at.isoformat(), "duration_ms": self.duration * 1000,
+            "sampled_ms": sum(stack[2] for stack in stacks) * 1000, "interval_ms": PROFILE_INTERVAL_MS,
+            "stacks": stacks, "queries": sorted(queries, key=lambda query: -query["seconds"]),
+        }
+
+class Sampler:
+    """One thread per process that samples every running profile, and sleeps while there are none"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.add(profile)
+            self._active.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile):
+        with self._lock:
+            self._profiles.discard(profile)
+            if not self._profiles:
+                self._active.clear()
+
+    def _run(self):
+        last = None
+        while True:
+            if not self._active.is_set():
+                last = None
+                self._active.wait()
+            with self._lock:
+                profiles = list(self._profiles)
+            now = time.perf_counter()
+            if profiles and last is not None:
+                frames = sys._current_frames()
+                for profile in profiles:
+                    profile.sample(frames, now - last)
+                del frames
+            last = now
+            time.sleep(self.interval)
+
+sampler = Sampler(PROFILE_INTERVAL_MS / 1000)
+
+def follow(func):
+    """Wrap a sync function so a profile of the calling request follows it onto a pool thread"""
+    if inspect.iscoroutinefunction(func):
+        return func  # runs on the event loop, which the profile samples already
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        with profile.follow(sys._getframe()):
+            return func(*args, **kwargs)
+    return wrapper
+
+async def run_in_threadpool(func, *args, **kwargs):
+    """starlette's run_in_threadpool, with the request's profile following func"""
+    return await _run_in_threadpool(follow(func), *args, **kwargs)
+
+class ProfiledRoute(APIRoute):
+    """Route class whose sync endpoints are profiled in the pool thread FastAPI runs them on"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, follow(endpoint), **kwargs)
+
+# Profile storage: one JSON file per profile in PROFILE_DIR
+def save_profile(profile):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, profile.id + ".json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(profile.document(), f)
+    os.replace(path + ".tmp", path)
+    PROFILES_SAVED.inc(trigger=profile.trigger)
+    names = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    for name in names[:max(len(names) - PROFILE_KEEP, 0)]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except FileNotFoundError:
+            pass  # another worker pruned it first
+
+def load_profile(profile_id):
+    """The saved profile document, or None"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(PROFILE_DIR, profile_id + ".json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def list_profiles(limit=50):
+    """Newest first, without their stacks"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith(".json")), reverse=True)
+    summaries = []
+    for name in names[:limit]:
+        document = load_profile(name[:-len(".json")])
+        if document is not None:
+            document["queries"] = sum(query["count"] for query in document.pop("queries"))
+            del document["stacks"]
+            summaries.append(document)
+    return summaries
+
+def _display_stack(labels, apps):
+    """From the first app frame on: app frames, the first library frame of each library run and the frame the stack ends in"""
+    start = apps.index(True) if True in apps else 0
+    return [
+        label for i, (label, app) in enumerate(zip(labels, apps))
+        if i >= start and (app or i == start or apps[i - 1] or i == len(labels) - 1)
+    ]
+
+def render_text(document):
+    """The profile as a call tree in the style of pyinstrument, then the SQL it ran"""
+    duration = document["duration_ms"] / 1000
+    tree = {}
+    for labels, apps, seconds in document["stacks"]:
+        node = tree
+        for label in _display_stack(labels, apps):
+            entry = node.setdefault(label, [0.0, {}])
+            entry[0] += seconds
+            node = entry[1]
+
+    lines = [
+        f"{document['method']} {document['path']}  ->  {document['status']}",
+        f"{document['started_at']}  {document['duration_ms']:.1f} ms, {document['sampled_ms']:.1f} ms sampled "
+        f"every {document['interval_ms']:g} ms ({document['trigger']})",
+        f"{max(duration - document['sampled_ms'] / 1000, 0) * 1000:.1f} ms not running (awaiting I/O, a lock or a thread)",
+        "",
+    ]
+
+    def walk(node, prefix):
+        children = sorted(
+            ((label, seconds, child) for label, (seconds, child) in node.items()
+             if duration and seconds / duration * 100 >= HIDE_BELOW),
+            key=lambda item: -item[1],
+        )
+        for i, (label, seconds, child) in enumerate(children):
+            last = i == len(children) - 1
+            lines.append(f"{prefix}{'└─ ' if last else '├─ '}{seconds * 1000:8.1f} ms {seconds / duration * 100:5.1f}%  {label}")
+            walk(child, prefix + ("   " if last else "│  "))
+
+    walk(tree, "")
+    queries = document["queries"]
+    lines += ["", f"SQL: {sum(query['count'] for query in queries)} statements, "
+                  f"{sum(query['seconds'] for query in queries) * 1000:.1f} ms"]
+    for query in queries:
+        lines += ["", f"{query['seconds'] * 1000:.1f} ms in {query['count']} x  parameters {query['parameters']}",
+                  f"    {query['statement']}"]
+        if query["plan"]:
+            lines += ["    " + line for line in query["plan"].splitlines()]
+    return "\n".join(lines) + "\n"
+
+def render_collapsed(document):
+    """Full stacks in the collapsed format flame graph tools (speedscope, flamegraph.pl) read, in microseconds"""
+    return "".join(
+        ";".join(label.replace(";", ",") for label in labels) + f" {round(seconds * 1_000_000)}\n"
+        for labels, _, seconds in document["stacks"]
+    )
+
+# SQL capture and the slow-query log
+slow_queries = deque(maxlen=SLOW_QUERY_KEEP)  # this worker's most recent slow statements
+_plans = {}
+
+def redact(statement):
+    return " ".join(_STRING_LITERAL.sub("'?'", statement).split())
+
+def describe_parameters(parameters, executemany):
+    if executemany:
+        rows = list(parameters)
+        return f"{len(rows)} rows of {describe_parameters(rows[0], False)}" if rows else "0 rows"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+def explain(cursor, dialect, statement, parameters, executemany):
+    """Query plan of statement, run on the same DBAPI connection; cached per statement, None when unavailable"""
+    if statement in _plans:
+        return _plans[statement]
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    try:
+        if dialect == "sqlite":
+            rows = cursor.connection.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            # (id, parent, notused, detail): indent each step under its parent
+            depth = {0: 0}
+            lines = []
+            for step_id, parent, _, detail in rows:
+                depth[step_id] = depth.get(parent, 0) + 1
+                lines.append("  " * (depth[step_id] - 1) + detail)
+        else:
+            explain_cursor = cursor.connection.cursor()
+            explain_cursor.execute("EXPLAIN " + statement, parameters)
+            lines = [" ".join(str(value) for value in row) for row in explain_cursor.fetchall()]
+    except Exception:
+        return None
+    plan = "\n".join(lines) or None
+    if len(_plans) > 1000:
+        _plans.clear()
+    _plans[statement] = plan
+    return plan
+
+def instrument_engine(engine):
+    """Attach statements to the running profile and log slow ones"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiling_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profiling_start_time"].pop()
+        profile = _current_profile.get()
+        slow = elapsed * 1000 >= SLOW_QUERY_MS
+        if profile is None and not slow:
+            return
+        redacted = redact(statement)
+        plan = explain(cursor, conn.dialect.name, statement, parameters, executemany)
+        types = describe_parameters(parameters, executemany)
+        if profile is not None:
+            profile.add_query(redacted, elapsed, types, plan)
+        if slow:
+            operation = redacted.split(None, 1)[0].upper() if redacted else "UNKNOWN"
+            SLOW_QUERIES.inc(operation=operation)
+            request = _current_request.get()
+            slow_queries.append({
+                "at": datetime.utcnow(), "request": request, "duration_ms": elapsed * 1000,
+                "statement": redacted, "parameters": types, "plan": plan,
+            })
+            logger.warning("Slow query, %.1f ms in %s: %s", elapsed * 1000, request, redacted)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get("profiling_start_time") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+class ProfilingMiddleware:
+    """ASGI middleware that decides which requests to profile and saves their profiles"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _trigger(self, scope):
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") == b"1":
+            token = headers.get(b"x-admin-token")
+            if is_admin_token(token.decode("latin-1") if token else None):
+                return "header"
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE and not scope["path"].startswith(UNSAMPLED_PREFIXES):
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_token = _current_request.set(f"{scope['method']} {scope['path']}")
+        try:
+            trigger = self._trigger(scope)
+            if trigger is None:
+                await self.app(scope, receive, send)
+                return
+            await self._profile(scope, receive, send, trigger)
+        finally:
+            _current_request.reset(request_token)
+
+    async def _profile(self, scope, receive, send, trigger):
+        profile = Profile(scope["method"], scope["path"], trigger)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trigger == "header":
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        profile_token = _current_profile.set(profile)
+        sampler.add(profile)
+        try:
+            with profile.follow(sys._getframe()):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.remove(profile)
+            _current_profile.reset(profile_token)
+            profile.finish(scope.get("route"), status_code)
+        if trigger == "header" or profile.duration * 1000 >= PROFILE_MIN_MS:
+            # The response has been sent, so the write only delays this task
+            await _run_in_threadpool(save_profile, profile)
@@ -0,0 +1,55 @@
+"""Text cleaning and token budgets for LLM prompts.
+
+Shared by prompts.py and the Streamlit portal (job_portal/utils/chatgpt.py),
+so this module imports nothing from the application.
+"""
+import re
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_BULLET = re.compile(r"^\s*(?:[-*•·▪–]|\d+[.)])\s*")
+
+def estimate_tokens(text):
+    # Short words are one token; longer ones split about every 6 letters, numbers every 3 digits
+    total = 0
+    for piece in _PIECES.findall(text):
+        if piece[0].isdigit():
+            total += (len(piece) + 2) // 3
+        elif piece[0].isalpha():
+            total += (len(piece) + 5) // 6
+        else:
+            total += 1
+    return total
+
+def sentences(text):
+    """Sentences and lines of text without bullets or repeats, in order"""
+    seen, result = set(), []
+    for line in (text or "").splitlines():
+        for sentence in _SENTENCE_END.split(_BULLET.sub("", line)):
+            sentence = " ".join(sentence.split())
+            if sentence and sentence.lower() not in seen:
+                seen.add(sentence.lower())
+                result.append(sentence)
+    return result
+
+def _truncate(sentence, budget, count):
+    words, used = [], 0
+    for word in sentence.split():
+        used += count(word)
+        if used > budget:
+            break
+        words.append(word)
+    return " ".join(words) + " ..." if words else ""
+
+def condense(text, budget, count=estimate_tokens):
+    """text cleaned and cut at a sentence boundary to at most about budget tokens, as counted by count"""
+    kept, used = [], 0
+    for sentence in sentences(text):
+        cost = count(sentence) + 1
+        if used + cost > budget:
+            if not kept:
+                kept.append(_truncate(sentence, budget, count))
+            break
+        kept.append(sentence)
+        used += cost
+    return " ".join(kept)
@@ -0,0 +1,156 @@
+"""Prompt building for LLM calls: a compact job context and budgeted candidate text.
+
+Prompts used to carry the job's full description and the candidate's raw
+free text, so their size and cost grew with whatever was pasted in. Now:
+
+- Each version of a job (a hash of its title, description, skills and
+  experience) is reduced once to a summary: canonical skills plus the
+  description sentences that name a skill or a requirement, within
+  JOB_SUMMARY_TOKENS; sentences about the company and its perks go.
+  It is stored in job_summaries when the job is saved.
+- Candidate fields are cleaned (whitespace, bullets, repeated sentences)
+  and cut at sentence boundaries so together they fit CANDIDATE_TOKENS.
+- Tokens are counted locally, with tiktoken's cl100k_base when it is
+  installed and its encoding file is available, else with an estimate
+  that is close for English text. Every prompt's size is recorded in the
+  llm_prompt_tokens histogram before it is sent.
+"""
+import hashlib
+import os
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from sqlalchemy import inspect
+
+from metrics import LLM_PROMPT_TOKENS
+from models import JobSummary
+from prompt_text import estimate_tokens, sentences, condense as _condense
+from skills import parse_skills
+
+JOB_SUMMARY_TOKENS = int(os.getenv("JOB_SUMMARY_TOKENS", "150"))
+CANDIDATE_TOKENS = int(os.getenv("PROMPT_CANDIDATE_TOKENS", "300"))
+# Besides those naming a skill, only description sentences with one of these go into a job summary
+REQUIREMENT_WORDS = (
+    "experience", "required", "require", "must", "responsib", "you will", "degree", "years", "knowledge",
+    "familiar", "proficien", "expert", "ownership", "design", "build",
+)
+
+class Prompt(NamedTuple):
+    text: str
+    tokens: int
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Not installed, or the encoding file cannot be fetched: estimate instead
+        return None
+
+def count_tokens(text):
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return estimate_tokens(text)
+
+def condense(text, budget):
+    """text cleaned and cut at a sentence boundary to at most about budget tokens"""
+    return _condense(text, budget, count_tokens)
+
+def candidate_profile(fields, budget=CANDIDATE_TOKENS):
+    """'Label: text' lines for (label, text) pairs, sharing budget between them.
+
+    Fields shorter than an even share keep all of it and leave the rest to the longer ones.
+    """
+    texts = [(label, " ".join(sentences(text))) for label, text in fields if text]
+    costs = {label: count_tokens(text) for label, text in texts}
+    shares, left, open_labels = {}, budget, sorted(costs, key=costs.get)
+    while open_labels:
+        share = left // len(open_labels)
+        label = open_labels.pop(0)
+        shares[label] = min(costs[label], share)
+        left -= shares[label]
+    return "\n".join(
+        f"{label}: {text if costs[label] <= shares[label] else condense(text, shares[label])}" for label, text in texts
+    )
+
+def job_version(job):
+    source = "\x1f".join(str(value) for value in (job.title, job.description, job.skills, job.experience_years))
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+@lru_cache(maxsize=1024)
+def _summarize(title, description, skills, experience_years, budget):
+    names = parse_skills(skills)
+    lines = [f"Title: {title}", f"Experience: {experience_years}+ years", f"Skills: {', '.join(names)}"]
+    # Skills match whole words only ("go" not in "good"); requirement words are stems and match as prefixes
+    terms = [re.escape(name) + r"(?![\w+#])" for name in names] + [re.escape(word) for word in REQUIREMENT_WORDS]
+    keywords = re.compile(r"(?<!\w)(?:" + "|".join(terms) + ")", re.IGNORECASE)
+    candidates = sentences(description)
+    # Sentences about the company, perks and the like are left out; with no requirement sentence, the opening is kept
+    relevant = [sentence for sentence in candidates if keywords.search(sentence)] or candidates[:2]
+    left = budget - count_tokens("\n".join(lines))
+    picked = []
+    for sentence in relevant:
+        cost = count_tokens(sentence) + 1
+        if cost <= left:
+            picked.append(sentence)
+            left -= cost
+    if picked:
+        lines.append("About: " + " ".join(picked))
+    return "\n".join(lines)
+
+def summarize_job(job, budget=JOB_SUMMARY_TOKENS):
+    return _summarize(job.title, job.description or "", job.skills or "", job.experience_years, budget)
+
+def store_job_summary(db, job):
+    """Save the summary of the job's current version, unless it is saved already"""
+    version = job_version(job)
+    row = db.get(JobSummary, job.id)
+    if row is not None and row.version == version:
+        return row
+    summary = summarize_job(job)
+    return db.merge(JobSummary(job_id=job.id, version=version, summary=summary, tokens=count_tokens(summary)))
+
+def job_summary(job):
+    """The stored summary of a job if it matches the job's current version, else one built now"""
+    state = inspect(job, raiseerr=False)
+    session = state.session if state is not None else None
+    if session is not None and job.id is not None:
+        row = session.get(JobSummary, job.id)
+        if row is not None and row.version == job_version(job):
+            return row.summary
+    return summarize_job(job)
+
+def build_prompt(operation, text):
+    prompt = Prompt(text, count_tokens(text))
+    LLM_PROMPT_TOKENS.observe(prompt.tokens, operation=operation)
+    return prompt
+
+def score_prompt(job, candidate_data):
+    profile = candidate_profile([
+        ("Skills", ", ".join(parse_skills(candidate_data["skills"]))),
+        ("Relevant experience", candidate_data["relevant_experience"]),
+        ("Projects", candidate_data["projects"]),
+        ("Education", candidate_data["education"]),
+    ])
+    return build_prompt("score", (
+        f"Job:\n{job_summary(job)}\n\n"
+        f"Candidate:\nExperience: {candidate_data['experience_years']} years\n{profile}\n\n"
+        "Rate this candidate's fit for the job on a scale of 1-10. Consider experience match, skill alignment, "
+        "and overall suitability. Return only the number."
+    ))
+
+def questions_prompt(job, application):
+    profile = candidate_profile([
+        ("Skills", ", ".join(parse_skills(application.skills))),
+        ("Projects", application.projects),
+    ])
+    return build_prompt("interview_questions", (
+        f"Generate 10 interview questions for the following job and candidate.\n\n"
+        f"Job:\n{job_summary(job)}\n\n"
+        f"Candidate:\nExperience: {application.experience_years} years\n{profile}\n\n"
+        "Generate 10 relevant interview questions that test both technical skills and cultural fit. "
+        "Return each question on a new line."
+    ))
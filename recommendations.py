@@ -0,0 +1,235 @@
+"""Precomputed job recommendations for candidates.
+
+A candidate's applications are folded into a profile: the skills they
+listed, their most years of experience, their preferred locations and the
+mean of their application embeddings. Every open job they have not
+applied to is scored against it, and the best RECOMMENDATION_LIMIT are
+stored in job_recommendations, so GET /api/jobs/recommended is one indexed
+range read. The cache is kept current from both sides:
+
+- a candidate applying (or re-applying) drops their profile, which is
+  rebuilt on their next request
+- a job being posted, edited or closed rescores that one job against every
+  stored profile, in a background task
+"""
+from datetime import datetime
+
+from sqlalchemy import select, delete, insert, func, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from database import SessionLocal
+from embeddings import application_vectors, job_vectors
+from models import Job, Application, RecommendationProfile, JobRecommendation, application_skills, job_skills
+
+RECOMMENDATION_LIMIT = 50
+PAGE_SIZE = 20
+
+# Share of the score given to each signal; they add up to 1
+WEIGHTS = {"similarity": 0.5, "skills": 0.3, "experience": 0.1, "location": 0.1}
+
+def normalize_location(text):
+    return " ".join((text or "").lower().split())
+
+def location_fit(job_location, locations):
+    job_location = normalize_location(job_location)
+    if any(location in job_location or job_location in location for location in locations):
+        return 1.0
+    # Remote work suits most candidates, just not as well as the place they asked for
+    return 0.5 if "remote" in job_location else 0.0
+
+def experience_fit(candidate_years, job_years):
+    if not job_years or candidate_years >= job_years:
+        return 1.0
+    return max(candidate_years, 0) / job_years
+
+def build_profile(db, candidate_id):
+    """Profile from a candidate's applications, or None if they have not applied anywhere"""
+    import numpy as np
+
+    applications = db.execute(
+        select(Application.id, Application.experience_years, Application.preferred_location)
+        .where(Application.candidate_id == candidate_id)
+    ).all()
+    if not applications:
+        return None
+    application_ids = [application_id for application_id, _, _ in applications]
+    skill_ids = db.scalars(
+        select(application_skills.c.skill_id).where(application_skills.c.application_id.in_(application_ids)).distinct()
+    ).all()
+
+    vector = None
+    vectors = [v for v in (application_vectors.get(i) for i in application_ids) if v is not None]
+    if vectors:
+        mean = np.mean(vectors, axis=0)
+        norm = float(np.linalg.norm(mean))
+        if norm:
+            vector = (mean / norm).astype(np.float32).tobytes()
+
+    return RecommendationProfile(
+        candidate_id=candidate_id,
+        skill_ids=",".join(str(skill_id) for skill_id in sorted(skill_ids)),
+        experience_years=max(years or 0 for _, years, _ in applications),
+        locations="\n".join(sorted({normalize_location(l) for _, _, l in applications if normalize_location(l)})),
+        vector=vector,
+        updated_at=datetime.utcnow(),
+    )
+
+def _load_jobs(db, job_ids=None, exclude=None):
+    """Open jobs as (id, experience_years, work_location, skill id set)"""
+    query = select(Job.id, Job.experience_years, Job.work_location).where(Job.is_active == True)
+    if job_ids is not None:
+        query = query.where(Job.id.in_(job_ids))
+    if exclude is not None:
+        query = query.where(~Job.id.in_(exclude))
+    jobs = db.execute(query).all()
+    skills = {}
+    postings = select(job_skills.c.job_id, job_skills.c.skill_id)
+    if job_ids is not None:
+        postings = postings.where(job_skills.c.job_id.in_(job_ids))
+    for job_id, skill_id in db.execute(postings):
+        skills.setdefault(job_id, set()).add(skill_id)
+    return [(job_id, years, location, skills.get(job_id, set())) for job_id, years, location in jobs]
+
+class _Scorer:
+    """A profile unpacked once, so scoring many jobs against it stays cheap"""
+
+    def __init__(self, profile):
+        import numpy as np
+
+        self.skill_ids = {int(skill_id) for skill_id in profile.skill_ids.split(",") if skill_id}
+        self.experience_years = profile.experience_years
+        self.locations = [location for location in profile.locations.split("\n") if location]
+        self.vector = np.frombuffer(profile.vector, dtype=np.float32) if profile.vector else None
+
+    def score(self, job, matrix):
+        job_id, years, location, required = job
+        similarity = 0.0
+        if self.vector is not None and job_id < len(matrix):
+            similarity = max(float(matrix[job_id] @ self.vector), 0.0)
+        skills = len(required & self.skill_ids) / len(required) if required else 0.0
+        return round(
+            WEIGHTS["similarity"] * similarity
+            + WEIGHTS["skills"] * skills
+            + WEIGHTS["experience"] * experience_fit(self.experience_years, years)
+            + WEIGHTS["location"] * location_fit(location, self.locations),
+            4,
+        )
+
+def invalidate_candidates(db, candidate_ids):
+    """Drop cached recommendations for candidates whose applications changed"""
+    candidate_ids = list(candidate_ids)
+    if candidate_ids:
+        db.execute(delete(JobRecommendation).where(JobRecommendation.candidate_id.in_(candidate_ids)))
+        db.execute(delete(RecommendationProfile).where(RecommendationProfile.candidate_id.in_(candidate_ids)))
+
+def refresh_candidate(db, candidate_id):
+    """Rebuild one candidate's profile and recommendations; returns the profile or None"""
+    invalidate_candidates(db, [candidate_id])
+    profile = build_profile(db, candidate_id)
+    if profile is None:
+        return None
+    db.add(profile)
+    db.flush()
+
+    applied = select(Application.job_id).where(Application.candidate_id == candidate_id)
+    scorer = _Scorer(profile)
+    matrix = job_vectors.matrix()
+    ranked = sorted(
+        ((scorer.score(job, matrix), job[0]) for job in _load_jobs(db, exclude=applied)), key=lambda r: (-r[0], r[1])
+    )[:RECOMMENDATION_LIMIT]
+    if ranked:
+        db.execute(insert(JobRecommendation), [
+            {"candidate_id": candidate_id, "job_id": job_id, "score": score} for score, job_id in ranked
+        ])
+    return profile
+
+def get_recommendations(db, candidate_id, limit=PAGE_SIZE, offset=0):
+    """A page of (Job, score), best first, or None when the candidate has no applications yet"""
+    if db.get(RecommendationProfile, candidate_id) is None:
+        try:
+            profile = refresh_candidate(db, candidate_id)
+        except IntegrityError:
+            # Another worker rebuilt this candidate's list first; read theirs
+            db.rollback()
+        else:
+            if profile is None:
+                db.rollback()
+                return None
+            db.commit()
+    return (
+        db.query(Job, JobRecommendation.score)
+        .join(JobRecommendation, JobRecommendation.job_id == Job.id)
+        .filter(JobRecommendation.candidate_id == candidate_id)
+        .order_by(JobRecommendation.score.desc(), Job.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+def rescore_job(db, job_id):
+    """Bring every stored recommendation list up to date after one job changed"""
+    had = set(db.scalars(select(JobRecommendation.candidate_id).where(JobRecommendation.job_id == job_id)))
+    db.execute(delete(JobRecommendation).where(JobRecommendation.job_id == job_id))
+
+    added = set()
+    jobs = _load_jobs(db, job_ids=[job_id])
+    if jobs:
+        job = jobs[0]
+        applied = set(db.scalars(select(Application.candidate_id).where(Application.job_id == job_id)))
+        lists = {
+            candidate_id: (count, lowest) for candidate_id, count, lowest in db.execute(
+                select(JobRecommendation.candidate_id, func.count(), func.min(JobRecommendation.score))
+                .group_by(JobRecommendation.candidate_id)
+            )
+        }
+        matrix = job_vectors.matrix()
+        rows = []
+        for profile in db.scalars(select(RecommendationProfile)).yield_per(1000):
+            if profile.candidate_id in applied:
+                continue
+            score = _Scorer(profile).score(job, matrix)
+            count, lowest = lists.get(profile.candidate_id, (0, None))
+            if count < RECOMMENDATION_LIMIT or score > lowest:
+                rows.append({"candidate_id": profile.candidate_id, "job_id": job_id, "score": score})
+        if rows:
+            db.execute(insert(JobRecommendation), rows)
+            added = {row["candidate_id"] for row in rows}
+            _trim(db, [c for c in added if lists.get(c, (0, None))[0] >= RECOMMENDATION_LIMIT])
+
+    # A full list that lost this job is missing its next best job, which was never stored
+    lost = had - added
+    if lost:
+        short = db.scalars(
+            select(JobRecommendation.candidate_id)
+            .where(JobRecommendation.candidate_id.in_(lost))
+            .group_by(JobRecommendation.candidate_id)
+            .having(func.count() >= RECOMMENDATION_LIMIT - 1)
+        ).all()
+        invalidate_candidates(db, short)
+
+def _trim(db, candidate_ids):
+    """Delete whatever ranks below RECOMMENDATION_LIMIT for these candidates"""
+    if not candidate_ids:
+        return
+    ranked = select(
+        JobRecommendation.candidate_id,
+        JobRecommendation.job_id,
+        func.row_number().over(
+            partition_by=JobRecommendation.candidate_id,
+            order_by=(JobRecommendation.score.desc(), JobRecommendation.job_id),
+        ).label("rank"),
+    ).where(JobRecommendation.candidate_id.in_(candidate_ids)).subquery()
+    extra = db.execute(select(ranked.c.candidate_id, ranked.c.job_id).where(ranked.c.rank > RECOMMENDATION_LIMIT)).all()
+    if extra:
+        db.execute(delete(JobRecommendation).where(
+            tuple_(JobRecommendation.candidate_id, JobRecommendation.job_id).in_([tuple(row) for row in extra])
+        ))
+
+def refresh_job(job_id):
+    """Background task run after a job is posted, edited or closed"""
+    db = SessionLocal()
+    try:
+        rescore_job(db, job_id)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,99 @@
+"""Long-lived refresh tokens, so sessions renew without checking a password.
+
+A refresh token is 32 random bytes handed to the client once. Only its
+SHA-256 is stored: the token already has full entropy, so a slow password
+hash would add cost and no safety. Every refresh marks the presented token
+used and issues a new one in the same family. A used token that comes back
+means it was copied, and the whole family is revoked.
+"""
+import hashlib
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, delete
+
+from models import RefreshToken
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def issue_refresh_token(db, user_id, family_id=None):
+    """Store a new token for user_id and return the plaintext, which is never stored"""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    db.add(RefreshToken(
+        token_hash=hash_token(token),
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4().hex,
+        created_at=now,
+        expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+def rotate_refresh_token(db, token):
+    """Spend a refresh token; returns (user_id, new token), or None if it is not valid.
+
+    Presenting a token that was already spent revokes every token in its family.
+    """
+    now = datetime.utcnow()
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+    if stored is None or stored.revoked_at is not None or stored.expires_at < now:
+        return None
+    # Conditional update, so two requests racing with the same token cannot both spend it
+    spent = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.used_at == None)
+        .values(used_at=now)
+    ).rowcount
+    if not spent:
+        revoke_family(db, stored.family_id)
+        return None
+    return stored.user_id, issue_refresh_token(db, stored.user_id, stored.family_id)
+
+def revoke_family(db, family_id):
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at == None)
+        .values(revoked_at=datetime.utcnow())
+    )
+
+def revoke_token(db, token):
+    """Log out one session: revoke the family the token belongs to"""
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+    if stored is not None:
+        revoke_family(db, stored.family_id)
+
+def revoke_user_tokens(db, user_id=None):
+    """Log a user, or with no user_id everyone, out everywhere; returns how many live tokens were revoked"""
+    query = update(RefreshToken).where(RefreshToken.revoked_at == None, RefreshToken.used_at == None)
+    if user_id is not None:
+        query = query.where(RefreshToken.user_id == user_id)
+    return db.execute(query.values(revoked_at=datetime.utcnow())).rowcount
+
+def purge_expired(db, user_id):
+    """Drop a user's expired tokens; called on login so the table does not grow forever"""
+    db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.expires_at < datetime.utcnow()))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Refresh token maintenance")
+    parser.add_argument("--revoke-all", action="store_true", help="sign every user out of every session")
+    parser.add_argument("--user-id", type=int, help="only revoke this user's tokens")
+    args = parser.parse_args()
+    if args.revoke_all:
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            revoked = revoke_user_tokens(db, args.user_id)
+            db.commit()
+            print(f"Revoked {revoked} refresh tokens")
+        finally:
+            db.close()
+    else:
+        parser.print_help()
@@ -0,0 +1,257 @@
+"""Turn an uploaded resume into application form fields.
+
+Text is pulled out of DOCX files with zipfile and ElementTree, and out of
+PDFs with pypdf when it is installed. The text is split into sections at
+headings such as "Skills" or "Work Experience", and each section fills
+the matching field. Like pdf_render, this module stays free of
+application imports, because it runs inside process-pool workers.
+"""
+import io
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from xml.etree import ElementTree
+
+# Bump when parsing changes, so cached results from older versions are not reused
+PARSER_VERSION = 1
+
+MAX_RESUME_SIZE = 5 * 1024 * 1024
+# Uncompressed size of a DOCX body; a small upload can inflate to gigabytes
+MAX_DOCX_XML_SIZE = 20 * 1024 * 1024
+MAX_PDF_PAGES = 10
+MAX_FIELD_LENGTH = 2000
+
+RESUME_PARSE_WORKERS = int(os.getenv("RESUME_PARSE_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+RESUME_PARSE_TIMEOUT_SECONDS = float(os.getenv("RESUME_PARSE_TIMEOUT_SECONDS", "30"))
+
+RESUME_FORMATS = {".docx": "docx", ".pdf": "pdf"}
+
+SECTION_HEADINGS = {
+    "summary": ("objective", "career objective", "summary", "professional summary", "profile", "about me"),
+    "skills": ("skills", "technical skills", "key skills", "core skills", "core competencies", "technologies", "tech stack"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history", "work history"),
+    "education": ("education", "academic background", "academics", "qualifications"),
+    "projects": ("projects", "key projects", "personal projects", "side projects"),
+    "certifications": ("certifications", "certificates", "licenses", "licenses and certifications"),
+}
+HEADING_SECTIONS = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Labelled contact lines, as in job_portal/templates/cv_template.docx
+CONTACT_LABELS = {"full name": "name", "name": "name", "email": "email", "e-mail": "email", "phone": "phone", "mobile": "phone"}
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{6,}\d")
+YEARS_RE = re.compile(r"(\d{1,2})\+?\s*(?:years|yrs)\b", re.I)
+RANGE_RE = re.compile(r"\b((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now)\b", re.I)
+BULLET_RE = re.compile(r"^\s*(?:[-*•▪●◦·]|\d+[.)])\s*")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+class ResumeParseError(ValueError):
+    pass
+
+def resume_format(filename):
+    return RESUME_FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+def docx_text(data):
+    """Paragraph text of a DOCX body, tables included, one paragraph per line"""
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            if archive.getinfo("word/document.xml").file_size > MAX_DOCX_XML_SIZE:
+                raise ResumeParseError("DOCX file is too large to parse")
+            # The recorded size can lie, so the read is bounded too
+            with archive.open("word/document.xml") as member:
+                document = member.read(MAX_DOCX_XML_SIZE + 1)
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise ResumeParseError("Not a valid DOCX file") from e
+    if len(document) > MAX_DOCX_XML_SIZE:
+        raise ResumeParseError("DOCX file is too large to parse")
+    try:
+        root = ElementTree.fromstring(document)
+    except ElementTree.ParseError as e:
+        raise ResumeParseError("Not a valid DOCX file") from e
+    lines = []
+    for paragraph in root.iter(f"{_W}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_W}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_W}br", f"{_W}cr"):
+                parts.append("\n")
+        lines.append("".join(parts))
+    return "\n".join(lines)
+
+def pdf_text(data):
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ResumeParseError("PDF resumes need the pypdf package; upload a DOCX instead") from e
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        return "\n".join(page.extract_text() or "" for page in reader.pages[:MAX_PDF_PAGES])
+    except Exception as e:
+        # pypdf raises many error types for damaged files; they all mean the same to the candidate
+        raise ResumeParseError("Not a valid PDF file") from e
+
+def _heading(line):
+    """(section, text after the heading) if the line starts a section, else None"""
+    label, colon, rest = line.partition(":")
+    key = re.sub(r"\(.*?\)", "", label).strip(" \t-—–#*").lower()
+    key = " ".join(key.split())
+    if key in HEADING_SECTIONS and (colon or len(line) < 40):
+        return HEADING_SECTIONS[key], rest.strip()
+    return None
+
+def segment(text):
+    """Split resume text into {section: [lines]}; lines before the first heading go to "header" """
+    sections = {"header": []}
+    current = "header"
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or set(line) <= set("-_=*—– "):
+            continue
+        heading = _heading(line)
+        if heading:
+            current, rest = heading
+            sections.setdefault(current, [])
+            line = rest
+        if line:
+            sections.setdefault(current, []).append(line)
+    return sections
+
+def _clean(line):
+    # Template blanks like "Email: ______" carry no value
+    return BULLET_RE.sub("", line).strip(" _\t")
+
+def _join(lines):
+    text = "\n".join(line for line in (_clean(line) for line in lines) if line)
+    return text[:MAX_FIELD_LENGTH]
+
+def _contact(sections):
+    found = {}
+    for line in sections.get("header", []):
+        for part in re.split(r"\s{2,}|\t|\|", line):
+            label, colon, value = part.partition(":")
+            field = CONTACT_LABELS.get(label.strip().lower())
+            value = value.strip(" _")
+            if colon and field and value and field not in found:
+                found[field] = value
+    text = "\n".join(line for lines in sections.values() for line in lines)
+    if "email" not in found and (match := EMAIL_RE.search(text)):
+        found["email"] = match.group(0)
+    if "phone" not in found and (match := PHONE_RE.search(text)):
+        found["phone"] = " ".join(match.group(0).split())
+    if "name" not in found:
+        for line in sections.get("header", []):
+            candidate = _clean(line)
+            # The first short line without contact details is usually the name
+            if candidate and ":" not in candidate and not EMAIL_RE.search(candidate) and not re.search(r"\d", candidate):
+                if len(candidate.split()) <= 5:
+                    found["name"] = candidate
+                    break
+    return found
+
+def _skills(lines):
+    seen = []
+    for line in lines:
+        for part in re.split(r"[,;|•]", _clean(line)):
+            skill = part.strip(" .")
+            if skill and len(skill) <= 50 and skill.lower() not in (s.lower() for s in seen):
+                seen.append(skill)
+    return ", ".join(seen)
+
+def experience_years(sections, today=None):
+    """Stated years of experience, else the span covered by the date ranges under Experience"""
+    stated = [int(n) for line in sections.get("summary", []) + sections.get("header", []) for n in YEARS_RE.findall(line)]
+    if stated:
+        return max(stated)
+    this_year = (today or date.today()).year
+    spans = []
+    for line in sections.get("experience", []):
+        for start, end in RANGE_RE.findall(line):
+            end_year = this_year if not end[0].isdigit() else int(end)
+            if int(start) <= end_year <= this_year:
+                spans.append((int(start), end_year))
+    # Count each year once, so two jobs held at the same time are not added up
+    total, covered = 0, 0
+    for start, end in sorted(spans):
+        start = max(start, covered)
+        if end > start:
+            total += end - start
+            covered = end
+    return total or None
+
+def parse_resume(data, file_format):
+    """Application fields found in a resume; fields that could not be found are left out"""
+    if file_format == "docx":
+        text = docx_text(data)
+    elif file_format == "pdf":
+        text = pdf_text(data)
+    else:
+        raise ResumeParseError("Resume must be a .docx or .pdf file")
+    sections = segment(text)
+    fields = _contact(sections)
+    fields.update({
+        "skills": _skills(sections.get("skills", [])),
+        "relevant_experience": _join(sections.get("experience", []) or sections.get("summary", [])),
+        "education": _join(sections.get("education", [])),
+        "projects": _join(sections.get("projects", [])),
+        "summary": _join(sections.get("summary", [])),
+        "certifications": _join(sections.get("certifications", [])),
+        "experience_years": experience_years(sections),
+    })
+    fields["sections"] = sorted(section for section in sections if section != "header")
+    return {key: value for key, value in fields.items() if value not in ("", None)}
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+def get_parse_pool():
+    """Spawned process pool for parsing; XML and PDF text extraction are CPU bound"""
+    global _parse_pool
+    if _parse_pool is None:
+        # Concurrent first requests from the thread pool must not each spawn a pool
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ProcessPoolExecutor(
+                    max_workers=RESUME_PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _parse_pool
+
+def discard_parse_pool(pool):
+    """Stop using pool, e.g. after one of its workers died or hung; the next parse spawns a new one"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def parse_in_pool(data, file_format):
+    """parse_resume on the process pool, waiting at most RESUME_PARSE_TIMEOUT_SECONDS"""
+    pool = get_parse_pool()
+    try:
+        future = pool.submit(parse_resume, data, file_format)
+    except BrokenProcessPool:
+        discard_parse_pool(pool)
+        pool = get_parse_pool()
+        future = pool.submit(parse_resume, data, file_format)
+    try:
+        return future.result(timeout=RESUME_PARSE_TIMEOUT_SECONDS)
+    except (BrokenProcessPool, FutureTimeout) as e:
+        # A dead worker breaks the whole pool, and a hung one holds a slot: replace it for later parses
+        discard_parse_pool(pool)
+        raise ResumeParseError("The resume could not be parsed") from e
+
+def shutdown_parse_pool():
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+            _parse_pool = None
@@ -0,0 +1,38 @@
+"""Resume parsing with a cache shared by every worker.
+
+Parsed fields are stored under the SHA-256 of the file and the parser
+version, so the same resume is parsed once however often, and by whoever,
+it is uploaded. Parsing itself runs on the process pool from resume_parser.
+"""
+import hashlib
+import json
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from metrics import OPERATION_LATENCY
+from models import ParsedResume
+from resume_parser import parse_in_pool, PARSER_VERSION
+
+def cached_fields(db, content_hash):
+    row = db.get(ParsedResume, (content_hash, PARSER_VERSION))
+    return json.loads(row.fields) if row is not None else None
+
+def parse_upload(db, data, file_format):
+    """Fields parsed from an uploaded resume, and whether they came from the cache"""
+    content_hash = hashlib.sha256(data).hexdigest()
+    fields = cached_fields(db, content_hash)
+    if fields is not None:
+        return fields, True
+
+    with OPERATION_LATENCY.time(operation="resume_parse"):
+        fields = parse_in_pool(data, file_format)
+    db.add(ParsedResume(
+        content_hash=content_hash, parser_version=PARSER_VERSION, fields=json.dumps(fields), created_at=datetime.utcnow()
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request parsed the same file at the same time; both results are identical
+        db.rollback()
+    return fields, False
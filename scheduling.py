@@ -0,0 +1,258 @@
+"""Interview scheduling: interviewer availability, conflict checks and auto-scheduling.
+
+Interviews are kept from overlapping for both the interviewer and the
+candidate. Two intervals overlap when each starts before the other ends;
+because no interview is longer than MAX_INTERVIEW_MINUTES, the ones that
+can overlap [start, end) all start in [start - MAX_INTERVIEW_MINUTES, end),
+which is a range scan on the (interviewer_id, start_at) and
+(candidate_id, start_at) indexes however many interviews a day holds.
+
+A booking is one INSERT ... SELECT ... WHERE NOT EXISTS (overlap), so the
+check and the write happen under the same SQLite write lock and two
+workers cannot book the same slot. The auto-scheduler reads availability
+and existing interviews for the whole range once, plans every slot in
+memory, then books each one the same way.
+"""
+import bisect
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, insert, update, exists, literal, and_
+
+from models import Application, Interview, InterviewerAvailability, Notification
+
+DEFAULT_DURATION_MINUTES = 45
+MAX_INTERVIEW_MINUTES = 240
+MAX_AVAILABILITY_HOURS = 24
+MAX_AUTO_SCHEDULE_DAYS = 31
+# Auto-scheduled interviews start on this grid, e.g. 9:00, 9:15, 9:30
+SLOT_STEP_MINUTES = 15
+
+class SchedulingError(ValueError):
+    pass
+
+def check_interval(start_at, end_at, max_length, too_long):
+    if end_at <= start_at:
+        raise SchedulingError("End time must be after start time")
+    if end_at - start_at > max_length:
+        raise SchedulingError(too_long)
+
+def _naive_utc(value):
+    # Columns hold naive UTC, like every other timestamp in the database
+    if value.tzinfo is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    return value
+
+def _overlapping(column, owner_id, start_at, end_at):
+    """Scheduled interviews of one interviewer or candidate that overlap [start_at, end_at)"""
+    return and_(
+        column == owner_id,
+        Interview.start_at > start_at - timedelta(minutes=MAX_INTERVIEW_MINUTES),
+        Interview.start_at < end_at,
+        Interview.end_at > start_at,
+        Interview.status == "scheduled",
+    )
+
+def interviews_between(db, start_at, end_at, interviewer_id=None, candidate_id=None):
+    """Scheduled interviews of an interviewer and/or a candidate that overlap [start_at, end_at)"""
+    start_at, end_at = _naive_utc(start_at), _naive_utc(end_at)
+    return db.query(Interview).filter(
+        _overlapping(Interview.interviewer_id, interviewer_id, start_at, end_at)
+        | _overlapping(Interview.candidate_id, candidate_id, start_at, end_at)
+    ).order_by(Interview.start_at).all()
+
+def add_availability(db, interviewer_id, start_at, end_at):
+    start_at, end_at = _naive_utc(start_at), _naive_utc(end_at)
+    check_interval(
+        start_at, end_at, timedelta(hours=MAX_AVAILABILITY_HOURS),
+        f"An availability window can be at most {MAX_AVAILABILITY_HOURS} hours"
+    )
+    window = InterviewerAvailability(interviewer_id=interviewer_id, start_at=start_at, end_at=end_at)
+    db.add(window)
+    return window
+
+def availability(db, interviewer_ids, start_at, end_at):
+    """Availability windows of these interviewers that overlap [start_at, end_at), by start"""
+    start_at, end_at = _naive_utc(start_at), _naive_utc(end_at)
+    return db.query(InterviewerAvailability).filter(
+        InterviewerAvailability.interviewer_id.in_(interviewer_ids),
+        InterviewerAvailability.start_at > start_at - timedelta(hours=MAX_AVAILABILITY_HOURS),
+        InterviewerAvailability.start_at < end_at,
+        InterviewerAvailability.end_at > start_at,
+    ).order_by(InterviewerAvailability.start_at).all()
+
+def _notify(db, interview, title, message):
+    db.add(Notification(
+        user_id=interview.candidate_id,
+        title=title,
+        message=message,
+        notification_type="interview",
+        interview_date=interview.start_at,
+        interview_time=interview.start_at.strftime("%H:%M UTC"),
+        webex_link=interview.meeting_link,
+    ))
+
+def _book(db, application_id, candidate_id, interviewer_id, start_at, end_at, meeting_link):
+    """Insert the interview unless it overlaps one of either person's; returns the new id or None"""
+    free = select(
+        literal(application_id), literal(interviewer_id), literal(candidate_id),
+        literal(start_at), literal(end_at), literal("scheduled"), literal(meeting_link), literal(datetime.utcnow()),
+    ).where(
+        ~exists().where(_overlapping(Interview.interviewer_id, interviewer_id, start_at, end_at)),
+        ~exists().where(_overlapping(Interview.candidate_id, candidate_id, start_at, end_at)),
+    )
+    columns = ["application_id", "interviewer_id", "candidate_id", "start_at", "end_at", "status", "meeting_link", "created_at"]
+    return db.execute(insert(Interview).from_select(columns, free).returning(Interview.id)).scalar()
+
+def schedule_interview(db, application, job_title, interviewer_id, start_at,
+                       duration_minutes=DEFAULT_DURATION_MINUTES, meeting_link=None):
+    """Book one interview, replacing the application's current one; returns it, or None on a conflict.
+
+    Availability windows are not enforced here: HR booking by hand may pick any free time.
+    """
+    start_at = _naive_utc(start_at)
+    end_at = start_at + timedelta(minutes=duration_minutes)
+    check_interval(
+        start_at, end_at, timedelta(minutes=MAX_INTERVIEW_MINUTES),
+        f"An interview can last at most {MAX_INTERVIEW_MINUTES} minutes"
+    )
+    # Cancelled first, so a reschedule does not conflict with the interview it replaces
+    rescheduled = db.execute(
+        update(Interview)
+        .where(Interview.application_id == application.id, Interview.status == "scheduled")
+        .values(status="cancelled")
+    ).rowcount
+    interview_id = _book(db, application.id, application.candidate_id, interviewer_id, start_at, end_at, meeting_link)
+    if interview_id is None:
+        return None
+    interview = db.get(Interview, interview_id)
+    _notify(
+        db, interview,
+        "Your interview has been rescheduled" if rescheduled else "Interview scheduled",
+        f"Your interview for {job_title} is on {start_at:%A %d %B %Y at %H:%M} UTC ({duration_minutes} minutes).",
+    )
+    return interview
+
+def cancel_interview(db, interview, job_title):
+    interview.status = "cancelled"
+    _notify(db, interview, "Interview cancelled", f"Your interview for {job_title} on {interview.start_at:%d %B %Y at %H:%M} UTC was cancelled.")
+
+def _is_free(busy, start_at, end_at):
+    """True if no interval in busy, sorted and non-overlapping, overlaps [start_at, end_at)"""
+    i = bisect.bisect_left(busy, (end_at,))
+    return i == 0 or busy[i - 1][1] <= start_at
+
+def plan_interviews(applications, windows, interviewer_busy, candidate_busy, duration, buffer, step):
+    """Assign applications, in priority order, to the earliest slot free for both people.
+
+    applications: (application_id, candidate_id) pairs. windows: (interviewer_id, start, end)
+    availability. The busy maps hold sorted (start, end) intervals and are updated in place.
+    Returns ([(application_id, interviewer_id, start)], [unscheduled application ids]).
+    """
+    slots = []
+    for interviewer_id, window_start, window_end in windows:
+        # Round up onto the grid, counted from midnight
+        midnight = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+        t = midnight + -((midnight - window_start) // step) * step
+        while t + duration <= window_end:
+            slots.append((t, interviewer_id))
+            t += step
+    slots.sort()
+
+    def interviewer_free(slot):
+        t, interviewer_id = slot
+        return _is_free(interviewer_busy.setdefault(interviewer_id, []), t - buffer, t + duration + buffer)
+
+    planned, unscheduled = [], []
+    first = 0
+    for application_id, candidate_id in applications:
+        # Slots booked solid for their interviewer are no use to any later application either
+        while first < len(slots) and not interviewer_free(slots[first]):
+            first += 1
+        busy = candidate_busy.setdefault(candidate_id, [])
+        for t, interviewer_id in slots[first:]:
+            if interviewer_free((t, interviewer_id)) and _is_free(busy, t, t + duration):
+                bisect.insort(interviewer_busy[interviewer_id], (t, t + duration))
+                bisect.insort(busy, (t, t + duration))
+                planned.append((application_id, interviewer_id, t))
+                break
+        else:
+            unscheduled.append(application_id)
+    return planned, unscheduled
+
+def _busy_intervals(db, column, owner_ids, start_at, end_at):
+    busy = {}
+    if not owner_ids:
+        return busy
+    rows = db.execute(
+        select(column, Interview.start_at, Interview.end_at).where(
+            column.in_(owner_ids),
+            Interview.start_at > start_at - timedelta(minutes=MAX_INTERVIEW_MINUTES),
+            Interview.start_at < end_at,
+            Interview.status == "scheduled",
+        ).order_by(Interview.start_at)
+    )
+    for owner_id, busy_start, busy_end in rows:
+        busy.setdefault(owner_id, []).append((busy_start, busy_end))
+    return busy
+
+def auto_schedule(db, job, interviewer_ids, start_at, end_at, duration_minutes=DEFAULT_DURATION_MINUTES,
+                  buffer_minutes=15, meeting_link=None):
+    """Schedule every shortlisted application of a job with no interview yet; best scored first.
+
+    Returns (booked interviews, ids of applications left unscheduled).
+    """
+    start_at, end_at = _naive_utc(start_at), _naive_utc(end_at)
+    check_interval(
+        start_at, end_at, timedelta(days=MAX_AUTO_SCHEDULE_DAYS),
+        f"Auto-scheduling covers at most {MAX_AUTO_SCHEDULE_DAYS} days at a time"
+    )
+    duration = timedelta(minutes=duration_minutes)
+    check_interval(
+        start_at, start_at + duration, timedelta(minutes=MAX_INTERVIEW_MINUTES),
+        f"An interview can last at most {MAX_INTERVIEW_MINUTES} minutes"
+    )
+    if buffer_minutes < 0:
+        raise SchedulingError("Buffer cannot be negative")
+
+    applications = db.execute(
+        select(Application.id, Application.candidate_id)
+        .where(
+            Application.job_id == job.id,
+            Application.status == "shortlisted",
+            ~exists().where(Interview.application_id == Application.id, Interview.status == "scheduled"),
+        )
+        .order_by(Application.ai_score.desc(), Application.id)
+    ).all()
+    if not applications:
+        return [], []
+
+    windows = [
+        (w.interviewer_id, max(w.start_at, start_at), min(w.end_at, end_at))
+        for w in availability(db, interviewer_ids, start_at, end_at)
+    ]
+    planned, unscheduled = plan_interviews(
+        applications,
+        windows,
+        _busy_intervals(db, Interview.interviewer_id, interviewer_ids, start_at, end_at),
+        _busy_intervals(db, Interview.candidate_id, {c for _, c in applications}, start_at, end_at),
+        duration,
+        timedelta(minutes=buffer_minutes),
+        timedelta(minutes=SLOT_STEP_MINUTES),
+    )
+
+    candidates = dict(applications)
+    booked_ids = []
+    for application_id, interviewer_id, t in planned:
+        interview_id = _book(db, application_id, candidates[application_id], interviewer_id, t, t + duration, meeting_link)
+        if interview_id is None:
+            # Booked by another request since the plan was read
+            unscheduled.append(application_id)
+        else:
+            booked_ids.append(interview_id)
+    booked = db.query(Interview).filter(Interview.id.in_(booked_ids)).order_by(Interview.start_at, Interview.id).all()
+    for interview in booked:
+        _notify(
+            db, interview, "Interview scheduled",
+            f"Your interview for {job.title} is on {interview.start_at:%A %d %B %Y at %H:%M} UTC ({duration_minutes} minutes).",
+        )
+    return booked, sorted(unscheduled)
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional, List
 from datetime import datetime
 
+class MessageResponse(BaseModel):
+    message: str
+
 # User schemas
 class UserBase(BaseModel):
     username: str
@@ -16,13 +19,34 @@ class UserLogin(BaseModel):
     username: str
     password: str
 
+class RegisterResponse(MessageResponse):
+    user_id: int
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str
+    user_type: str
+    user_id: int
+    refresh_token: str
+    expires_in: int  # seconds until access_token expires
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+class RevokeResponse(BaseModel):
+    revoked: int
+
+class ProfileResponse(UserBase):
+    id: int
+    
+    model_config = ConfigDict(from_attributes=True)
+
 class UserResponse(UserBase):
     id: int
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Job schemas
 class JobBase(BaseModel):
@@ -52,8 +76,25 @@ class JobResponse(JobBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class JobStatsResponse(BaseModel):
+    total: int
+    applied: int
+    shortlisted: int
+    scored: int
+    mean_ai_score: Optional[float] = None
+    max_ai_score: Optional[float] = None
+    last_applied_at: Optional[datetime] = None
+
+class JobWithStatsResponse(JobResponse):
+    stats: Optional[JobStatsResponse] = None  # only with ?include=stats
+
+class JobMatchResponse(JobResponse):
+    similarity: float  # cosine similarity of the job and profile embeddings
+
+class JobRecommendationResponse(JobResponse):
+    score: Optional[float] = None  # 0-1; None for the newest jobs shown before a first application
 
 # Application schemas
 class ApplicationBase(BaseModel):
@@ -71,6 +112,21 @@ class ApplicationBase(BaseModel):
 class ApplicationCreate(ApplicationBase):
     job_id: int
 
+class ApplicationImportRow(ApplicationCreate):
+    # ATS exports often leave these out; the columns are NOT NULL, so default to empty
+    address: str = ""
+    relevant_experience: str = ""
+    education: str = ""
+    projects: str = ""
+    preferred_location: str = ""
+
+class ApplicationImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[dict]
+    errors_truncated: bool
+    queued_for_scoring: int
+
 class ApplicationResponse(ApplicationBase):
     id: int
     job_id: int
@@ -81,8 +137,102 @@ class ApplicationResponse(ApplicationBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class ApplicationSummaryResponse(BaseModel):
+    """An application without its free-text fields, for long lists"""
+    id: int
+    job_id: int
+    candidate_id: int
+    name: str
+    email: str
+    phone: str
+    experience_years: int
+    preferred_location: str
+    photo_path: Optional[str] = None
+    ai_score: float
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class ApplicationSubmitResponse(MessageResponse):
+    ai_score: float
+
+class ShortlistResponse(MessageResponse):
+    questions: List[str]
+
+class ParsedResumeResponse(BaseModel):
+    """Application fields found in a resume; anything not found is null"""
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    experience_years: Optional[int] = None
+    relevant_experience: Optional[str] = None
+    skills: Optional[str] = None
+    education: Optional[str] = None
+    projects: Optional[str] = None
+    sections: List[str] = []
+    cached: bool
+
+class ApplicationMatchResponse(ApplicationResponse):
+    similarity: float  # cosine similarity of the profile and job embeddings
+
+class DuplicateFlagResponse(BaseModel):
+    application_id: int
+    duplicate_of: int
+    reason: str  # email, phone or profile
+    similarity: float
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class InterviewPackRequest(BaseModel):
+    job_id: Optional[int] = None  # every shortlisted application for the job
+    application_ids: Optional[List[int]] = None
+
+# Interview scheduling schemas
+class AvailabilityCreate(BaseModel):
+    interviewer_id: Optional[int] = None  # defaults to the current user
+    start_at: datetime
+    end_at: datetime
+
+class AvailabilityResponse(AvailabilityCreate):
+    id: int
+    interviewer_id: int
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class InterviewCreate(BaseModel):
+    interviewer_id: Optional[int] = None  # defaults to the current user
+    start_at: datetime
+    duration_minutes: int = 45
+    meeting_link: Optional[str] = None
+
+class InterviewResponse(BaseModel):
+    id: int
+    application_id: int
+    interviewer_id: int
+    candidate_id: int
+    start_at: datetime
+    end_at: datetime
+    status: str
+    meeting_link: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class AutoScheduleRequest(BaseModel):
+    interviewer_ids: List[int]
+    start_at: datetime
+    end_at: datetime
+    duration_minutes: int = 45
+    buffer_minutes: int = 15  # free time kept between one interviewer's interviews
+    meeting_link: Optional[str] = None
+
+class AutoScheduleResponse(BaseModel):
+    scheduled: List[InterviewResponse]
+    unscheduled: List[int]  # application ids no free slot was found for
 
 # Notification schemas
 class NotificationBase(BaseModel):
@@ -105,5 +255,34 @@ class NotificationResponse(NotificationBase):
     interview_time: Optional[str] = None
     webex_link: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+# Archive schemas
+class ArchivedApplicationResponse(ApplicationResponse):
+    job_title: Optional[str] = None
+    archived_at: datetime
+    interviews: List[InterviewResponse] = []
+
+class ArchivedNotificationResponse(NotificationResponse):
+    archived_at: datetime
+
+# Profiling schemas
+class ProfileSummaryResponse(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: Optional[str] = None
+    status: Optional[int] = None
+    trigger: str
+    started_at: datetime
+    duration_ms: float
+    sampled_ms: float
+    queries: int
+
+class SlowQueryResponse(BaseModel):
+    at: datetime
+    request: Optional[str] = None
+    duration_ms: float
+    statement: str
+    parameters: str
+    plan: Optional[str] = None
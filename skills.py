@@ -0,0 +1,171 @@
+from sqlalchemy import select, func, insert, delete
+
+from models import Skill, Job, Application, application_skills, job_skills
+
+# Alias rules applied before a skill is looked up in the index, so that
+# "JS", "js" and "JavaScript" all land on the same Skill row.
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "kube": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "react.js": "react",
+    "reactjs": "react",
+    "vue.js": "vue",
+    "vuejs": "vue",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "cpp": "c++",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "aws cloud": "aws",
+    "amazon web services": "aws",
+    "gcp": "google cloud",
+    "sklearn": "scikit-learn",
+    "tf": "tensorflow",
+}
+
+def normalize_skill(raw):
+    """Canonicalize a single free-text skill, or return None if it is empty"""
+    name = " ".join(raw.strip().lower().split())
+    name = name.strip(" .;:-")
+    if not name:
+        return None
+    return SKILL_ALIASES.get(name, name)
+
+def parse_skills(text):
+    """Split a comma separated skills string into unique canonical names"""
+    if not text:
+        return []
+    seen = []
+    for part in text.replace(";", ",").replace("\n", ",").split(","):
+        name = normalize_skill(part)
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+def get_skill_ids(db, names, create=True):
+    """Resolve canonical skill names to Skill ids, creating missing rows"""
+    if not names:
+        return set()
+    rows = db.execute(select(Skill.name, Skill.id).where(Skill.name.in_(names))).all()
+    ids = {name: skill_id for name, skill_id in rows}
+    missing = [name for name in names if name not in ids]
+    if missing and create:
+        # Another request may add the same skill between the select and here
+        db.execute(insert(Skill).prefix_with("OR IGNORE", dialect="sqlite"), [{"name": name} for name in missing])
+        ids.update(db.execute(select(Skill.name, Skill.id).where(Skill.name.in_(missing))).all())
+    return set(ids.values())
+
+def index_application_skills(db, application_id, skill_ids):
+    """Replace the posting list entries for one application"""
+    db.execute(delete(application_skills).where(application_skills.c.application_id == application_id))
+    if skill_ids:
+        db.execute(insert(application_skills), [
+            {"application_id": application_id, "skill_id": skill_id} for skill_id in skill_ids
+        ])
+
+def index_job_skills(db, job_id, skill_ids):
+    """Replace the required skill entries for one job"""
+    db.execute(delete(job_skills).where(job_skills.c.job_id == job_id))
+    if skill_ids:
+        db.execute(insert(job_skills), [
+            {"job_id": job_id, "skill_id": skill_id} for skill_id in skill_ids
+        ])
+
+def search_applications(db, skill_names, min_experience=None, job_id=None, limit=100):
+    """Find applications that have ALL of the given skills.
+
+    The lookup walks the (skill_id, application_id) posting lists and keeps
+    the applications that appear once per requested skill, so the cost is
+    proportional to the posting list sizes rather than the table size.
+    """
+    names = []
+    for raw in skill_names:
+        name = normalize_skill(raw)
+        if name and name not in names:
+            names.append(name)
+    if not names:
+        return []
+
+    skill_ids = get_skill_ids(db, names, create=False)
+    if len(skill_ids) < len(names):
+        # At least one skill has never been seen, so nothing can match all of them
+        return []
+
+    matches = (
+        select(application_skills.c.application_id)
+        .where(application_skills.c.skill_id.in_(skill_ids))
+        .group_by(application_skills.c.application_id)
+        .having(func.count() == len(skill_ids))
+        .subquery()
+    )
+    query = select(Application).join(matches, Application.id == matches.c.application_id)
+    if min_experience is not None:
+        query = query.where(Application.experience_years >= min_experience)
+    if job_id is not None:
+        query = query.where(Application.job_id == job_id)
+    query = query.order_by(Application.ai_score.desc()).limit(limit)
+    return db.scalars(query).all()
+
+def reindex_jobs(db, after_id, batch_size):
+    """Index the skills of the next batch of jobs after after_id; returns the last id, or None when done"""
+    jobs = db.execute(
+        select(Job.id, Job.skills).where(Job.id > after_id).order_by(Job.id).limit(batch_size)
+    ).all()
+    if not jobs:
+        return None
+    for job_id, text in jobs:
+        index_job_skills(db, job_id, get_skill_ids(db, parse_skills(text)))
+    return jobs[-1][0]
+
+def reindex_applications(db, after_id, batch_size):
+    """Index the skills of the next batch of applications after after_id; returns the last id, or None when done"""
+    applications = db.execute(
+        select(Application.id, Application.skills)
+        .where(Application.id > after_id)
+        .order_by(Application.id)
+        .limit(batch_size)
+    ).all()
+    if not applications:
+        return None
+    for application_id, text in applications:
+        index_application_skills(db, application_id, get_skill_ids(db, parse_skills(text)))
+    return applications[-1][0]
+
+def reindex_all(db, batch_size=500):
+    """Rebuild the skill index of every job and application, one transaction per batch; returns the counts"""
+    counts = {}
+    for table, model, step in (("jobs", Job, reindex_jobs), ("applications", Application, reindex_applications)):
+        last_id = step(db, 0, batch_size)
+        while last_id is not None:
+            db.commit()
+            last_id = step(db, last_id, batch_size)
+        counts[table] = db.scalar(select(func.count(model.id)))
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Skill index maintenance")
+    parser.add_argument("--reindex", action="store_true", help="index the skills of every job and application")
+    args = parser.parse_args()
+    if args.reindex:
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            print(", ".join(f"{count} {table}" for table, count in reindex_all(db).items()) + " indexed")
+        finally:
+            db.close()
+    else:
+        parser.print_help()
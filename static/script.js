@@ -5,6 +5,8 @@ const API_BASE = '/api';
 let currentUser = null;
 let currentSection = 'home';
 let authToken = localStorage.getItem('authToken');
+let refreshToken = localStorage.getItem('refreshToken');
+let refreshing = null;
 
 // Initialize app
 document.addEventListener('DOMContentLoaded', function() {
@@ -44,6 +46,8 @@ function setupEventListeners() {
     document.getElementById('register-form').addEventListener('submit', handleRegister);
     document.getElementById('job-form').addEventListener('submit', handleJobSubmit);
     document.getElementById('application-form').addEventListener('submit', handleApplicationSubmit);
+    document.getElementById('app-resume').addEventListener('change', handleResumeUpload);
+    document.getElementById('interview-form').addEventListener('submit', handleInterviewSubmit);
     
     // Dashboard tabs
     document.querySelectorAll('.tab-btn').forEach(btn => {
@@ -59,6 +63,8 @@ function setupEventListeners() {
     document.getElementById('cancel-job').addEventListener('click', () => closeJobModal());
     document.getElementById('close-application-modal').addEventListener('click', () => closeApplicationModal());
     document.getElementById('cancel-application').addEventListener('click', () => closeApplicationModal());
+    document.getElementById('close-interview-modal').addEventListener('click', () => closeInterviewModal());
+    document.getElementById('cancel-interview').addEventListener('click', () => closeInterviewModal());
     
     // Close modals when clicking outside
     window.addEventListener('click', (e) => {
@@ -88,8 +94,7 @@ async function handleLogin(e) {
         const data = await response.json();
         
         if (response.ok) {
-            authToken = data.access_token;
-            localStorage.setItem('authToken', authToken);
+            saveSession(data);
             currentUser = {
                 username: username,
                 user_type: data.user_type,
@@ -159,7 +164,7 @@ async function handleRegister(e) {
 
 async function verifyToken() {
     try {
-        const response = await fetch(`${API_BASE}/profile`, {
+        const response = await authFetch(`${API_BASE}/profile`, {
             headers: {
                 'Authorization': `Bearer ${authToken}`
             }
@@ -188,10 +193,64 @@ async function verifyToken() {
     }
 }
 
+function saveSession(data) {
+    authToken = data.access_token;
+    refreshToken = data.refresh_token;
+    localStorage.setItem('authToken', authToken);
+    localStorage.setItem('refreshToken', refreshToken);
+}
+
+// Trade the refresh token for a new pair; concurrent callers share one request,
+// because a refresh token can only be spent once
+function refreshSession() {
+    if (!refreshToken) return Promise.resolve(false);
+    if (!refreshing) {
+        refreshing = fetch(`${API_BASE}/token/refresh`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ refresh_token: refreshToken })
+        }).then(async response => {
+            if (!response.ok) return false;
+            saveSession(await response.json());
+            return true;
+        }).catch(() => false).finally(() => {
+            refreshing = null;
+        });
+    }
+    return refreshing;
+}
+
+// fetch with the current access token, renewing the session once if it has expired
+async function authFetch(url, options = {}) {
+    const withToken = () => ({
+        ...options,
+        headers: { ...(options.headers || {}), 'Authorization': `Bearer ${authToken}` }
+    });
+    let response = await fetch(url, withToken());
+    if (response.status === 401 && await refreshSession()) {
+        response = await fetch(url, withToken());
+    }
+    return response;
+}
+
 function logout() {
+    if (refreshToken) {
+        // Revoke the session server side; nothing to wait for
+        fetch(`${API_BASE}/logout`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ refresh_token: refreshToken })
+        }).catch(() => {});
+    }
     authToken = null;
+    refreshToken = null;
     currentUser = null;
     localStorage.removeItem('authToken');
+    localStorage.removeItem('refreshToken');
     updateNavigation();
     showSection('home');
     showToast('Logged out successfully', 'success');
@@ -268,7 +327,7 @@ async function loadJobs() {
     
     showLoading(true);
     try {
-        const response = await fetch(`${API_BASE}/jobs`, {
+        const response = await authFetch(`${API_BASE}/jobs?include=stats`, {
             headers: {
                 'Authorization': `Bearer ${authToken}`
             }
@@ -288,20 +347,32 @@ async function loadJobs() {
     }
 }
 
-async function loadJobsForCandidate() {
+async function loadJobsForCandidate(showAll = false) {
     if (!authToken) return;
     
     showLoading(true);
     try {
-        const response = await fetch(`${API_BASE}/jobs`, {
-            headers: {
-                'Authorization': `Bearer ${authToken}`
-            }
-        });
+        // One page of recommended jobs by default; the full board is public, so
+        // sending no credentials for it lets the proxy cache serve it
+        const response = showAll
+            ? await fetch(`${API_BASE}/jobs`)
+            : await authFetch(`${API_BASE}/jobs/recommended`, {
+                headers: {
+                    'Authorization': `Bearer ${authToken}`
+                }
+            });
         
         if (response.ok) {
             const jobs = await response.json();
             displayJobsForCandidate(jobs, 'candidate-jobs-grid');
+            if (!showAll) {
+                const container = document.getElementById('candidate-jobs-grid');
+                container.insertAdjacentHTML('beforeend', `
+                    <div class="job-actions">
+                        <button class="btn btn-secondary" onclick="loadJobsForCandidate(true)">Show all jobs</button>
+                    </div>
+                `);
+            }
         } else {
             showToast('Failed to load jobs', 'error');
         }
@@ -345,6 +416,15 @@ function displayJobs(jobs, containerId) {
                     <i class="fas fa-calendar"></i>
                     <span>Posted ${formatDate(job.created_at)}</span>
                 </div>
+                ${job.stats ? `
+                <div class="job-detail">
+                    <i class="fas fa-users"></i>
+                    <span>${job.stats.total} applicants, ${job.stats.shortlisted} shortlisted</span>
+                </div>
+                <div class="job-detail">
+                    <i class="fas fa-star"></i>
+                    <span>Avg score ${job.stats.mean_ai_score ?? '-'}, best ${job.stats.max_ai_score ?? '-'}</span>
+                </div>` : ''}
             </div>
             
             <div class="job-skills">
@@ -361,6 +441,7 @@ function displayJobs(jobs, containerId) {
                 <button class="btn btn-primary" onclick="viewJobApplications(${job.id})">
                     View Applications
                 </button>
+                <button class="btn btn-secondary" onclick="exportApplications(${job.id})">Export CSV</button>
                 <button class="btn btn-danger" onclick="deleteJob(${job.id})">Delete</button>
             </div>
         </div>
@@ -397,6 +478,12 @@ function displayJobsForCandidate(jobs, containerId) {
                     <i class="fas fa-calendar"></i>
                     <span>Posted ${formatDate(job.created_at)}</span>
                 </div>
+                ${job.score != null ? `
+                <div class="job-detail">
+                    <i class="fas fa-star"></i>
+                    <span>${Math.round(job.score * 100)}% match</span>
+                </div>
+                ` : ''}
             </div>
             
             <div class="job-skills">
@@ -452,7 +539,7 @@ async function handleJobSubmit(e) {
     };
     
     try {
-        const response = await fetch(`${API_BASE}/jobs`, {
+        const response = await authFetch(`${API_BASE}/jobs`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -482,7 +569,7 @@ async function deleteJob(jobId) {
     
     showLoading(true);
     try {
-        const response = await fetch(`${API_BASE}/jobs/${jobId}`, {
+        const response = await authFetch(`${API_BASE}/jobs/${jobId}`, {
             method: 'DELETE',
             headers: {
                 'Authorization': `Bearer ${authToken}`
@@ -513,6 +600,52 @@ function closeApplicationModal() {
     document.getElementById('application-modal').style.display = 'none';
 }
 
+// Form inputs filled from the matching field of a parsed resume
+const RESUME_FIELDS = {
+    'app-name': 'name',
+    'app-email': 'email',
+    'app-phone': 'phone',
+    'app-experience': 'experience_years',
+    'app-relevant-exp': 'relevant_experience',
+    'app-skills': 'skills',
+    'app-education': 'education',
+    'app-projects': 'projects'
+};
+
+async function handleResumeUpload(e) {
+    const file = e.target.files[0];
+    if (!file) return;
+    
+    const formData = new FormData();
+    formData.append('resume', file);
+    showLoading(true);
+    try {
+        const response = await authFetch(`${API_BASE}/resumes/parse`, {
+            method: 'POST',
+            body: formData
+        });
+        const result = await response.json();
+        
+        if (response.ok) {
+            let filled = 0;
+            for (const [inputId, field] of Object.entries(RESUME_FIELDS)) {
+                if (result[field] !== null && result[field] !== undefined) {
+                    document.getElementById(inputId).value = result[field];
+                    filled++;
+                }
+            }
+            showToast(filled ? `Filled ${filled} fields from your resume; please review them` : 'No details found in the resume', filled ? 'success' : 'error');
+        } else {
+            showToast(result.detail || 'Failed to read resume', 'error');
+        }
+    } catch (error) {
+        showToast('Failed to read resume', 'error');
+        console.error('Resume parse error:', error);
+    } finally {
+        showLoading(false);
+    }
+}
+
 async function handleApplicationSubmit(e) {
     e.preventDefault();
     showLoading(true);
@@ -532,7 +665,7 @@ async function handleApplicationSubmit(e) {
     formData.append('photo', document.getElementById('app-photo').files[0]);
     
     try {
-        const response = await fetch(`${API_BASE}/applications`, {
+        const response = await authFetch(`${API_BASE}/applications`, {
             method: 'POST',
             headers: {
                 'Authorization': `Bearer ${authToken}`
@@ -560,7 +693,7 @@ async function handleApplicationSubmit(e) {
 async function viewJobApplications(jobId) {
     showLoading(true);
     try {
-        const response = await fetch(`${API_BASE}/jobs/${jobId}/applications`, {
+        const response = await authFetch(`${API_BASE}/jobs/${jobId}/applications`, {
             headers: {
                 'Authorization': `Bearer ${authToken}`
             }
@@ -594,7 +727,7 @@ function displayApplications(applications) {
         <div class="application-card">
             <div class="application-header">
                 <div class="candidate-info">
-                    <img src="/uploads/${app.photo_path.split('/').pop()}" alt="Candidate Photo" class="candidate-photo" onerror="this.src='data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iNjAiIGhlaWdodD0iNjAiIHZpZXdCb3g9IjAgMCA2MCA2MCIgZmlsbD0ibm9uZSIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KPGNpcmNsZSBjeD0iMzAiIGN5PSIzMCIgcj0iMzAiIGZpbGw9IiNlZWVlZWUiLz4KPHN2ZyB4PSIxNSIgeT0iMTAiIHdpZHRoPSIzMCIgaGVpZ2h0PSI0MCI+CjxjaXJjbGUgY3g9IjE1IiBjeT0iMTIiIHI9IjgiIGZpbGw9IiM5OTk5OTkiLz4KPHBhdGggZD0ibTUgMzVjMC04IDctMTUgMTUtMTVzMTUgNyAxNSAxNXoiIGZpbGw9IiM5OTk5OTkiLz4KPC9zdmc+Cjwvc3ZnPg=='" />
+                    <img src="/uploads/${(app.photo_path || '').split('/').pop()}" alt="Candidate Photo" class="candidate-photo" onerror="this.src='data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iNjAiIGhlaWdodD0iNjAiIHZpZXdCb3g9IjAgMCA2MCA2MCIgZmlsbD0ibm9uZSIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KPGNpcmNsZSBjeD0iMzAiIGN5PSIzMCIgcj0iMzAiIGZpbGw9IiNlZWVlZWUiLz4KPHN2ZyB4PSIxNSIgeT0iMTAiIHdpZHRoPSIzMCIgaGVpZ2h0PSI0MCI+CjxjaXJjbGUgY3g9IjE1IiBjeT0iMTIiIHI9IjgiIGZpbGw9IiM5OTk5OTkiLz4KPHBhdGggZD0ibTUgMzVjMC04IDctMTUgMTUtMTVzMTUgNyAxNSAxNXoiIGZpbGw9IiM5OTk5OTkiLz4KPC9zdmc+Cjwvc3ZnPg=='" />
                     <div class="candidate-details">
                         <h4>${app.name}</h4>
                         <p>${app.email} | ${app.phone}</p>
@@ -652,7 +785,7 @@ function getScoreClass(score) {
 async function shortlistCandidate(applicationId) {
     showLoading(true);
     try {
-        const response = await fetch(`${API_BASE}/applications/${applicationId}/shortlist`, {
+        const response = await authFetch(`${API_BASE}/applications/${applicationId}/shortlist`, {
             method: 'POST',
             headers: {
                 'Authorization': `Bearer ${authToken}`
@@ -676,7 +809,7 @@ async function shortlistCandidate(applicationId) {
 
 async function downloadQuestions(applicationId) {
     try {
-        const response = await fetch(`${API_BASE}/applications/${applicationId}/questions/pdf`, {
+        const response = await authFetch(`${API_BASE}/applications/${applicationId}/questions/pdf`, {
             headers: {
                 'Authorization': `Bearer ${authToken}`
             }
@@ -702,12 +835,39 @@ async function downloadQuestions(applicationId) {
     }
 }
 
+async function exportApplications(jobId, format = 'csv') {
+    try {
+        const response = await authFetch(`${API_BASE}/jobs/${jobId}/applications/export?format=${format}`, {
+            headers: {
+                'Authorization': `Bearer ${authToken}`
+            }
+        });
+        
+        if (response.ok) {
+            const blob = await response.blob();
+            const url = window.URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = `job_${jobId}_applications.${format}`;
+            document.body.appendChild(a);
+            a.click();
+            window.URL.revokeObjectURL(url);
+            document.body.removeChild(a);
+        } else {
+            showToast('Failed to export applications', 'error');
+        }
+    } catch (error) {
+        showToast('Failed to export applications', 'error');
+        console.error('Export error:', error);
+    }
+}
+
 // Notification functions
 async function loadNotifications() {
     if (!authToken) return;
     
     try {
-        const response = await fetch(`${API_BASE}/notifications`, {
+        const response = await authFetch(`${API_BASE}/notifications`, {
             headers: {
                 'Authorization': `Bearer ${authToken}`
             }
@@ -794,5 +954,48 @@ function loadMyApplications() {
 }
 
 function scheduleInterview(applicationId) {
-    showToast('Interview scheduling feature coming soon!', 'info');
+    document.getElementById('interview-form').reset();
+    document.getElementById('interview-application-id').value = applicationId;
+    document.getElementById('interview-modal').style.display = 'block';
+}
+
+function closeInterviewModal() {
+    document.getElementById('interview-modal').style.display = 'none';
+}
+
+async function handleInterviewSubmit(e) {
+    e.preventDefault();
+    showLoading(true);
+    
+    const applicationId = document.getElementById('interview-application-id').value;
+    const interviewData = {
+        // datetime-local is in the browser's time zone; the API stores UTC
+        start_at: new Date(document.getElementById('interview-start').value).toISOString(),
+        duration_minutes: parseInt(document.getElementById('interview-duration').value),
+        meeting_link: document.getElementById('interview-link').value || null
+    };
+    
+    try {
+        const response = await authFetch(`${API_BASE}/applications/${applicationId}/interview`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${authToken}`
+            },
+            body: JSON.stringify(interviewData)
+        });
+        
+        if (response.ok) {
+            showToast('Interview scheduled and candidate notified!', 'success');
+            closeInterviewModal();
+        } else {
+            const error = await response.json();
+            showToast(error.detail || 'Failed to schedule interview', 'error');
+        }
+    } catch (error) {
+        showToast('Failed to schedule interview', 'error');
+        console.error('Interview error:', error);
+    } finally {
+        showLoading(false);
+    }
 }
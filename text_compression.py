@@ -0,0 +1,185 @@
+"""Optional zstd compression for the long free-text columns of Application.
+
+    python text_compression.py --train        # train a dictionary on existing applications
+    python text_compression.py --recompress   # rewrite existing rows with the current dictionary
+
+CompressedText keeps the column declared TEXT, so switching compression on
+or off needs no migration. With TEXT_COMPRESSION=zstd and the zstandard
+package installed, values of MIN_COMPRESS_BYTES or more are written as zstd
+frames (SQLite stores them as BLOBs in the same column); shorter values, and
+values that would not shrink, stay plain text. Reads accept both, so a
+table can hold a mix and old rows need not be rewritten at once.
+
+A single address or skills list is too short to compress well on its own,
+so frames are written with a dictionary trained on existing rows, which
+holds the vocabulary they share. Dictionaries are saved as <id>.dict in
+TEXT_DICTIONARY_DIR and every frame records the id it was written with,
+so training a new one never strands older rows. Workers pick up a new
+dictionary when they restart.
+
+A value is decompressed only when a query selects its column; list views
+that show no free text use a projection without these columns and never
+pay for it.
+"""
+import os
+import threading
+
+from sqlalchemy import Text, select, update, bindparam
+from sqlalchemy.types import TypeDecorator
+
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "").lower()  # "zstd" to compress new writes
+TEXT_DICTIONARY_DIR = os.getenv("TEXT_DICTIONARY_DIR", "text_dictionaries")
+COMPRESSION_LEVEL = 3
+# Below this, the frame header costs more than compression saves
+MIN_COMPRESS_BYTES = 64
+DICTIONARY_SIZE = 64 * 1024
+TRAINING_SAMPLES = 20000
+BATCH_SIZE = 1000
+
+# Compressors and decompressors are not safe to share between threads
+_local = threading.local()
+_dictionaries = {}
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("Compressed application text needs the zstandard package") from e
+    return zstandard
+
+def compression_enabled():
+    return TEXT_COMPRESSION == "zstd"
+
+def _dictionary_path(dict_id, directory=None):
+    return os.path.join(directory or TEXT_DICTIONARY_DIR, f"{dict_id}.dict")
+
+def _current_path(directory=None):
+    return os.path.join(directory or TEXT_DICTIONARY_DIR, "current")
+
+def load_dictionary(dict_id, directory=None):
+    if dict_id not in _dictionaries:
+        with open(_dictionary_path(dict_id, directory), "rb") as f:
+            _dictionaries[dict_id] = _zstd().ZstdCompressionDict(f.read())
+    return _dictionaries[dict_id]
+
+def current_dictionary_id(directory=None):
+    """Id of the dictionary new values are written with, or None before one is trained"""
+    try:
+        with open(_current_path(directory)) as f:
+            return int(f.read().strip())
+    except FileNotFoundError:
+        return None
+
+def _compressor():
+    if not hasattr(_local, "compressor"):
+        dict_id = current_dictionary_id()
+        dictionary = load_dictionary(dict_id) if dict_id is not None else None
+        _local.compressor = _zstd().ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=dictionary)
+    return _local.compressor
+
+def _decompressor(dict_id):
+    decompressors = _local.__dict__.setdefault("decompressors", {})
+    if dict_id not in decompressors:
+        dictionary = load_dictionary(dict_id) if dict_id else None
+        decompressors[dict_id] = _zstd().ZstdDecompressor(dict_data=dictionary)
+    return decompressors[dict_id]
+
+def compress(value):
+    """A zstd frame for value, or value itself if compressing would not pay"""
+    data = value.encode("utf-8")
+    if len(data) < MIN_COMPRESS_BYTES:
+        return value
+    frame = _compressor().compress(data)
+    return frame if len(frame) < len(data) else value
+
+def decompress(value):
+    if not isinstance(value, bytes):
+        return value
+    dict_id = _zstd().get_frame_parameters(value).dict_id
+    return _decompressor(dict_id).decompress(value).decode("utf-8")
+
+def reset():
+    """Forget cached compressors, e.g. after training a dictionary in this process"""
+    _local.__dict__.clear()
+
+class CompressedText(TypeDecorator):
+    """Text that is stored zstd-compressed when TEXT_COMPRESSION is on"""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not compression_enabled():
+            return value
+        return compress(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress(value)
+
+def compressed_columns(model):
+    return [column for column in model.__table__.columns if isinstance(column.type, CompressedText)]
+
+def train_dictionary(db, model, samples=TRAINING_SAMPLES, size=DICTIONARY_SIZE, directory=None):
+    """Train a dictionary on the newest rows of model and make it current; returns its id"""
+    zstandard = _zstd()
+    columns = compressed_columns(model)
+    rows = db.execute(select(*columns).order_by(model.id.desc()).limit(samples)).all()
+    texts = [value.encode("utf-8") for row in rows for value in row if value]
+    if len(texts) < 100:
+        raise RuntimeError(f"Only {len(texts)} samples to train on; add more applications first")
+    dictionary = zstandard.train_dictionary(size, texts, level=COMPRESSION_LEVEL)
+    directory = directory or TEXT_DICTIONARY_DIR
+    os.makedirs(directory, exist_ok=True)
+    with open(_dictionary_path(dictionary.dict_id(), directory), "wb") as f:
+        f.write(dictionary.as_bytes())
+    # Written then renamed, so a worker starting meanwhile never reads half an id
+    with open(_current_path(directory) + ".tmp", "w") as f:
+        f.write(str(dictionary.dict_id()))
+    os.replace(_current_path(directory) + ".tmp", _current_path(directory))
+    reset()
+    return dictionary.dict_id()
+
+def recompress(db, model, batch_size=BATCH_SIZE):
+    """Rewrite every row's compressed columns with the current settings; returns how many rows"""
+    columns = compressed_columns(model)
+    statement = (
+        update(model.__table__)
+        .where(model.__table__.c.id == bindparam("row_id"))
+        # Rewriting storage is not an edit, so updated_at keeps its value
+        .values(updated_at=model.__table__.c.updated_at)
+    )
+    last_id, count = 0, 0
+    while True:
+        rows = db.execute(
+            select(model.id, *columns).where(model.id > last_id).order_by(model.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return count
+        db.connection().execute(statement, [
+            {"row_id": row[0], **{column.name: value for column, value in zip(columns, row[1:])}}
+            for row in rows
+        ])
+        db.commit()
+        last_id = rows[-1][0]
+        count += len(rows)
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import SessionLocal
+    from models import Application
+
+    parser = argparse.ArgumentParser(description="Compression of application text")
+    parser.add_argument("--train", action="store_true", help="train a dictionary on existing applications")
+    parser.add_argument("--recompress", action="store_true", help="rewrite existing rows with the current dictionary")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        if args.train:
+            print(f"Trained dictionary {train_dictionary(db, Application)}")
+        if args.recompress:
+            if not compression_enabled():
+                print("TEXT_COMPRESSION is not zstd; rows will be written back as plain text")
+            print(f"Rewrote {recompress(db, Application, args.batch_size)} applications")
+    finally:
+        db.close()